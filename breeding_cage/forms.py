@@ -1,6 +1,7 @@
 from django import forms
 
 from breeding_cage.models import BreedingCage
+from common.widgets import AutocompleteInput
 from mice_repository.models import Mouse
 from strain.models import Strain
 
@@ -15,18 +16,31 @@ class BreedingCageForm(forms.ModelForm):
     strain = forms.ModelChoiceField(
         queryset=Strain.objects.all(),
         required=True,
-        widget=forms.Select(attrs={"class": "form-select", "placeholder": "Strain"}),
+        widget=AutocompleteInput(
+            "common:autocomplete_strains",
+            attrs={"class": "form-control", "placeholder": "Strain"},
+        ),
         label="Pup Strain",
     )
     mother = forms.ModelChoiceField(
         queryset=Mouse.objects.filter(sex="F"),
         required=True,
-        widget=forms.Select(attrs={"class": "form-select", "placeholder": "Mother ID"}),
+        widget=AutocompleteInput(
+            "common:autocomplete_mice",
+            params={"sex": "F"},
+            include=["strain"],
+            attrs={"class": "form-control", "placeholder": "Mother ID"},
+        ),
     )
     father = forms.ModelChoiceField(
         queryset=Mouse.objects.filter(sex="M"),
         required=True,
-        widget=forms.Select(attrs={"class": "form-select", "placeholder": "Father ID"}),
+        widget=AutocompleteInput(
+            "common:autocomplete_mice",
+            params={"sex": "M"},
+            include=["strain"],
+            attrs={"class": "form-control", "placeholder": "Father ID"},
+        ),
     )
     date_born = forms.DateField(
         initial=None,
@@ -100,3 +114,11 @@ class PupsToStockCageForm(forms.ModelForm):
         model = Mouse
         fields = "__all__"
         exclude = []
+        widgets = {
+            "mother": AutocompleteInput(
+                "common:autocomplete_mice", params={"sex": "F"}, include=["strain"]
+            ),
+            "father": AutocompleteInput(
+                "common:autocomplete_mice", params={"sex": "M"}, include=["strain"]
+            ),
+        }
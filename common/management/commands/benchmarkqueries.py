@@ -0,0 +1,153 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from main.constants import EARMARK_CHOICES
+from mice_repository.models import Mouse
+from projects.models import Project
+from strain.models import Strain
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Generates a large colony inside a rolled back transaction and compares "
+        "query plans and timings of the hot Mouse queries with and without their indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mice", type=int, default=50000)
+        parser.add_argument("--strains", type=int, default=20)
+        parser.add_argument("--projects", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def generate_colony(self, n_mice, n_strains, n_projects):
+        strains = Strain.objects.bulk_create(
+            [Strain(strain_name=f"bench{i}") for i in range(n_strains)]
+        )
+        projects = Project.objects.bulk_create(
+            [Project(project_name=f"bench{i}") for i in range(n_projects)]
+        )
+        today = date.today()
+        mice = []
+        for i in range(n_mice):
+            strain = random.choice(strains)
+            mice.append(
+                Mouse(
+                    _global_id=f"{strain.strain_name}-{i}",
+                    strain=strain,
+                    tube=i,
+                    sex=random.choice(["M", "F"]),
+                    dob=today - timedelta(days=random.randint(0, 1000)),
+                    earmark=random.choice(EARMARK_CHOICES),
+                    project=random.choice(projects + [None]),
+                    culled_date=today if random.random() < 0.3 else None,
+                )
+            )
+        Mouse.objects.bulk_create(mice, batch_size=5000)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        return strains[0], projects[0]
+
+    def hot_queries(self, strain, project):
+        return [
+            (
+                "Alive mice of a strain aged 2-6 months",
+                lambda: Mouse.objects.filter(strain=strain).between_2_6_months_old(),
+                ["mice_alive_strain_dob_idx"],
+            ),
+            (
+                "Alive mice over 24 months old",
+                lambda: Mouse.objects.over_24_months_old(),
+                ["mice_alive_dob_idx"],
+            ),
+            (
+                "First ShowProjectView page",
+                lambda: Mouse.objects.filter(project=project).order_by("_global_id")[
+                    :15
+                ],
+                ["mice_project_global_id_idx"],
+            ),
+            (
+                "MouseFilter strain, sex and min age",
+                lambda: Mouse.objects.filter(
+                    sex="F", strain=strain, dob__lte=date.today() - timedelta(days=90)
+                ),
+                ["mice_strain_sex_dob_idx"],
+            ),
+            (
+                "Colony as of a year ago",
+                lambda: Mouse.objects.as_of(date.today() - timedelta(days=365)),
+                ["mice_dob_culled_idx"],
+            ),
+            (
+                "MouseFilter earmark and strain",
+                lambda: Mouse.objects.filter(earmark="TL", strain=strain),
+                ["mice_earmark_strain_idx"],
+            ),
+        ]
+
+    # Queries run as raw SQL tagged with the phase, so cached statements planned before the indexes were
+    # dropped are never reused
+    def run_sql(self, queryset, phase, prefix=""):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix}{sql} /* {phase} */", params)
+            return cursor.fetchall()
+
+    def time_query(self, build_queryset, phase, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self.run_sql(build_queryset(), phase)
+            timings.append(time.perf_counter() - start)
+        return min(timings) * 1000
+
+    def explain(self, build_queryset, phase):
+        prefix = f"{connection.ops.explain_query_prefix()} "
+        rows = self.run_sql(build_queryset(), phase, prefix)
+        return "\n    ".join(" ".join(str(column) for column in row) for row in rows)
+
+    def drop_indexes(self, index_names):
+        with connection.cursor() as cursor:
+            for name in index_names:
+                cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write(f"Generating {kwargs['mice']} mice...")
+        with transaction.atomic():
+            strain, project = self.generate_colony(
+                kwargs["mice"], kwargs["strains"], kwargs["projects"]
+            )
+            results = []
+            for label, build_queryset, index_names in self.hot_queries(strain, project):
+                results.append(
+                    [
+                        label,
+                        build_queryset,
+                        index_names,
+                        self.time_query(build_queryset, "indexed", kwargs["repeat"]),
+                        self.explain(build_queryset, "indexed"),
+                    ]
+                )
+
+            # DDL is transactional on SQLite and PostgreSQL, so the indexes come back on rollback
+            self.drop_indexes([name for result in results for name in result[2]])
+            for label, build_queryset, index_names, indexed_ms, indexed_plan in results:
+                unindexed_ms = self.time_query(
+                    build_queryset, "unindexed", kwargs["repeat"]
+                )
+                self.stdout.write(self.style.MIGRATE_HEADING(label))
+                self.stdout.write(
+                    f"  With {', '.join(index_names)}: {indexed_ms:.2f} ms"
+                )
+                self.stdout.write(f"    {indexed_plan}")
+                self.stdout.write(f"  Without: {unindexed_ms:.2f} ms")
+                self.stdout.write(f"    {self.explain(build_queryset, 'unindexed')}")
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark finished, colony rolled back"))
@@ -1,8 +1,20 @@
-from django.test import TestCase
+from datetime import date
+
+from django.test import Client, TestCase
+from django.urls import reverse
 
 from common.forms import MouseSelectionForm
+from common.widgets import AutocompleteInput
 from main.form_factories import MouseSelectionFormFactory
-from main.model_factories import MouseFactory, ProjectFactory
+from main.model_factories import (
+    BreedingCageFactory,
+    MouseFactory,
+    ProjectFactory,
+    StockCageFactory,
+    StrainFactory,
+    UserFactory,
+)
+from mice_repository.forms import RepositoryMiceForm
 
 
 class MouseSelectionFormTest(TestCase):
@@ -35,3 +47,109 @@ class MouseSelectionFormTest(TestCase):
         self.assertIn(
             "At least one mouse must be selected for a request", form.non_field_errors()
         )
+
+
+class AutocompleteViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.strain = StrainFactory(strain_name="auto")
+        cls.other_strain = StrainFactory(strain_name="autre")
+        cls.female = MouseFactory(strain=cls.strain, sex="F", tube=1)
+        cls.culled = MouseFactory(
+            strain=cls.strain, sex="F", tube=12, culled_date=date.today()
+        )
+        cls.male = MouseFactory(strain=cls.strain, sex="M", tube=13)
+        cls.other = MouseFactory(strain=cls.other_strain, sex="F", tube=1)
+        cls.stock_cage = StockCageFactory(box_no="st1")
+        cls.breeding_cage = BreedingCageFactory(box_no="st2")
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(UserFactory())
+
+    def get(self, url_name, **params):
+        response = self.client.get(reverse(url_name), params)
+        return response.json()["results"]
+
+    def test_mice_prefix_search_alive_only(self):
+        results = self.get("common:autocomplete_mice", q="auto-1")
+        self.assertEqual(results, [self.female.pk, self.male.pk])
+
+    def test_mice_include_culled(self):
+        results = self.get("common:autocomplete_mice", q="auto-1", include_culled="1")
+        self.assertIn(self.culled.pk, results)
+
+    def test_mice_filtered_by_sex(self):
+        results = self.get("common:autocomplete_mice", q="au", sex="F")
+        self.assertEqual(results, [self.female.pk, self.other.pk])
+
+    def test_mice_scoped_to_strain_by_tube_number(self):
+        results = self.get("common:autocomplete_mice", q="1", strain="auto")
+        self.assertEqual(results, [self.female.pk, self.male.pk])
+
+    def test_mice_search_term_read_from_field(self):
+        results = self.get(
+            "common:autocomplete_mice", field="mother", mother="autre", sex="F"
+        )
+        self.assertEqual(results, [self.other.pk])
+
+    def test_cages(self):
+        self.assertEqual(self.get("common:autocomplete_cages", q="st"), ["st1", "st2"])
+
+    def test_stock_cages_only(self):
+        results = self.get("common:autocomplete_cages", q="st", stock_only="1")
+        self.assertEqual(results, ["st1"])
+
+    def test_strains(self):
+        self.assertEqual(self.get("common:autocomplete_strains", q="autr"), ["autre"])
+
+    def test_htmx_request_returns_options(self):
+        response = self.client.get(
+            reverse("common:autocomplete_strains"),
+            {"q": "aut"},
+            headers={"HX-Request": "true"},
+        )
+        self.assertTemplateUsed(response, "widgets/autocomplete_options.html")
+        self.assertContains(response, '<option value="autre">')
+
+    def test_login_required(self):
+        response = Client().get(reverse("common:autocomplete_mice"))
+        self.assertEqual(response.status_code, 302)
+
+
+class AutocompleteInputTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mice = [MouseFactory(sex="F") for _ in range(3)]
+
+    def test_does_not_render_queryset(self):
+        with self.assertNumQueries(0):
+            html = str(RepositoryMiceForm()["mother"])
+        self.assertNotIn(self.mice[0].pk, html)
+
+    def test_renders_htmx_attributes(self):
+        html = AutocompleteInput(
+            "common:autocomplete_mice", params={"sex": "F"}, include=["strain"]
+        ).render("mother", "a-1", attrs={"id": "id_mother"})
+        self.assertIn('list="id_mother_options"', html)
+        self.assertIn('hx-get="/common/autocomplete/mice"', html)
+        self.assertIn('hx-target="#id_mother_options"', html)
+        self.assertIn('value="a-1"', html)
+
+    def test_submitted_parent_looked_up_by_pk(self):
+        data = {
+            "strain": self.mice[0].strain.pk,
+            "sex": "M",
+            "dob": "2020-01-01",
+            "mother": self.mice[0].pk,
+        }
+        form = RepositoryMiceForm(data=data)
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data["mother"], self.mice[0])
+
+    def test_edit_form_shows_cage_box_number(self):
+        cage = StockCageFactory()
+        mouse = MouseFactory(cage=cage)
+        self.assertIn(
+            f'value="{cage.box_no}"', str(RepositoryMiceForm(instance=mouse)["cage"])
+        )
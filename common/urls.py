@@ -0,0 +1,13 @@
+from django.urls import path
+
+from common import views
+
+app_name = "common"
+
+urlpatterns = [
+    path("autocomplete/mice", views.autocomplete_mice, name="autocomplete_mice"),
+    path("autocomplete/cages", views.autocomplete_cages, name="autocomplete_cages"),
+    path(
+        "autocomplete/strains", views.autocomplete_strains, name="autocomplete_strains"
+    ),
+]
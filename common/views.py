@@ -0,0 +1,59 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from common.models import CageModel
+from mice_repository.models import Mouse
+from strain.models import Strain
+
+AUTOCOMPLETE_LIMIT = 20
+
+
+# Picker widgets send the typed text under their own field name, so "field" says which parameter holds it
+def get_search_term(request):
+    return request.GET.get(request.GET.get("field", "q"), "").strip()
+
+
+# HTMX requests get <option> elements for the widget's datalist, anything else gets JSON
+def autocomplete_response(request, values):
+    values = list(values[:AUTOCOMPLETE_LIMIT])
+    if request.headers.get("HX-Request"):
+        return render(request, "widgets/autocomplete_options.html", {"values": values})
+    return JsonResponse({"results": values})
+
+
+# Prefix searches use startswith, which Django backs with a varchar_pattern_ops index on PostgreSQL
+# for primary key and unique CharFields. Mice are alive-only and scoped to the chosen strain by default
+@login_required
+def autocomplete_mice(request):
+    term = get_search_term(request)
+    mice_qs = Mouse.objects.all()
+    if not request.GET.get("include_culled"):
+        mice_qs = mice_qs.alive()
+    if sex := request.GET.get("sex"):
+        mice_qs = mice_qs.filter(sex=sex)
+    if strain := request.GET.get("strain"):
+        mice_qs = mice_qs.filter(strain=strain)
+        # Typing just a tube number searches within the strain
+        if term.isdigit():
+            term = f"{strain}-{term}"
+    mice_qs = mice_qs.filter(_global_id__startswith=term).order_by("_global_id")
+    return autocomplete_response(request, mice_qs.values_list("pk", flat=True))
+
+
+@login_required
+def autocomplete_cages(request):
+    cages_qs = CageModel.objects.filter(
+        box_no__startswith=get_search_term(request)
+    ).order_by("box_no")
+    if request.GET.get("stock_only"):
+        cages_qs = cages_qs.filter(stockcage__isnull=False)
+    return autocomplete_response(request, cages_qs.values_list("box_no", flat=True))
+
+
+@login_required
+def autocomplete_strains(request):
+    strains_qs = Strain.objects.filter(
+        strain_name__startswith=get_search_term(request)
+    ).order_by("strain_name")
+    return autocomplete_response(request, strains_qs.values_list("pk", flat=True))
@@ -0,0 +1,26 @@
+import json
+
+from django import forms
+from django.urls import reverse
+
+
+# Text input backed by a <datalist> that HTMX fills from an autocomplete endpoint as the user types.
+# Unlike a Select, it never renders the field's queryset, so the page stays small however many rows exist.
+# params are sent with every search and include names other fields whose values are sent too, e.g. the strain
+class AutocompleteInput(forms.TextInput):
+    template_name = "widgets/autocomplete_input.html"
+
+    def __init__(self, url_name, params=None, include=None, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+        self.params = params or {}
+        self.include = include or []
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        widget = context["widget"]
+        widget["url"] = reverse(self.url_name)
+        widget["datalist_id"] = f"{widget['attrs'].get('id', name)}_options"
+        widget["hx_vals"] = json.dumps({"field": name} | self.params)
+        widget["hx_include"] = ", ".join(f"[name='{field}']" for field in self.include)
+        return context
@@ -0,0 +1,154 @@
+import csv
+import json
+from xml.sax.saxutils import escape, quoteattr
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# Export columns use the same names as the import file, so an export can be re-imported into another colony
+EXPORT_COLUMNS = {
+    "global_id": "_global_id",
+    "strain": "strain",
+    "tube": "tube",
+    "sex": "sex",
+    "dob": "dob",
+    "mother": "mother",
+    "father": "father",
+    "cage": "cage__box_no",
+    "project": "project__project_name",
+    "earmark": "earmark",
+    "clipped_date": "clipped_date",
+    "culled_date": "culled_date",
+    "coat": "coat",
+    "result": "result",
+    "fate": "fate",
+}
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+# Rows are fetched with iterator(), which uses a server-side cursor on PostgreSQL and fetches chunk_size rows
+# at a time elsewhere, so memory stays flat however many mice are exported
+def export_rows(mice_qs):
+    return mice_qs.values_list(*EXPORT_COLUMNS.values()).iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    )
+
+
+# csv.writer only needs an object with a write() method. Returning the line lets each row be yielded as it is written
+class Echo:
+    def write(self, value):
+        return value
+
+
+def stream_csv(mice_qs):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS.keys())
+    for row in export_rows(mice_qs):
+        yield writer.writerow("" if value is None else value for value in row)
+
+
+def stream_json(mice_qs):
+    yield "["
+    separator = ""
+    for row in export_rows(mice_qs):
+        yield separator + json.dumps(
+            dict(zip(EXPORT_COLUMNS, row)), cls=DjangoJSONEncoder
+        )
+        separator = ","
+    yield "]"
+
+
+def export_response(mice_qs, export_format, filename):
+    if export_format == "json":
+        response = StreamingHttpResponse(
+            stream_json(mice_qs), content_type="application/json"
+        )
+    else:
+        export_format = "csv"
+        response = StreamingHttpResponse(stream_csv(mice_qs), content_type="text/csv")
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{export_format}"'
+    )
+    return response
+
+
+# Node attributes written to pedigree graphs. Edges run from each parent to its child with a role of mother or father
+PEDIGREE_NODE_COLUMNS = {
+    "strain": "strain",
+    "sex": "sex",
+    "dob": "dob",
+    "culled_date": "culled_date",
+}
+
+
+def pedigree_nodes(mice_qs):
+    return mice_qs.values_list(
+        "_global_id", *PEDIGREE_NODE_COLUMNS.values(), "mother", "father"
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def pedigree_edges(mice_qs, role):
+    return (
+        mice_qs.filter(**{f"{role}__isnull": False})
+        .values_list(role, "_global_id")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+# Nodes and then mother and father edges are each read in one pass over the colony, so the whole pedigree
+# is written in three queries without holding it in memory
+def stream_graphml(mice_qs):
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    )
+    for column in PEDIGREE_NODE_COLUMNS:
+        yield f'<key id="{column}" for="node" attr.name="{column}" attr.type="string"/>\n'
+    yield '<key id="role" for="edge" attr.name="role" attr.type="string"/>\n'
+    yield '<graph id="pedigree" edgedefault="directed">\n'
+
+    for pk, *values, _, _ in pedigree_nodes(mice_qs):
+        data = "".join(
+            f'<data key="{column}">{escape(str(value))}</data>'
+            for column, value in zip(PEDIGREE_NODE_COLUMNS, values)
+            if value is not None
+        )
+        yield f"<node id={quoteattr(pk)}>{data}</node>\n"
+
+    for role in ["mother", "father"]:
+        for parent, child in pedigree_edges(mice_qs, role):
+            yield (
+                f"<edge source={quoteattr(parent)} target={quoteattr(child)}>"
+                f'<data key="role">{role}</data></edge>\n'
+            )
+    yield "</graph>\n</graphml>\n"
+
+
+# Each node carries its own adjacency as mother and father IDs, so the graph is written in a single query.
+# A mouse whose parent was not exported keeps the parent's ID
+def stream_pedigree_json(mice_qs):
+    yield '{"directed":true,"nodes":['
+    separator = ""
+    for pk, *values, mother, father in pedigree_nodes(mice_qs):
+        node = {"id": pk, **dict(zip(PEDIGREE_NODE_COLUMNS, values))}
+        node.update(mother=mother, father=father)
+        yield separator + json.dumps(node, cls=DjangoJSONEncoder, separators=(",", ":"))
+        separator = ","
+    yield "]}"
+
+
+def pedigree_response(mice_qs, export_format, filename):
+    if export_format == "json":
+        response = StreamingHttpResponse(
+            stream_pedigree_json(mice_qs), content_type="application/json"
+        )
+    else:
+        export_format = "graphml"
+        response = StreamingHttpResponse(
+            stream_graphml(mice_qs), content_type="application/graphml+xml"
+        )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{export_format}"'
+    )
+    return response
@@ -1,16 +1,34 @@
-from datetime import date, timedelta
+import hashlib
+from collections import Counter
+from datetime import timedelta
 
 import django_filters
 from django import forms
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
 
 from main.constants import EARMARK_CHOICES_PAIRED, SEX_CHOICES
-from mice_repository.models import Mouse
+from mice_repository.models import Mouse, scope_version
 from strain.models import Strain
 
+# Filters whose choices are shown with the number of mice each would return
+FACET_FILTERS = ["sex", "strain", "earmark"]
+
 
 class MouseFilter(django_filters.FilterSet):
 
     earmarks = EARMARK_CHOICES_PAIRED[1:]
+    facets_shown = False
+
+    # Declared first so the other filters see the colony, and compute ages, as of the chosen date
+    as_of = django_filters.DateFilter(
+        method="filter_as_of",
+        widget=forms.DateInput(
+            attrs={"class": "form-control col-12 mb-1 shadow-sm", "type": "date"}
+        ),
+        label="As of:",
+    )
 
     sex = django_filters.ChoiceFilter(
         choices=SEX_CHOICES,
@@ -44,21 +62,98 @@ class MouseFilter(django_filters.FilterSet):
         label="Max Age (days):",
     )
 
+    # Sorts on the age_in_days annotation, so ordering happens in the database before paging
+    ordering = django_filters.ChoiceFilter(
+        choices=[("age", "Youngest first"), ("-age", "Oldest first")],
+        method="filter_ordering",
+        widget=forms.Select(attrs={"class": "form-select col-12 mb-1 shadow-sm"}),
+        label="Sort by Age:",
+        empty_label="Default",
+    )
+
+    def filter_as_of(self, queryset, name, value):
+        return queryset.as_of(value)
+
     def filter_min_age(self, queryset, name, value):
-        return queryset.filter(dob__lte=date.today() - timedelta(days=int(value)))
+        return queryset.filter(
+            dob__lte=queryset.reference_date() - timedelta(days=int(value))
+        )
 
     def filter_max_age(self, queryset, name, value):
-        return queryset.filter(dob__gte=date.today() - timedelta(days=int(value)))
+        return queryset.filter(
+            dob__gte=queryset.reference_date() - timedelta(days=int(value))
+        )
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(
+            "-age_in_days" if value.startswith("-") else "age_in_days"
+        )
 
     # Override __init__() so that it accepts a project parameter
     # Used for showing only strains associated with that project on the filter form
     def __init__(
         self, data=None, queryset=None, *, request=None, prefix=None, project=None
     ):
+        if queryset is not None:
+            queryset = queryset.with_age()
         super().__init__(data, queryset, request=request, prefix=prefix)
         if project:
             self.filters["strain"].queryset = project.strains.all()
 
+    # Number of mice each choice of the facet filters would return with the other filters as they are. One
+    # grouped query over the mice matching every filter but the facets counts each combination of facet values,
+    # and each facet is summed from it. Cached briefly under cache_version, so repeating a search is free
+    def facet_counts(self, cache_version):
+        values = (
+            self.form.cleaned_data if self.is_bound and self.form.is_valid() else {}
+        )
+        mice = self.queryset
+        for name, value in values.items():
+            if name not in FACET_FILTERS:
+                mice = self.filters[name].filter(mice, value)
+        rows = mice.order_by().values_list(*FACET_FILTERS).annotate(count=Count("pk"))
+        selected = {
+            name: getattr(values.get(name), "pk", values.get(name))
+            for name in FACET_FILTERS
+        }
+
+        sql, params = rows.query.sql_with_params()
+        key = hashlib.md5(
+            f"{sql}{params}{selected}{cache_version}".encode()
+        ).hexdigest()
+        return cache.get_or_set(
+            f"facet_counts:{key}",
+            lambda: self.sum_facets(rows, selected),
+            settings.FACET_CACHE_TIMEOUT,
+        )
+
+    @staticmethod
+    def sum_facets(rows, selected):
+        counts = {name: Counter() for name in FACET_FILTERS}
+        for *facet_values, count in rows:
+            row = dict(zip(FACET_FILTERS, facet_values))
+            for name in FACET_FILTERS:
+                if all(
+                    not selected[other] or row[other] == selected[other]
+                    for other in FACET_FILTERS
+                    if other != name
+                ):
+                    counts[name][row[name]] += count
+        return {name: dict(facet) for name, facet in counts.items()}
+
+    def show_facet_counts(self, cache_version):
+        self.facets_shown = True
+        counts = self.facet_counts(cache_version)
+        for name in ["sex", "earmark"]:
+            field = self.form.fields[name]
+            field.choices = [
+                (value, f"{label} ({counts[name].get(value, 0)})" if value else label)
+                for value, label in field.choices
+            ]
+        self.form.fields["strain"].label_from_instance = (
+            lambda strain: f"{strain} ({counts['strain'].get(strain.pk, 0)})"
+        )
+
     @classmethod
     def get_filtered_mice(cls, mice_qs, http_request):
         if "search" in http_request.GET:
@@ -66,12 +161,19 @@ class MouseFilter(django_filters.FilterSet):
             return filter_form.qs
         return mice_qs
 
+    # mice_qs is the set being searched, before the filter is applied, and project the one it belongs to. With
+    # facets, the choices show their counts when the search asks for them, since counting groups every mouse
+    # searched. They are cached under the version of the project's mice, or of the colony without a project
     @classmethod
-    def get_filter_form(cls, mice_qs, http_request, project=None):
+    def get_filter_form(cls, mice_qs, http_request, project=None, facets=False):
         if "search" in http_request.GET:
-            return cls(http_request.GET, queryset=mice_qs, project=project)
-        return cls(queryset=mice_qs, project=project)
+            filter_form = cls(http_request.GET, queryset=mice_qs, project=project)
+        else:
+            filter_form = cls(queryset=mice_qs, project=project)
+        if facets and "facets" in http_request.GET:
+            filter_form.show_facet_counts(scope_version(project and project.pk))
+        return filter_form
 
     class Meta:
         model = Mouse
-        fields = ["sex", "strain", "earmark", "min_age", "max_age"]
+        fields = ["as_of", "sex", "strain", "earmark", "min_age", "max_age", "ordering"]
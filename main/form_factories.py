@@ -176,7 +176,7 @@ class PupsToStockCageFormSetFactory:
         mother = kwargs.get("mother", MouseFactory(sex="F", strain=strain))
         father = kwargs.get("father", MouseFactory(sex="M", strain=strain))
         dob = kwargs.get("dob", date.today())
-        stock_cage = kwargs.get("stock_cage", StockCageFactory().pk)
+        stock_cage = kwargs.get("stock_cage", StockCageFactory().box_no)
 
         default_tube_counter = itertools.count(100)
         passed_tubes = kwargs.get("passed_tubes", [])
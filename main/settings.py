@@ -159,3 +159,33 @@ EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
 # Custom user group
 AUTH_USER_MODEL = "system_users.CustomUser"
+
+# Local memory cache is per process. Use a shared cache such as Redis or the database cache in production
+# so that cache invalidation reaches every worker. Cached entries are invalidated or keyed on a version of
+# the data they come from, so the timeouts below only bound how long unused entries are kept
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Number of generations of ancestors drawn in a mouse's family tree
+FAMILY_TREE_MAX_DEPTH = 10
+
+# Seconds a rendered family tree is cached. Trees are invalidated when parentage changes
+FAMILY_TREE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Seconds a paginator count is cached
+PAGINATOR_COUNT_TIMEOUT = 60 * 10
+
+# Seconds a rendered info panel is cached
+INFO_PANEL_CACHE_TIMEOUT = 60 * 60
+
+# Seconds a set of facet counts is cached
+FACET_CACHE_TIMEOUT = 60
+
+# Seconds the results of a filter preset are cached
+FILTER_PRESET_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Seconds a mouse selection is kept for the request or bulk action it was made for
+MOUSE_SELECTION_MAX_AGE = 60 * 60 * 24
@@ -0,0 +1,139 @@
+import csv
+import io
+import json
+import xml.etree.ElementTree as ET
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from main.exports import EXPORT_COLUMNS, export_response, pedigree_response
+from main.model_factories import MouseFactory, ProjectFactory, StockCageFactory
+from mice_repository.models import Mouse
+from strain.models import Strain
+
+
+def content(response):
+    return b"".join(response.streaming_content).decode()
+
+
+class ExportResponseTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        strain = Strain.objects.create(strain_name="export")
+        cls.mother = MouseFactory(strain=strain, sex="F")
+        cls.mouse = MouseFactory(
+            strain=strain,
+            mother=cls.mother,
+            cage=StockCageFactory(),
+            project=ProjectFactory(),
+            earmark="TL",
+        )
+        cls.mice_qs = Mouse.objects.order_by("_global_id")
+
+    def test_csv_rows(self):
+        response = export_response(self.mice_qs, "csv", "mice")
+        rows = list(csv.DictReader(content(response).splitlines()))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]["global_id"], self.mouse.pk)
+        self.assertEqual(rows[1]["mother"], self.mother.pk)
+        self.assertEqual(rows[1]["cage"], self.mouse.cage.box_no)
+        self.assertEqual(rows[1]["project"], self.mouse.project.project_name)
+        self.assertEqual(rows[1]["father"], "")
+
+    def test_csv_header_matches_columns(self):
+        response = export_response(self.mice_qs, "csv", "mice")
+        self.assertEqual(content(response).splitlines()[0], ",".join(EXPORT_COLUMNS))
+
+    def test_json_rows(self):
+        response = export_response(self.mice_qs, "json", "mice")
+        rows = json.loads(content(response))
+        self.assertEqual(
+            [row["global_id"] for row in rows], [self.mother.pk, self.mouse.pk]
+        )
+        self.assertEqual(rows[1]["dob"], self.mouse.dob.isoformat())
+        self.assertIsNone(rows[1]["father"])
+
+    def test_json_empty(self):
+        response = export_response(Mouse.objects.none(), "json", "mice")
+        self.assertEqual(json.loads(content(response)), [])
+
+    def test_unknown_format_falls_back_to_csv(self):
+        response = export_response(self.mice_qs, "xml", "mice")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="mice.csv"'
+        )
+
+    def test_response_is_streamed(self):
+        response = export_response(self.mice_qs, "csv", "mice")
+        self.assertTrue(response.streaming)
+
+
+GRAPHML = "{http://graphml.graphdrawing.org/xmlns}"
+
+
+class PedigreeResponseTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        strain = Strain.objects.create(strain_name="pedigree")
+        cls.mother = MouseFactory(strain=strain, sex="F")
+        cls.father = MouseFactory(strain=strain, sex="M")
+        cls.mouse = MouseFactory(strain=strain, mother=cls.mother, father=cls.father)
+        cls.mice_qs = Mouse.objects.order_by("_global_id")
+
+    def test_graphml_nodes_and_edges(self):
+        graph = ET.fromstring(
+            content(pedigree_response(self.mice_qs, "graphml", "pedigree"))
+        ).find(f"{GRAPHML}graph")
+        self.assertEqual(
+            [node.get("id") for node in graph.iter(f"{GRAPHML}node")],
+            [self.mother.pk, self.father.pk, self.mouse.pk],
+        )
+        self.assertEqual(
+            [
+                (edge.get("source"), edge.get("target"), edge[0].text)
+                for edge in graph.iter(f"{GRAPHML}edge")
+            ],
+            [
+                (self.mother.pk, self.mouse.pk, "mother"),
+                (self.father.pk, self.mouse.pk, "father"),
+            ],
+        )
+
+    def test_graphml_node_attributes(self):
+        graph = ET.fromstring(
+            content(pedigree_response(self.mice_qs, "graphml", "pedigree"))
+        ).find(f"{GRAPHML}graph")
+        node = graph.find(f"{GRAPHML}node[@id='{self.mouse.pk}']")
+        data = {item.get("key"): item.text for item in node}
+        self.assertEqual(data["strain"], "pedigree")
+        self.assertEqual(data["dob"], self.mouse.dob.isoformat())
+        self.assertNotIn("culled_date", data)
+
+    def test_json_adjacency(self):
+        graph = json.loads(content(pedigree_response(self.mice_qs, "json", "pedigree")))
+        self.assertTrue(graph["directed"])
+        node = graph["nodes"][2]
+        self.assertEqual(node["id"], self.mouse.pk)
+        self.assertEqual(node["mother"], self.mother.pk)
+        self.assertEqual(node["father"], self.father.pk)
+        self.assertIsNone(graph["nodes"][0]["mother"])
+
+    def test_queries_independent_of_colony_size(self):
+        with self.assertNumQueries(3):
+            content(pedigree_response(self.mice_qs, "graphml", "pedigree"))
+        with self.assertNumQueries(1):
+            content(pedigree_response(self.mice_qs, "json", "pedigree"))
+
+    def test_unknown_format_falls_back_to_graphml(self):
+        response = pedigree_response(self.mice_qs, "csv", "pedigree")
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="pedigree.graphml"'
+        )
+
+    def test_command_writes_json(self):
+        out = io.StringIO()
+        call_command("exportpedigree", format="json", stdout=out)
+        self.assertEqual(len(json.loads(out.getvalue())["nodes"]), 3)
@@ -1,11 +1,12 @@
 from datetime import date, timedelta
 
+from django.core.cache import cache
 from django.http import HttpRequest
 from django.test import TestCase
 
 from main.filters import MouseFilter
 from main.model_factories import MouseFactory, ProjectFactory, StrainFactory
-from mice_repository.models import Mouse
+from mice_repository.models import Mouse, scope_version
 from strain.models import Strain
 
 
@@ -95,7 +96,9 @@ class MouseFilterAgeTest(TestCase):
 
     def test_min_age_filter(self):
         filter_instance = MouseFilter({"min_age": "5"}, queryset=Mouse.objects.all())
-        self.assertEqual(list(filter_instance.qs), [self.mouse1, self.mouse2])
+        self.assertQuerysetEqual(
+            filter_instance.qs, [self.mouse1, self.mouse2], ordered=False
+        )
 
     def test_max_age_filter(self):
         filter_instance = MouseFilter({"max_age": "15"}, queryset=Mouse.objects.all())
@@ -215,3 +218,140 @@ class GetFilterFormTest(TestCase):
     def test_get_filter_form_returns_instance(self):
         result = MouseFilter.get_filter_form(self.mice_qs, self.request)
         self.assertIsInstance(result, MouseFilter)
+
+
+class MouseFilterOrderingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        strain = Strain.objects.create(strain_name="ordering")
+        cls.old, cls.young, cls.middle = (
+            MouseFactory(strain=strain, dob=date.today() - timedelta(days=days))
+            for days in [300, 10, 100]
+        )
+
+    def test_youngest_first(self):
+        filter_instance = MouseFilter({"ordering": "age"}, queryset=Mouse.objects.all())
+        self.assertEqual(list(filter_instance.qs), [self.young, self.middle, self.old])
+
+    def test_oldest_first(self):
+        filter_instance = MouseFilter(
+            {"ordering": "-age"}, queryset=Mouse.objects.all()
+        )
+        self.assertEqual(list(filter_instance.qs), [self.old, self.middle, self.young])
+
+    def test_results_annotated_with_age(self):
+        filter_instance = MouseFilter({}, queryset=Mouse.objects.all())
+        self.assertEqual(
+            sorted(mouse.age_in_days for mouse in filter_instance.qs), [10, 100, 300]
+        )
+
+
+class MouseFilterAsOfTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        strain = Strain.objects.create(strain_name="as_of")
+        cls.alive = MouseFactory(strain=strain, dob=date(2023, 1, 1))
+        cls.culled_later = MouseFactory(
+            strain=strain, dob=date(2023, 5, 1), culled_date=date(2023, 9, 1)
+        )
+        cls.born_later = MouseFactory(strain=strain, dob=date(2023, 7, 1))
+
+    def test_as_of(self):
+        filter_instance = MouseFilter(
+            {"as_of": "2023-06-01"}, queryset=Mouse.objects.all()
+        )
+        self.assertQuerysetEqual(
+            filter_instance.qs, [self.alive, self.culled_later], ordered=False
+        )
+
+    def test_ages_relative_to_as_of(self):
+        filter_instance = MouseFilter(
+            {"as_of": "2023-06-01", "min_age": "60", "ordering": "age"},
+            queryset=Mouse.objects.all(),
+        )
+        self.assertEqual(list(filter_instance.qs), [self.alive])
+        self.assertEqual(filter_instance.qs[0].age_in_days, 151)
+
+
+class MouseFilterFacetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.strain1 = Strain.objects.create(strain_name="facet1")
+        cls.strain2 = Strain.objects.create(strain_name="facet2")
+        for strain, sex, earmark, days in [
+            (cls.strain1, "M", "", 10),
+            (cls.strain1, "M", "TL", 10),
+            (cls.strain1, "F", "TL", 100),
+            (cls.strain2, "F", "", 100),
+            (cls.strain2, "F", "TR", 300),
+        ]:
+            MouseFactory(
+                strain=strain,
+                sex=sex,
+                earmark=earmark,
+                dob=date.today() - timedelta(days=days),
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def facets(self, data=None):
+        return MouseFilter(data, queryset=Mouse.objects.all()).facet_counts(
+            scope_version()
+        )
+
+    def test_counts_without_filter(self):
+        counts = self.facets()
+        self.assertEqual(counts["sex"], {"M": 2, "F": 3})
+        self.assertEqual(counts["strain"], {"facet1": 3, "facet2": 2})
+        self.assertEqual(counts["earmark"], {"": 2, "TL": 2, "TR": 1})
+
+    # A facet's own choice does not narrow its counts, so the other choices still show what they would return
+    def test_counts_with_other_filters_applied(self):
+        counts = self.facets({"sex": "F"})
+        self.assertEqual(counts["sex"], {"M": 2, "F": 3})
+        self.assertEqual(counts["strain"], {"facet1": 1, "facet2": 2})
+        self.assertEqual(counts["earmark"], {"": 1, "TL": 1, "TR": 1})
+
+    def test_counts_with_age_filter(self):
+        counts = self.facets({"max_age": "50"})
+        self.assertEqual(counts["sex"], {"M": 2})
+
+    def test_one_query_then_cached(self):
+        with self.assertNumQueries(1):
+            self.facets({"sex": "F"})
+        with self.assertNumQueries(0):
+            self.facets({"sex": "F"})
+
+    def test_new_mouse_recounts(self):
+        self.facets()
+        MouseFactory(strain=self.strain1, sex="M")
+        self.assertEqual(self.facets()["sex"], {"M": 3, "F": 3})
+
+    def test_counts_shown_in_choices(self):
+        filter_form = MouseFilter(queryset=Mouse.objects.all())
+        filter_form.show_facet_counts(scope_version())
+        html = str(filter_form.form)
+        self.assertIn("Male (2)", html)
+        self.assertIn("facet2 (2)", html)
+        self.assertIn("TR (1)", html)
+
+    def facet_form(self, params, project=None):
+        request = HttpRequest()
+        request.GET = params
+        return MouseFilter.get_filter_form(
+            Mouse.objects.all(), request, project, facets=True
+        )
+
+    def test_counts_only_when_asked(self):
+        with self.assertNumQueries(0):
+            filter_form = self.facet_form({"search": ""})
+        self.assertFalse(filter_form.facets_shown)
+        self.assertTrue(self.facet_form({"search": "", "facets": "on"}).facets_shown)
+
+    def test_project_counts_kept_when_other_project_changes(self):
+        project = ProjectFactory()
+        self.facet_form({"facets": "on"}, project)
+        MouseFactory(project=ProjectFactory())
+        with self.assertNumQueries(0):
+            self.facet_form({"facets": "on"}, project)
@@ -1,8 +1,17 @@
+from django.core.cache import cache
+from django.db import connection
 from django.http import HttpRequest
 from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 
 from main.model_factories import MouseFactory, ProjectFactory
-from main.view_utils import get_query_params, paginate_queryset
+from main.view_utils import (
+    KeysetPaginator,
+    get_query_params,
+    keyset_paginate_queryset,
+    paginate_queryset,
+    windowed_paginate_queryset,
+)
 from mice_repository.models import Mouse
 
 
@@ -58,6 +67,150 @@ class PaginateQuerysetTest(TestCase):
         self.assertEqual(result.paginator.num_pages, expected_pages)
 
 
+class KeysetPaginateQuerysetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mice = MouseFactory.create_batch(25)
+        cls.paginate_by = 10
+
+    def setUp(self):
+        self.request = HttpRequest()
+        self.ordered_queryset = Mouse.objects.all().order_by("_global_id")
+        self.ordered_pks = list(self.ordered_queryset.values_list("pk", flat=True))
+
+    def get_page(self, **params):
+        self.request.GET = params
+        return keyset_paginate_queryset(
+            self.ordered_queryset, self.request, self.paginate_by
+        )
+
+    def test_first_page(self):
+        result = self.get_page()
+        self.assertEqual([m.pk for m in result], self.ordered_pks[:10])
+        self.assertTrue(result.has_next())
+        self.assertFalse(result.has_previous())
+
+    def test_next_page_follows_cursor(self):
+        first = self.get_page()
+        second = self.get_page(after=first.next_cursor)
+        self.assertEqual([m.pk for m in second], self.ordered_pks[10:20])
+        self.assertTrue(second.has_previous())
+
+    def test_last_page_has_no_next(self):
+        second = self.get_page(after=self.get_page().next_cursor)
+        third = self.get_page(after=second.next_cursor)
+        self.assertEqual([m.pk for m in third], self.ordered_pks[20:])
+        self.assertFalse(third.has_next())
+
+    def test_previous_page_follows_cursor(self):
+        second = self.get_page(after=self.get_page().next_cursor)
+        first = self.get_page(before=second.previous_cursor)
+        self.assertEqual([m.pk for m in first], self.ordered_pks[:10])
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+
+    def test_invalid_cursor_shows_first_page(self):
+        result = self.get_page(after="invalid")
+        self.assertEqual([m.pk for m in result], self.ordered_pks[:10])
+
+    def test_no_count_or_offset_query(self):
+        cursor = self.get_page().next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page(after=cursor)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("COUNT", queries[0]["sql"].upper())
+        self.assertNotIn("OFFSET", queries[0]["sql"].upper())
+
+    def test_descending_ordering(self):
+        paginator = KeysetPaginator(
+            Mouse.objects.order_by("-_global_id"), self.paginate_by
+        )
+        second = paginator.page(after=paginator.page().next_cursor)
+        self.assertEqual([m.pk for m in second], self.ordered_pks[::-1][10:20])
+
+
+class WindowedPaginateQuerysetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mice = MouseFactory.create_batch(25)
+        cls.paginate_by = 5
+
+    def setUp(self):
+        cache.clear()
+        self.request = HttpRequest()
+        self.ordered_queryset = Mouse.objects.all().order_by("_global_id")
+        self.ordered_pks = list(self.ordered_queryset.values_list("pk", flat=True))
+
+    def get_page(self, cache_version=1, **params):
+        self.request.GET = params
+        return windowed_paginate_queryset(
+            self.ordered_queryset, self.request, self.paginate_by, cache_version
+        )
+
+    def count_queries(self, queries):
+        return len([q for q in queries if "COUNT" in q["sql"].upper()])
+
+    def test_numbered_page(self):
+        result = self.get_page(page="3")
+        self.assertEqual([m.pk for m in result], self.ordered_pks[10:15])
+        self.assertEqual(result.paginator.count, 25)
+
+    def test_next_cursor_matches_numbered_page(self):
+        second = self.get_page(page="2")
+        third = self.get_page(page="3", after=second.next_cursor)
+        self.assertEqual([m.pk for m in third], self.ordered_pks[10:15])
+        self.assertEqual(third.number, 3)
+
+    def test_previous_cursor_matches_numbered_page(self):
+        third = self.get_page(page="3")
+        second = self.get_page(page="2", before=third.previous_cursor)
+        self.assertEqual([m.pk for m in second], self.ordered_pks[5:10])
+
+    def test_cursor_page_uses_no_offset(self):
+        cursor = self.get_page().next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page(page="2", after=cursor)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("OFFSET", queries[0]["sql"].upper())
+
+    def test_invalid_cursor_uses_page_number(self):
+        result = self.get_page(page="2", after="invalid")
+        self.assertEqual([m.pk for m in result], self.ordered_pks[5:10])
+
+    def test_cursor_past_the_rows_uses_page_number(self):
+        last = self.get_page(page="5")
+        result = self.get_page(page="6", after=last.next_cursor)
+        self.assertEqual(result.number, 5)
+        self.assertEqual([m.pk for m in result], self.ordered_pks[20:25])
+
+    def test_empty_cursor_page_uses_page_number(self):
+        last = self.get_page(page="5")
+        result = self.get_page(page="2", after=last.next_cursor)
+        self.assertEqual([m.pk for m in result], self.ordered_pks[5:10])
+
+    def test_count_is_cached(self):
+        self.get_page()
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page(page="2")
+        self.assertEqual(self.count_queries(queries), 0)
+
+    def test_new_cache_version_recounts(self):
+        self.get_page()
+        MouseFactory()
+        with CaptureQueriesContext(connection) as queries:
+            result = self.get_page(cache_version=2)
+        self.assertEqual(self.count_queries(queries), 1)
+        self.assertEqual(result.paginator.count, 26)
+
+    def test_page_range_is_windowed(self):
+        self.paginate_by = 1
+        result = self.get_page(page="12")
+        ellipsis = result.paginator.ELLIPSIS
+        self.assertEqual(
+            list(result.page_range), [1, ellipsis, 10, 11, 12, 13, 14, ellipsis, 25]
+        )
+
+
 class GetQueryParamsTest(TestCase):
     def setUp(self):
         self.factory = RequestFactory()
@@ -72,6 +225,11 @@ class GetQueryParamsTest(TestCase):
         result = get_query_params(request)
         self.assertEqual(result, {"filter": ["active"], "sort": ["name"]})
 
+    def test_get_query_params_removes_cursors(self):
+        request = self.factory.get("/?after=abc&before=def&filter=active")
+        result = get_query_params(request)
+        self.assertEqual(result, {"filter": ["active"]})
+
     def test_get_query_params_with_no_page(self):
         request = self.factory.get("/?filter=inactive&sort=date")
         result = get_query_params(request)
@@ -10,6 +10,7 @@ urlpatterns = [
     path("accounts/", include("django.contrib.auth.urls")),
     path("admin/", admin.site.urls),
     path("breeding_cage/", include("breeding_cage.urls", namespace="breeding_cage")),
+    path("common/", include("common.urls", namespace="common")),
     path("mice_popup/", include("mice_popup.urls", namespace="mice_popup")),
     path(
         "mice_repository/", include("mice_repository.urls", namespace="mice_repository")
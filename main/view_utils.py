@@ -1,4 +1,13 @@
+import base64
+import binascii
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
 
 
 def paginate_queryset(queryset, http_request, paginate_by):
@@ -15,7 +24,181 @@ def paginate_queryset(queryset, http_request, paginate_by):
     return paginated_items
 
 
+# Keyset ("seek") pagination never runs COUNT(*) and never uses OFFSET. Each page is fetched by
+# filtering past the ordering values of the last row seen, so the cost of a page stays flat as the table grows.
+# Every ordering field must be non-null. The primary key is appended to the ordering so rows are totally ordered.
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPaginator:
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        pk_name = queryset.model._meta.pk.name
+        ordering = list(ordering or queryset.query.order_by or [pk_name])
+        if pk_name not in [field.lstrip("-") for field in ordering]:
+            ordering.append(pk_name)
+        self.ordering = ordering
+
+    @staticmethod
+    def encode_cursor(values):
+        data = json.dumps(values, default=str).encode()
+        return base64.urlsafe_b64encode(data).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, binascii.Error) as e:
+            raise InvalidCursor(cursor) from e
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor(cursor)
+        return values
+
+    def get_cursor(self, obj):
+        return self.encode_cursor(
+            [getattr(obj, field.lstrip("-")) for field in self.ordering]
+        )
+
+    # Builds (a > x) OR (a = x AND b > y) OR ... for the ordering fields
+    def seek_filter(self, values, reverse=False):
+        seek = Q()
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip("-")
+            descending = field.startswith("-") != reverse
+            condition = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[i]})
+            for previous_field, previous_value in zip(self.ordering[:i], values[:i]):
+                condition &= Q(**{previous_field.lstrip("-"): previous_value})
+            seek |= condition
+        return seek
+
+    def reversed_ordering(self):
+        return [
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        ]
+
+    def page(self, after=None, before=None):
+        queryset = self.queryset
+        if before is not None:
+            queryset = queryset.filter(
+                self.seek_filter(self.decode_cursor(before), reverse=True)
+            ).order_by(*self.reversed_ordering())
+            rows = list(queryset[: self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            rows = rows[: self.per_page][::-1]
+            return KeysetPage(
+                rows,
+                next_cursor=self.get_cursor(rows[-1]) if rows else None,
+                previous_cursor=self.get_cursor(rows[0]) if has_more else None,
+            )
+
+        if after is not None:
+            queryset = queryset.filter(self.seek_filter(self.decode_cursor(after)))
+        rows = list(queryset.order_by(*self.ordering)[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        return KeysetPage(
+            rows,
+            next_cursor=self.get_cursor(rows[-1]) if has_more else None,
+            previous_cursor=self.get_cursor(rows[0]) if after and rows else None,
+        )
+
+
+def keyset_paginate_queryset(queryset, http_request, paginate_by):
+    paginator = KeysetPaginator(queryset, paginate_by)
+    try:
+        return paginator.page(
+            after=http_request.GET.get("after"),
+            before=http_request.GET.get("before"),
+        )
+    except InvalidCursor:
+        return paginator.page()
+
+
+# Caches COUNT(*) per query, so paging through a large result set counts it once. cache_version should change
+# whenever the rows may have, which makes a cached count exact rather than approximate
+class CachedCountPaginator(Paginator):
+
+    def __init__(self, object_list, per_page, cache_version=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_version = cache_version
+
+    @cached_property
+    def count(self):
+        sql, params = self.object_list.query.sql_with_params()
+        key = hashlib.md5(f"{sql}{params}{self.cache_version}".encode()).hexdigest()
+        return cache.get_or_set(
+            f"paginator_count:{key}",
+            lambda: Paginator.count.func(self),
+            settings.PAGINATOR_COUNT_TIMEOUT,
+        )
+
+
+# Numbered pages that cost one bounded query. Next and previous links carry keyset cursors, so stepping through
+# pages never uses OFFSET, and only jumping straight to a numbered page does. The count comes from
+# CachedCountPaginator and the page range is windowed around the current page
+def windowed_paginate_queryset(queryset, http_request, paginate_by, cache_version=None):
+    keyset_paginator = KeysetPaginator(queryset, paginate_by)
+    paginator = CachedCountPaginator(
+        queryset.order_by(*keyset_paginator.ordering), paginate_by, cache_version
+    )
+    try:
+        number = paginator.validate_number(http_request.GET.get("page") or 1)
+        clamped = False
+    except PageNotAnInteger:
+        number, clamped = 1, True
+    except EmptyPage:
+        number, clamped = paginator.num_pages, True
+
+    # The cursor is only trusted while it lands on rows of a page that exists. Otherwise the page number wins
+    rows = None
+    after, before = http_request.GET.get("after"), http_request.GET.get("before")
+    if not clamped and (after is not None or before is not None):
+        try:
+            rows = keyset_paginator.page(after=after, before=before).object_list
+        except InvalidCursor:
+            pass
+    if rows:
+        page = paginator._get_page(rows, number, paginator)
+    else:
+        page = paginator.page(number)
+        rows = page.object_list = list(page.object_list)
+
+    page.next_cursor = keyset_paginator.get_cursor(rows[-1]) if rows else None
+    page.previous_cursor = keyset_paginator.get_cursor(rows[0]) if rows else None
+    page.page_range = paginator.get_elided_page_range(number, on_each_side=2, on_ends=1)
+    return page
+
+
 def get_query_params(http_request):
     query_params = http_request.GET.copy()
-    query_params.pop("page", None)
+    for param in ["page", "after", "before"]:
+        query_params.pop(param, None)
     return query_params
@@ -1,8 +1,9 @@
-from django.core.exceptions import ObjectDoesNotExist
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from main.model_factories import MouseFactory, UserFactory
+from main.model_factories import MouseFactory, StrainFactory, UserFactory
+from mice_popup.views import create_family_tree_data, load_family_tree_parents
 
 
 def setUpModule():
@@ -10,6 +11,7 @@ def setUpModule():
     test_user = UserFactory(username="testuser")
     test_client = Client()
     test_client.force_login(test_user)
+    cache.clear()
 
 
 def tearDownModule():
@@ -42,32 +44,115 @@ class FamilyTreeTest(TestCase):
     def test_svg_html_tags_in_content(self):
         self.assertIn("</svg>", self.response.content.decode())
 
-    def test_tree_nodes(self):
-        pass
+    def test_tree_data_in_context(self):
+        self.assertIn(self.mouse1.pk, self.response.context["tree_data"])
 
-    def test_tree_edges(self):
-        pass
+    def test_non_existent_mouse_not_found(self):
+        response = self.client.get(reverse("mice_popup:family_tree", args=[10]))
+        self.assertEqual(response.status_code, 404)
 
-    def test_non_existent_mouse_throws_exception(self):
-        with self.assertRaises(ObjectDoesNotExist):
-            self.client.get(reverse("mice_popup:family_tree", args=[10]))
 
-    """
-    # Family tree returns correct response data
-    def test_create_family_tree_data(self):
-        response = self.client.get(reverse("family_tree", args=[self.mouse3]))
-        self.assertEqual(response.status_code, 200)
-        data = create_family_tree_data(self.mouse3)
+class FamilyTreeDataTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        strain = StrainFactory()
+        cls.generations = [[MouseFactory(strain=strain, sex="F")]]
+        for _ in range(4):
+            mother = cls.generations[-1][0]
+            father = MouseFactory(strain=strain, sex="M")
+            cls.generations.append(
+                [MouseFactory(strain=strain, sex="F", mother=mother, father=father)]
+            )
+        cls.mouse = cls.generations[-1][0]
+
+    def setUp(self):
+        cache.clear()
+
+    def depth(self, data):
+        return 1 + max(
+            (self.depth(child) for child in data.get("children", [])), default=0
+        )
+
+    def test_ancestors_loaded_in_one_query(self):
+        with self.assertNumQueries(1):
+            parents = load_family_tree_parents(self.mouse.pk, 10)
+        self.assertEqual(len(parents), 9)
+
+    def test_tree_shape(self):
+        parents = load_family_tree_parents(self.mouse.pk, 10)
+        data = create_family_tree_data(self.mouse.pk, parents, 10)
+        self.assertEqual(data["name"], self.mouse.pk)
+        self.assertIsNone(data["role"])
+        self.assertEqual(
+            [(child["name"], child["role"]) for child in data["children"]],
+            [(self.mouse.mother_id, "Mother"), (self.mouse.father_id, "Father")],
+        )
+        self.assertNotIn("children", data["children"][1])
+        self.assertEqual(self.depth(data), 5)
+
+    def test_depth_cap(self):
+        parents = load_family_tree_parents(self.mouse.pk, 2)
+        self.assertEqual(
+            self.depth(create_family_tree_data(self.mouse.pk, parents, 2)), 3
+        )
+
+    def test_cycle_stops_recursion(self):
+        parents = {"a": ("b", None), "b": ("a", None)}
+        data = create_family_tree_data("a", parents, 100)
         self.assertEqual(
-            data,
-            {
-                "name": str(self.mouse3.id),
-                "role": None,
-                "parent": str(self.mouse1.id),
-                "children": [
-                    {"name": str(self.mouse1.id), "role": "Mother", "parent": None},
-                    {"name": str(self.mouse2.id), "role": "Father", "parent": None},
-                ],
-            },
+            data["children"][0]["children"][0], {"name": "a", "role": "Mother"}
         )
-        """
+
+    @override_settings(FAMILY_TREE_MAX_DEPTH=1)
+    def test_view_uses_depth_setting(self):
+        response = test_client.get(
+            reverse("mice_popup:family_tree", args=[self.mouse.pk])
+        )
+        self.assertNotIn(self.generations[0][0].pk, response.context["tree_data"])
+        self.assertIn(self.mouse.mother_id, response.context["tree_data"])
+
+
+class FamilyTreeCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        strain = StrainFactory()
+        cls.grandmother = MouseFactory(strain=strain, sex="F")
+        cls.mother = MouseFactory(strain=strain, sex="F", mother=cls.grandmother)
+        cls.mouse = MouseFactory(strain=strain, sex="M", mother=cls.mother)
+        cls.url = reverse("mice_popup:family_tree", args=[cls.mouse.pk])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_validators_in_response(self):
+        response = test_client.get(self.url)
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+    def test_matching_etag_returns_304_without_queries(self):
+        etag = test_client.get(self.url)["ETag"]
+        with self.assertNumQueries(0):
+            response = test_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since_returns_304(self):
+        last_modified = test_client.get(self.url)["Last-Modified"]
+        response = test_client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_repeat_request_served_from_cache(self):
+        test_client.get(self.url)
+        with self.assertNumQueries(0):
+            response = test_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_ancestor_reparented_invalidates_tree(self):
+        etag = test_client.get(self.url)["ETag"]
+        new_grandmother = MouseFactory(strain=self.mouse.strain, sex="F")
+        self.mother.mother = new_grandmother
+        self.mother.save()
+        response = test_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertIn(new_grandmother.pk, response.context["tree_data"])
@@ -1,29 +1,64 @@
+import hashlib
 import json
 
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import Http404, HttpResponse
 from django.template import loader
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
 
 from mice_repository.models import Mouse
+from mice_repository.pedigree import family_tree_cache_key
 
 
-def create_family_tree_data(mouse, role=None):
+# Loads the mouse and its ancestors up to max_depth generations back in one query through the MouseAncestor
+# closure table, as a map of pk to (mother pk, father pk)
+def load_family_tree_parents(mouse_pk, max_depth):
+    mice = Mouse.objects.filter(
+        Q(pk=mouse_pk)
+        | Q(
+            descendant_links__descendant=mouse_pk, descendant_links__depth__lt=max_depth
+        )
+    )
+    parents = {
+        pk: (mother, father)
+        for pk, mother, father in mice.values_list("pk", "mother", "father").distinct()
+    }
+    if mouse_pk not in parents:
+        raise Http404(f"Mouse {mouse_pk} does not exist")
+    return parents
+
+
+# Builds the nested tree consumed by family_tree_svg.html from the loaded parents. Stops at max_depth and at
+# any mouse already on the path from the root, so corrupted cyclic parentage cannot recurse forever
+def create_family_tree_data(mouse_pk, parents, max_depth, role=None, path=()):
     data = {
-        "name": str(mouse.pk),
+        "name": str(mouse_pk),
         "role": role,
     }
+    if len(path) >= max_depth or mouse_pk in path or mouse_pk not in parents:
+        return data
     children = []
-    if mouse.mother:
-        children.append(create_family_tree_data(mouse.mother, "Mother"))
-    if mouse.father:
-        children.append(create_family_tree_data(mouse.father, "Father"))
+    for parent_pk, parent_role in zip(parents[mouse_pk], ["Mother", "Father"]):
+        if parent_pk:
+            children.append(
+                create_family_tree_data(
+                    parent_pk, parents, max_depth, parent_role, path + (mouse_pk,)
+                )
+            )
     if children:
         data["children"] = children
     return data
 
 
-def family_tree(request, mouse_pk):
-    mouse = Mouse.objects.get(pk=mouse_pk)
-    data = create_family_tree_data(mouse)
+def render_family_tree(mouse_pk):
+    max_depth = settings.FAMILY_TREE_MAX_DEPTH
+    parents = load_family_tree_parents(mouse_pk, max_depth)
+    data = create_family_tree_data(mouse_pk, parents, max_depth)
 
     # Load a template that will render the SVG
     template = loader.get_template("family_tree_svg.html")
@@ -32,9 +67,46 @@ def family_tree(request, mouse_pk):
         # Replace with your actual image URL
         "mouse_image_url": "/static/images/mouse_icon.png",
     }
+    return template.render(context)
+
+
+# Rendered trees are cached per mouse with their ETag and render time, and invalidated by
+# mice_repository.pedigree when parentage changes. Kept on the request so condition() and the view share one lookup
+def get_family_tree(request, mouse_pk):
+    if not hasattr(request, "family_tree"):
+        request.family_tree = cache.get(family_tree_cache_key(mouse_pk))
+    return request.family_tree
 
-    # Render the template
-    svg_content = template.render(context, request)
+
+def family_tree_etag(request, mouse_pk):
+    tree = get_family_tree(request, mouse_pk)
+    return tree["etag"] if tree else None
+
+
+def family_tree_last_modified(request, mouse_pk):
+    tree = get_family_tree(request, mouse_pk)
+    return tree["last_modified"] if tree else None
+
+
+# A repeat open with a matching ETag or If-Modified-Since gets a 304 from the cache without touching the database
+@condition(etag_func=family_tree_etag, last_modified_func=family_tree_last_modified)
+def family_tree(request, mouse_pk):
+    tree = get_family_tree(request, mouse_pk)
+    if tree is None:
+        svg_content = render_family_tree(mouse_pk)
+        tree = {
+            "svg": svg_content,
+            "etag": hashlib.md5(svg_content.encode()).hexdigest(),
+            "last_modified": timezone.now().replace(microsecond=0),
+        }
+        cache.set(
+            family_tree_cache_key(mouse_pk), tree, settings.FAMILY_TREE_CACHE_TIMEOUT
+        )
 
     # Return the SVG content with the appropriate content type
-    return HttpResponse(svg_content, content_type="image/svg+xml")
+    response = HttpResponse(tree["svg"], content_type="image/svg+xml")
+    response["ETag"] = quote_etag(tree["etag"])
+    response["Last-Modified"] = http_date(tree["last_modified"].timestamp())
+    # Browsers must revalidate, so a changed pedigree is shown straight away
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,145 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from mice_repository.models import CENSUS_FIELDS, Mouse, MouseCensus
+from mice_repository.pedigree import CHUNK_SIZE
+
+
+def census_key(values):
+    if values["culled_date"] is not None:
+        return None
+    return (values["strain_id"], values["project_id"], values["sex"], values["dob"])
+
+
+# Moves MouseCensus counts as mice change, and rebuilds them from the mice when they drift
+class Census:
+
+    def __init__(self, mouse_model, census_model):
+        self.mouse_model = mouse_model
+        self.census_model = census_model
+
+    def rows(self, key):
+        strain, project, sex, dob = key
+        return self.census_model.objects.filter(
+            strain=strain, project=project, sex=sex, dob=dob
+        )
+
+    # Adds each change to its census row. A single change is one UPDATE, which locks an existing row until the
+    # transaction ends. A row created by a concurrent transaction makes the insert fail on the unique
+    # constraint, so the update is retried
+    def apply(self, changes):
+        changes = {key: change for key, change in changes.items() if key and change}
+        if len(changes) > 1:
+            self.apply_many(changes)
+            return
+        for key, change in changes.items():
+            rows = self.rows(key)
+            if rows.update(alive=F("alive") + change):
+                continue
+            try:
+                with transaction.atomic():
+                    self.census_model.objects.create(**self.fields(key), alive=change)
+            except IntegrityError:
+                rows.update(alive=F("alive") + change)
+
+    # Many changes, as from an import or a bulk update, lock and read their rows in one query and are written
+    # with one bulk update and one bulk insert
+    def apply_many(self, changes):
+        strains = {strain for strain, _, _, _ in changes}
+        dobs = {dob for _, _, _, dob in changes}
+        rows = self.census_model.objects.select_for_update().filter(
+            strain__in=strains, dob__in=dobs
+        )
+        changed = []
+        for row in rows:
+            change = changes.pop((row.strain_id, row.project_id, row.sex, row.dob), 0)
+            if change:
+                row.alive += change
+                changed.append(row)
+        self.census_model.objects.bulk_update(changed, ["alive"], batch_size=CHUNK_SIZE)
+        try:
+            with transaction.atomic():
+                self.census_model.objects.bulk_create(
+                    [
+                        self.census_model(**self.fields(key), alive=change)
+                        for key, change in changes.items()
+                    ],
+                    batch_size=CHUNK_SIZE,
+                )
+        except IntegrityError:
+            for key, change in changes.items():
+                self.apply({key: change})
+
+    @staticmethod
+    def fields(key):
+        strain, project, sex, dob = key
+        return {"strain_id": strain, "project_id": project, "sex": sex, "dob": dob}
+
+    # Number of mice with each combination of census fields, culled or not
+    def groups(self, mice_qs):
+        return Counter(
+            {
+                tuple(row[:-1]): row[-1]
+                for row in mice_qs.order_by()
+                .values_list(*CENSUS_FIELDS)
+                .annotate(count=Count("pk"))
+            }
+        )
+
+    # Moves the mice counted in groups to their census rows after values were written to them in bulk.
+    # Values that are expressions cannot be followed without reading the mice again, so the census is rebuilt
+    def move(self, groups, values):
+        values = {name: getattr(value, "pk", value) for name, value in values.items()}
+        if any(hasattr(value, "resolve_expression") for value in values.values()):
+            self.reconcile()
+            return
+        changes = Counter()
+        for fields, count in groups.items():
+            old = dict(zip(CENSUS_FIELDS, fields))
+            changes[census_key(old)] -= count
+            changes[census_key(old | values)] += count
+        self.apply(changes)
+
+    def add(self, mice):
+        self.apply(
+            Counter(
+                census_key({name: getattr(mouse, name) for name in CENSUS_FIELDS})
+                for mouse in mice
+            )
+        )
+
+    # Recounts alive mice in one grouped query and corrects, creates or deletes census rows that differ.
+    # Returns the number of rows repaired
+    def reconcile(self):
+        expected = Counter()
+        for fields, count in self.groups(
+            self.mouse_model.objects.filter(culled_date__isnull=True)
+        ).items():
+            expected[census_key(dict(zip(CENSUS_FIELDS, fields)))] += count
+
+        changed, deleted = [], []
+        for row in self.census_model.objects.iterator():
+            alive = expected.pop((row.strain_id, row.project_id, row.sex, row.dob), 0)
+            if not alive:
+                deleted.append(row.pk)
+            elif row.alive != alive:
+                row.alive = alive
+                changed.append(row)
+        created = [
+            self.census_model(**self.fields(key), alive=alive)
+            for key, alive in expected.items()
+        ]
+
+        for i in range(0, len(deleted), CHUNK_SIZE):
+            self.census_model.objects.filter(
+                pk__in=deleted[i : i + CHUNK_SIZE]
+            ).delete()
+        self.census_model.objects.bulk_update(changed, ["alive"], batch_size=CHUNK_SIZE)
+        self.census_model.objects.bulk_create(created, batch_size=CHUNK_SIZE)
+        return len(deleted) + len(changed) + len(created)
+
+
+def get_census():
+    return Census(Mouse, MouseCensus)
@@ -1,8 +1,10 @@
 from django import forms
+from django.http import QueryDict
 
 from common.models import CageModel
+from common.widgets import AutocompleteInput
 from main.constants import EARMARK_CHOICES_PAIRED, SEX_CHOICES
-from mice_repository.models import Mouse, MouseComment
+from mice_repository.models import FilterPreset, Mouse, MouseComment
 from projects.models import Project
 from strain.models import Strain
 from system_users.models import CustomUser
@@ -33,8 +35,11 @@ class RepositoryMiceForm(forms.ModelForm):
     cage = forms.ModelChoiceField(
         initial=None,
         queryset=CageModel.objects.all(),
+        to_field_name="box_no",
         required=False,
-        widget=forms.Select(attrs={"class": "form-select"}),
+        widget=AutocompleteInput(
+            "common:autocomplete_cages", attrs={"class": "form-control"}
+        ),
         label="Current Cage",
     )
     clipped_date = forms.DateField(
@@ -49,13 +54,23 @@ class RepositoryMiceForm(forms.ModelForm):
         initial=None,
         queryset=Mouse.objects.filter(sex="F"),
         required=False,
-        widget=forms.Select(attrs={"class": "form-select"}),
+        widget=AutocompleteInput(
+            "common:autocomplete_mice",
+            params={"sex": "F"},
+            include=["strain"],
+            attrs={"class": "form-control"},
+        ),
     )
     father = forms.ModelChoiceField(
         initial=None,
         queryset=Mouse.objects.filter(sex="M"),
         required=False,
-        widget=forms.Select(attrs={"class": "form-select"}),
+        widget=AutocompleteInput(
+            "common:autocomplete_mice",
+            params={"sex": "M"},
+            include=["strain"],
+            attrs={"class": "form-control"},
+        ),
     )
     project = forms.ModelChoiceField(
         initial="",
@@ -77,7 +92,9 @@ class RepositoryMiceForm(forms.ModelForm):
     strain = forms.ModelChoiceField(
         queryset=Strain.objects.all(),
         required=True,
-        widget=forms.Select(attrs={"class": "form-select"}),
+        widget=AutocompleteInput(
+            "common:autocomplete_strains", attrs={"class": "form-control"}
+        ),
     )
     coat = forms.CharField(
         initial="",
@@ -103,6 +120,12 @@ class RepositoryMiceForm(forms.ModelForm):
         ),
     )
 
+    # Cages are picked by box number, so show the instance's box number rather than its cage_id
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.cage_id:
+            self.initial["cage"] = self.instance.cage.box_no
+
     class Meta:
         model = Mouse
         fields = "__all__"
@@ -120,3 +143,49 @@ class MouseCommentForm(forms.ModelForm):
     class Meta:
         model = MouseComment
         fields = ["comment_text"]
+
+
+class MouseImportForm(forms.Form):
+
+    file = forms.FileField(
+        widget=forms.ClearableFileInput(
+            attrs={"class": "form-control", "accept": ".csv,.xlsx"}
+        ),
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data["file"]
+        if not file.name.lower().endswith((".csv", ".xlsx")):
+            raise forms.ValidationError("Import file must be a .csv or .xlsx file")
+        return file
+
+
+# Saves the search on the page it is posted from. Saving under a name the user already has replaces that preset
+class FilterPresetForm(forms.ModelForm):
+
+    name = forms.CharField(
+        max_length=50,
+        widget=forms.TextInput(
+            attrs={"class": "form-control", "placeholder": "Preset name"}
+        ),
+    )
+    shared = forms.BooleanField(
+        label="Share with everyone",
+        required=False,
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
+    params = forms.CharField(required=False, widget=forms.HiddenInput)
+    project = forms.ModelChoiceField(
+        queryset=Project.objects.all(), required=False, widget=forms.HiddenInput
+    )
+
+    # Keeps only the filter's own parameters
+    def clean_params(self):
+        params = QueryDict(self.cleaned_data["params"], mutable=True)
+        for param in ["csrfmiddlewaretoken", "page", "after", "before"]:
+            params.pop(param, None)
+        return params.urlencode()
+
+    class Meta:
+        model = FilterPreset
+        fields = ["name", "shared", "params", "project"]
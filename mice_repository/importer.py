@@ -0,0 +1,314 @@
+import codecs
+import csv
+import os
+import zipfile
+from datetime import date, datetime
+from itertools import islice
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from common.models import CageModel
+from main.constants import EARMARK_CHOICES
+from mice_repository.census import get_census
+from mice_repository.kinship import get_inbreeding
+from mice_repository.models import Mouse, bump_mice_version
+from mice_repository.pedigree import get_closure
+from projects.models import Project
+from strain.models import Strain, TubeCounter
+
+# Header row expected in import files. Only strain, sex and dob are required
+IMPORT_COLUMNS = [
+    "strain",
+    "tube",
+    "sex",
+    "dob",
+    "mother",
+    "father",
+    "cage",
+    "project",
+    "earmark",
+    "clipped_date",
+    "culled_date",
+    "coat",
+    "result",
+    "fate",
+]
+
+DATE_COLUMNS = ["dob", "clipped_date", "culled_date"]
+TEXT_COLUMNS = ["coat", "result", "fate"]
+
+
+# Raised when the file itself cannot be read, such as a CSV that is not UTF-8 or a corrupt workbook.
+# Chunks read before the error have already been imported
+class ImportReadError(ValueError):
+    def __init__(self, error, created):
+        super().__init__(
+            f"Could not read the file: {error}. "
+            f"{created} mice were imported before the error"
+        )
+
+
+# openpyxl reports a zip archive that is not a workbook with a KeyError
+READ_ERRORS = (UnicodeDecodeError, csv.Error, zipfile.BadZipFile, KeyError)
+
+
+class ImportRowError:
+    def __init__(self, row_number, message):
+        self.row_number = row_number
+        self.message = message
+
+    def __str__(self):
+        return f"Row {self.row_number}: {self.message}"
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, row_number, message):
+        self.errors.append(ImportRowError(row_number, message))
+
+
+# Rows are yielded one at a time as dicts keyed by the header row, so files of any size are never held in memory
+def read_csv_rows(file):
+    yield from csv.DictReader(codecs.iterdecode(file, "utf-8-sig"))
+
+
+def read_xlsx_rows(file):
+    # openpyxl is only needed for spreadsheet imports
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(column).strip() if column else "" for column in next(rows, [])]
+        for row in rows:
+            yield dict(zip(header, row))
+    finally:
+        workbook.close()
+
+
+def read_rows(file, filename):
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".csv":
+        return read_csv_rows(file)
+    elif extension == ".xlsx":
+        return read_xlsx_rows(file)
+    raise ValueError("Import file must be a .csv or .xlsx file")
+
+
+# Validates and writes rows chunk by chunk. Strains, cages and projects are loaded once into lookup maps,
+# parents and existing IDs are checked with one query per chunk, and each chunk is written with bulk_create
+# in its own transaction. Invalid rows are reported and skipped without aborting the rest of the file
+class MouseImporter:
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.strains = {
+            pk: Strain(strain_name=pk)
+            for pk in Strain.objects.values_list("pk", flat=True)
+        }
+        self.cages = dict(CageModel.objects.values_list("box_no", "pk"))
+        self.projects = dict(Project.objects.values_list("project_name", "pk"))
+        self.result = ImportResult()
+
+    def run(self, rows):
+        numbered_rows = enumerate(rows, start=2)
+        while chunk := self.read_chunk(numbered_rows):
+            self.import_chunk(chunk)
+        self.result.errors.sort(key=lambda error: error.row_number)
+        return self.result
+
+    def read_chunk(self, numbered_rows):
+        try:
+            return list(islice(numbered_rows, self.chunk_size))
+        except READ_ERRORS as e:
+            raise ImportReadError(e, self.result.created) from e
+
+    def import_chunk(self, chunk):
+        parsed = []
+        for row_number, row in chunk:
+            try:
+                parsed.append((row_number, self.parse_row(row)))
+            except ValueError as e:
+                self.result.add_error(row_number, str(e))
+
+        parsed = self.validate_global_ids(parsed)
+        parsed = self.validate_parents(parsed)
+        if not parsed:
+            return
+
+        try:
+            with transaction.atomic():
+                mice = self.build_mice(parsed)
+                Mouse.objects.bulk_create(mice)
+                # bulk_create skips Mouse.save(), so the pedigree closure, inbreeding and census are built here
+                pks = [mouse.pk for mouse in mice]
+                get_closure().rebuild(pks)
+                get_inbreeding().update(Mouse.objects.filter(pk__in=pks))
+                get_census().add(mice)
+            # New mice have nothing cached under their own version yet, but the projects they join do
+            bump_mice_version([], {mouse.project_id for mouse in mice})
+        except DatabaseError as e:
+            for row_number, _ in parsed:
+                self.result.add_error(row_number, f"Could not be saved: {e}")
+            return
+        self.result.created += len(mice)
+
+    def parse_row(self, row):
+        row = {
+            key.strip().lower(): ("" if value is None else value)
+            for key, value in row.items()
+            if key
+        }
+        values = {}
+
+        strain = str(row.get("strain", "")).strip()
+        if strain not in self.strains:
+            raise ValueError(f"Strain '{strain}' does not exist")
+        values["strain"] = self.strains[strain]
+
+        tube = str(row.get("tube", "")).strip()
+        try:
+            values["tube"] = int(float(tube)) if tube else None
+        except (ValueError, OverflowError):
+            raise ValueError(f"Tube '{tube}' is not a number")
+
+        values["sex"] = str(row.get("sex", "")).strip().upper()
+        if values["sex"] not in ["M", "F"]:
+            raise ValueError("Sex must be M or F")
+
+        for column in DATE_COLUMNS:
+            values[column] = self.parse_date(row.get(column, ""), column)
+        if values["dob"] is None:
+            raise ValueError("Date of birth is required")
+
+        for column in ["mother", "father"]:
+            values[column] = str(row.get(column, "")).strip() or None
+
+        cage = str(row.get("cage", "")).strip()
+        if cage and cage not in self.cages:
+            raise ValueError(f"Cage '{cage}' does not exist")
+        values["cage_id"] = self.cages.get(cage)
+
+        project = str(row.get("project", "")).strip()
+        if project and project not in self.projects:
+            raise ValueError(f"Project '{project}' does not exist")
+        values["project_id"] = self.projects.get(project)
+
+        values["earmark"] = str(row.get("earmark", "")).strip().upper()
+        if values["earmark"] not in EARMARK_CHOICES:
+            raise ValueError(f"Earmark '{values['earmark']}' is not valid")
+
+        for column in TEXT_COLUMNS:
+            values[column] = str(row.get(column, "")).strip()
+            max_length = Mouse._meta.get_field(column).max_length
+            if len(values[column]) > max_length:
+                raise ValueError(f"{column} is longer than {max_length} characters")
+
+        return values
+
+    @staticmethod
+    def parse_date(value, column):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        value = str(value).strip()
+        if not value:
+            return None
+        for date_format in ["%Y-%m-%d"] + settings.DATE_INPUT_FORMATS:
+            try:
+                return datetime.strptime(value, date_format).date()
+            except ValueError:
+                pass
+        raise ValueError(f"{column} '{value}' is not a valid date")
+
+    # Parents must already exist, either in the database (including earlier chunks) or as a manually
+    # numbered row earlier in this chunk, and have the right sex
+    def validate_parents(self, parsed):
+        parent_pks = {
+            values[column]
+            for _, values in parsed
+            for column in ["mother", "father"]
+            if values[column]
+        }
+        parent_sexes = dict(
+            Mouse.objects.filter(pk__in=parent_pks).values_list("pk", "sex")
+        )
+
+        valid = []
+        for row_number, values in parsed:
+            errors = []
+            for column, expected_sex in [("mother", "F"), ("father", "M")]:
+                if not values[column]:
+                    continue
+                sex = parent_sexes.get(values[column])
+                if sex is None:
+                    errors.append(f"{column} '{values[column]}' does not exist")
+                elif sex != expected_sex:
+                    errors.append(f"{column} '{values[column]}' has the wrong sex")
+            if errors:
+                self.result.add_error(row_number, ", ".join(errors))
+                continue
+            valid.append((row_number, values))
+            # Manually numbered mice can be named as parents by later rows in the same chunk
+            if values["tube"] is not None:
+                parent_sexes[self.global_id(values)] = values["sex"]
+        return valid
+
+    # Manually numbered rows must not collide with existing mice or with each other
+    def validate_global_ids(self, parsed):
+        global_ids = [
+            self.global_id(values) for _, values in parsed if values["tube"] is not None
+        ]
+        taken = set(
+            Mouse.objects.filter(pk__in=global_ids).values_list("pk", flat=True)
+        )
+
+        valid = []
+        for row_number, values in parsed:
+            if values["tube"] is None:
+                valid.append((row_number, values))
+            elif (global_id := self.global_id(values)) in taken:
+                self.result.add_error(row_number, f"Mouse {global_id} already exists")
+            else:
+                taken.add(global_id)
+                valid.append((row_number, values))
+        return valid
+
+    @staticmethod
+    def global_id(values):
+        return f"{values['strain'].strain_name}-{values['tube']}"
+
+    # Reserves one block of tubes per strain for rows without a tube
+    def build_mice(self, parsed):
+        rows_by_strain = {}
+        for _, values in parsed:
+            rows_by_strain.setdefault(values["strain"].pk, []).append(values)
+
+        for rows in rows_by_strain.values():
+            strain = rows[0]["strain"]
+            numbered = [values["tube"] for values in rows if values["tube"] is not None]
+            if numbered:
+                TubeCounter.observe(strain, max(numbered))
+            unnumbered = [values for values in rows if values["tube"] is None]
+            if unnumbered:
+                tubes = TubeCounter.reserve(strain, len(unnumbered))
+                for values, tube in zip(unnumbered, tubes):
+                    values["tube"] = tube
+
+        mice = []
+        for _, values in parsed:
+            mother, father = values.pop("mother"), values.pop("father")
+            mice.append(
+                Mouse(
+                    _global_id=self.global_id(values),
+                    mother_id=mother,
+                    father_id=father,
+                    **values,
+                )
+            )
+        return mice
@@ -0,0 +1,126 @@
+import numpy as np
+
+from mice_repository.models import Mouse, MouseInbreeding
+from mice_repository.pedigree import CHUNK_SIZE, PedigreeClosure
+
+
+# Coefficients of kinship and inbreeding over a set of mice closed under ancestry, by the tabular method. The
+# relationship matrix A (twice the kinship) is filled one generation at a time with NumPy: a pup's row is the mean
+# of its parents' rows and its diagonal is 1 plus its inbreeding, half the relationship of its parents. Only a
+# window of mice is held, those with pups still to come, so memory grows with the number of breeders in use
+# rather than the square of the whole set. Position 0 of the window stands for an unknown parent and stays zero
+class Kinship:
+
+    def __init__(self, parents, inbreeding=None):
+        self.generations, _ = PedigreeClosure.generations(parents)
+        self.parents = parents
+        self.stored = inbreeding or {}
+        self.last_litter = {}
+        for i, generation in enumerate(self.generations):
+            for pk in generation:
+                for parent in parents[pk]:
+                    self.last_litter[parent] = i
+        self.coefficients = None
+
+    # Walks the generations and returns every mouse's inbreeding, plus the relationships among the mice in keep
+    def walk(self, keep=()):
+        window, pks, coefficients = np.zeros((1, 1)), [None], {}
+        for i, generation in enumerate(self.generations):
+            index = {pk: position for position, pk in enumerate(pks)}
+            # Mice missing from the set, including those in a parentage cycle, are treated as unknown
+            mothers, fathers = (
+                np.array([index.get(self.parents[pk][line], 0) for pk in generation])
+                for line in [0, 1]
+            )
+            rows = (window[mothers] + window[fathers]) / 2
+            litter = (rows[:, mothers] + rows[:, fathers]) / 2
+            inbreeding = window[mothers, fathers] / 2
+            for position, pk in enumerate(generation):
+                if pk in self.stored:
+                    inbreeding[position] = self.stored[pk]
+                coefficients[pk] = float(inbreeding[position])
+            np.fill_diagonal(litter, 1 + inbreeding)
+
+            window = np.block([[window, rows.T], [rows, litter]])
+            pks += generation
+            kept = [0] + [
+                position
+                for position, pk in enumerate(pks)
+                if position and (self.last_litter.get(pk, -1) > i or pk in keep)
+            ]
+            window = window[np.ix_(kept, kept)]
+            pks = [pks[position] for position in kept]
+        return coefficients, {pk: position for position, pk in enumerate(pks)}, window
+
+    def inbreeding(self, pk):
+        if self.coefficients is None:
+            self.coefficients, _, _ = self.walk()
+        return self.coefficients.get(pk, 0)
+
+    def kinship(self, a, b):
+        _, index, window = self.walk({a, b})
+        if a not in index or b not in index:
+            return 0
+        return float(window[index[a], index[b]]) / 2
+
+
+# Stores inbreeding coefficients for a queryset of mice. Ancestors outside the queryset are found through the
+# MouseAncestor closure table from the parents that are not in it themselves, in the same query that reads the
+# ancestors' stored coefficients. A whole strain has few such parents, so it does not join every mouse's rows
+class Inbreeding:
+
+    def __init__(self, mouse_model, inbreeding_model):
+        self.mouse_model = mouse_model
+        self.inbreeding_model = inbreeding_model
+
+    # Stored coefficients of the mice themselves are ignored when they are being recomputed
+    def pedigree(self, mice_qs, recompute=False):
+        fields = ["pk", "mother", "father", "inbreeding__coefficient"]
+        parents, inbreeding = {}, {}
+        for pk, mother, father, coefficient in mice_qs.values_list(*fields):
+            parents[pk] = (mother, father)
+            if coefficient is not None and not recompute:
+                inbreeding[pk] = coefficient
+        mice = list(parents)
+
+        outside = sorted(
+            {parent for pair in parents.values() for parent in pair} - {None, *parents}
+        )
+        for chunk in PedigreeClosure.chunks(outside):
+            ancestors = (
+                self.mouse_model.objects.filter(pk__in=chunk)
+                .values_list(*fields)
+                .union(
+                    self.mouse_model.objects.filter(
+                        descendant_links__descendant__in=chunk
+                    ).values_list(*fields)
+                )
+            )
+            for pk, mother, father, coefficient in ancestors:
+                if pk not in parents:
+                    parents[pk] = (mother, father)
+                    if coefficient is not None:
+                        inbreeding[pk] = coefficient
+        return Kinship(parents, inbreeding), mice
+
+    def update(self, mice_qs):
+        pedigree, mice = self.pedigree(mice_qs, recompute=True)
+        self.inbreeding_model.objects.bulk_create(
+            [
+                self.inbreeding_model(mouse_id=pk, coefficient=pedigree.inbreeding(pk))
+                for pk in mice
+            ],
+            batch_size=CHUNK_SIZE,
+            update_conflicts=True,
+            unique_fields=["mouse"],
+            update_fields=["coefficient"],
+        )
+        return len(mice)
+
+    def kinship(self, a, b):
+        pedigree, _ = self.pedigree(self.mouse_model.objects.filter(pk__in=[a, b]))
+        return pedigree.kinship(a, b)
+
+
+def get_inbreeding():
+    return Inbreeding(Mouse, MouseInbreeding)
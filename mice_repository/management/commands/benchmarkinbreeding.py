@@ -0,0 +1,87 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from mice_repository.kinship import Kinship, get_inbreeding
+from mice_repository.models import Mouse
+from strain.models import Strain
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Generates one strain with a deep pedigree inside a rolled back transaction and times "
+        "computing the inbreeding of the whole strain."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mice", type=int, default=4000)
+        parser.add_argument("--generations", type=int, default=40)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    # Parents are drawn from the last five generations, so breeders overlap the way they do in a colony
+    def generate_strain(self, n_mice, n_generations):
+        strain = Strain.objects.create(strain_name="bench")
+        per_generation = max(n_mice // n_generations, 2)
+        start = date.today() - timedelta(days=60 * n_generations)
+        mice, generations = [], []
+        for generation in range(n_generations):
+            breeders = [mouse for litter in generations[-5:] for mouse in litter]
+            females = [mouse for mouse in breeders if mouse.sex == "F"]
+            males = [mouse for mouse in breeders if mouse.sex == "M"]
+            litter = []
+            for i in range(per_generation):
+                tube = len(mice) + len(litter) + 1
+                litter.append(
+                    Mouse(
+                        _global_id=f"bench-{tube}",
+                        strain=strain,
+                        tube=tube,
+                        sex="F" if i % 2 else "M",
+                        dob=start + timedelta(days=60 * generation),
+                        mother=random.choice(females) if females else None,
+                        father=random.choice(males) if males else None,
+                    )
+                )
+            generations.append(litter)
+            mice += litter
+        # Every parent is in the strain, so Inbreeding does not read the closure and it is not built
+        Mouse.objects.bulk_create(mice, batch_size=5000)
+        return strain, {mouse.pk: (mouse.mother_id, mouse.father_id) for mouse in mice}
+
+    def time(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            strain, parents = self.generate_strain(
+                kwargs["mice"], kwargs["generations"]
+            )
+            self.stdout.write(
+                f"Generated {len(parents)} mice over {kwargs['generations']} generations"
+            )
+
+            def compute():
+                kinship = Kinship(parents)
+                for pk in parents:
+                    kinship.inbreeding(pk)
+
+            compute_s = self.time(compute, kwargs["repeat"])
+            self.stdout.write(f"  Kinship over the strain: {compute_s:.2f} s")
+            update_s = self.time(
+                lambda: get_inbreeding().update(Mouse.objects.filter(strain=strain)),
+                kwargs["repeat"],
+            )
+            self.stdout.write(f"  Stored inbreeding of the strain: {update_s:.2f} s")
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark finished, strain rolled back"))
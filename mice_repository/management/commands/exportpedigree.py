@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from main.exports import stream_graphml, stream_pedigree_json
+from mice_repository.models import Mouse
+
+
+class Command(BaseCommand):
+
+    help = "Writes the whole colony pedigree as GraphML or JSON adjacency lists to a file or stdout."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=["graphml", "json"], default="graphml")
+        parser.add_argument("--output")
+
+    def handle(self, *args, **kwargs):
+        stream = (
+            stream_graphml if kwargs["format"] == "graphml" else stream_pedigree_json
+        )
+        chunks = stream(Mouse.objects.order_by("_global_id"))
+        if kwargs["output"]:
+            with open(kwargs["output"], "w", encoding="utf-8") as file:
+                file.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mice_repository.importer import MouseImporter, read_rows
+
+
+class Command(BaseCommand):
+
+    help = "Imports pre-existing mice from a .csv or .xlsx file, reporting rows that could not be imported."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **kwargs):
+        try:
+            with open(kwargs["path"], "rb") as file:
+                rows = read_rows(file, kwargs["path"])
+                result = MouseImporter(kwargs["chunk_size"]).run(rows)
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+
+        for error in result.errors:
+            self.stderr.write(str(error))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.created} mice, {len(result.errors)} rows skipped"
+            )
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from mice_repository.models import MouseAncestor
+from mice_repository.pedigree import get_closure
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Rebuilds the MouseAncestor pedigree closure table from every mouse's mother and father. "
+        "Use it to repair the table if it gets out of step with the mice."
+    )
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            cyclic = get_closure().rebuild()
+        for pk in cyclic:
+            self.stderr.write(f"{pk} is in or descends from a parentage cycle, skipped")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt pedigree with {MouseAncestor.objects.count()} ancestor rows"
+            )
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from mice_repository.census import get_census
+
+
+class Command(BaseCommand):
+
+    help = "Recounts alive mice and repairs any MouseCensus rows that have drifted. Meant to run nightly."
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            repaired = get_census().reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} census rows"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from mice_repository.snapshots import take_snapshot
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Records today's alive mice per strain, project, sex and age bucket in ColonySnapshot. "
+        "Schedule it daily, for example from cron shortly before midnight. Rerunning replaces the day's rows."
+    )
+
+    def handle(self, *args, **kwargs):
+        snapshots = take_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(f"Recorded snapshots of {len(snapshots)} strains")
+        )
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from mice_repository.kinship import get_inbreeding
+from mice_repository.models import Mouse
+from strain.models import Strain
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Recomputes the stored inbreeding coefficient of every mouse, one strain at a time, "
+        "or of the mice of one strain."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--strain")
+
+    def handle(self, *args, **kwargs):
+        if kwargs["strain"]:
+            strains = [kwargs["strain"]]
+        else:
+            strains = Strain.objects.values_list("pk", flat=True)
+
+        start = time.perf_counter()
+        updated = 0
+        for strain in strains:
+            with transaction.atomic():
+                updated += get_inbreeding().update(Mouse.objects.filter(strain=strain))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated inbreeding of {updated} mice in {time.perf_counter() - start:.2f}s"
+            )
+        )
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0001_initial"),
+        ("mice_repository", "0002_initial"),
+        ("projects", "0002_initial"),
+        ("strain", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="mouse",
+            index=models.Index(
+                condition=models.Q(("culled_date__isnull", True)),
+                fields=["strain", "dob"],
+                name="mice_alive_strain_dob_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mouse",
+            index=models.Index(
+                condition=models.Q(("culled_date__isnull", True)),
+                fields=["dob"],
+                name="mice_alive_dob_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mouse",
+            index=models.Index(
+                fields=["project", "_global_id"], name="mice_project_global_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mouse",
+            index=models.Index(
+                fields=["strain", "sex", "dob"], name="mice_strain_sex_dob_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mouse",
+            index=models.Index(
+                fields=["earmark", "strain"], name="mice_earmark_strain_idx"
+            ),
+        ),
+    ]
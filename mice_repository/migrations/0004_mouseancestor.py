@@ -0,0 +1,145 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Keeps each IN (...) list well under SQLite's bound parameter limit
+CHUNK_SIZE = 500
+
+
+# Orders mice so every mouse comes after its parents. Mice in or descending from a parentage cycle are left out
+def generations(parents):
+    remaining = {
+        pk: {parent for parent in mouse_parents if parent in parents}
+        for pk, mouse_parents in parents.items()
+    }
+    children = {}
+    for pk, mouse_parents in remaining.items():
+        for parent in mouse_parents:
+            children.setdefault(parent, []).append(pk)
+
+    generation = [pk for pk, mouse_parents in remaining.items() if not mouse_parents]
+    while generation:
+        yield generation
+        next_generation = []
+        for pk in generation:
+            for child in children.get(pk, []):
+                remaining[child].discard(pk)
+                if not remaining[child]:
+                    next_generation.append(child)
+        generation = next_generation
+
+
+# Fills the closure one generation at a time, copying each parent's rows one level deeper and keeping the
+# shortest depth of each ancestor on each line
+def build_closure(apps, schema_editor):
+    Mouse = apps.get_model("mice_repository", "Mouse")
+    MouseAncestor = apps.get_model("mice_repository", "MouseAncestor")
+    connection = schema_editor.connection
+    quote_name = connection.ops.quote_name
+    mice = quote_name(Mouse._meta.db_table)
+    closure = quote_name(MouseAncestor._meta.db_table)
+    pk = quote_name(Mouse._meta.pk.column)
+    ancestor, descendant, depth, line = [
+        quote_name(MouseAncestor._meta.get_field(field).column)
+        for field in ["ancestor", "descendant", "depth", "line"]
+    ]
+
+    parents = {
+        mouse: (mother, father)
+        for mouse, mother, father in Mouse.objects.values_list(
+            "pk", "mother", "father"
+        ).iterator()
+    }
+    with connection.cursor() as cursor:
+        for generation in generations(parents):
+            for i in range(0, len(generation), CHUNK_SIZE):
+                chunk = generation[i : i + CHUNK_SIZE]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                selects, params = [], []
+                for parent_field, parent_line in [("mother", "M"), ("father", "P")]:
+                    parent = (
+                        f"m.{quote_name(Mouse._meta.get_field(parent_field).column)}"
+                    )
+                    selects.append(
+                        f"SELECT {parent} AS {ancestor}, m.{pk} AS {descendant}, 1 AS {depth}, "
+                        f"%s AS {line} FROM {mice} m "
+                        f"WHERE {parent} IS NOT NULL AND m.{pk} IN ({placeholders})"
+                    )
+                    selects.append(
+                        f"SELECT a.{ancestor}, m.{pk}, a.{depth} + 1, %s FROM {mice} m "
+                        f"JOIN {closure} a ON a.{descendant} = {parent} "
+                        f"WHERE m.{pk} IN ({placeholders})"
+                    )
+                    params += [parent_line, *chunk, parent_line, *chunk]
+                cursor.execute(
+                    f"INSERT INTO {closure} ({ancestor}, {descendant}, {depth}, {line}) "
+                    f"SELECT {ancestor}, {descendant}, MIN({depth}), {line} FROM ("
+                    + " UNION ALL ".join(selects)
+                    + f") paths GROUP BY {ancestor}, {descendant}, {line}",
+                    params,
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mice_repository", "0003_mouse_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MouseAncestor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("depth", models.PositiveSmallIntegerField()),
+                (
+                    "line",
+                    models.CharField(
+                        choices=[("M", "Maternal"), ("P", "Paternal")], max_length=1
+                    ),
+                ),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="mice_repository.mouse",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="mice_repository.mouse",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "mouseancestor",
+                "managed": True,
+                "indexes": [
+                    models.Index(
+                        fields=["ancestor", "depth"], name="mouseancestor_ancestor_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="mouseancestor",
+            constraint=models.UniqueConstraint(
+                fields=("descendant", "ancestor", "line"),
+                name="mouseancestor_unique_line",
+            ),
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
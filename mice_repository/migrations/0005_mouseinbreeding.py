@@ -0,0 +1,122 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:33
+
+import django.db.models.deletion
+import numpy as np
+from django.db import migrations, models
+
+
+# Orders mice so every mouse comes after its parents. Mice in or descending from a parentage cycle are left out
+def generations(parents):
+    remaining = {
+        pk: {parent for parent in mouse_parents if parent in parents}
+        for pk, mouse_parents in parents.items()
+    }
+    children = {}
+    for pk, mouse_parents in remaining.items():
+        for parent in mouse_parents:
+            children.setdefault(parent, []).append(pk)
+
+    generation = [pk for pk, mouse_parents in remaining.items() if not mouse_parents]
+    while generation:
+        yield generation
+        next_generation = []
+        for pk in generation:
+            for child in children.get(pk, []):
+                remaining[child].discard(pk)
+                if not remaining[child]:
+                    next_generation.append(child)
+        generation = next_generation
+
+
+# Tabular method over a window of the mice with pups still to come. A pup's row of the relationship matrix is
+# the mean of its parents' rows and its inbreeding is half their relationship. Position 0 is an unknown parent
+def inbreeding(parents):
+    ordered = list(generations(parents))
+    last_litter = {}
+    for i, generation in enumerate(ordered):
+        for pk in generation:
+            for parent in parents[pk]:
+                last_litter[parent] = i
+
+    window, pks, coefficients = np.zeros((1, 1)), [None], {}
+    for i, generation in enumerate(ordered):
+        index = {pk: position for position, pk in enumerate(pks)}
+        mothers, fathers = (
+            np.array([index.get(parents[pk][line], 0) for pk in generation])
+            for line in [0, 1]
+        )
+        rows = (window[mothers] + window[fathers]) / 2
+        litter = (rows[:, mothers] + rows[:, fathers]) / 2
+        litter_inbreeding = window[mothers, fathers] / 2
+        np.fill_diagonal(litter, 1 + litter_inbreeding)
+        coefficients.update(zip(generation, litter_inbreeding.tolist()))
+
+        window = np.block([[window, rows.T], [rows, litter]])
+        pks += generation
+        kept = [0] + [
+            position
+            for position, pk in enumerate(pks)
+            if position and last_litter.get(pk, -1) > i
+        ]
+        window = window[np.ix_(kept, kept)]
+        pks = [pks[position] for position in kept]
+    return coefficients
+
+
+# One strain at a time, with the ancestors of its mice, so memory stays bounded by the largest strain
+def compute_inbreeding(apps, schema_editor):
+    Mouse = apps.get_model("mice_repository", "Mouse")
+    MouseInbreeding = apps.get_model("mice_repository", "MouseInbreeding")
+    colony, strains = {}, {}
+    for pk, mother, father, strain in Mouse.objects.values_list(
+        "pk", "mother", "father", "strain"
+    ).iterator():
+        colony[pk] = (mother, father)
+        strains.setdefault(strain, []).append(pk)
+
+    for mice in strains.values():
+        parents, stack = {}, list(mice)
+        while stack:
+            pk = stack.pop()
+            if pk not in parents:
+                parents[pk] = colony[pk]
+                stack += [parent for parent in colony[pk] if parent is not None]
+        coefficients = inbreeding(parents)
+        MouseInbreeding.objects.bulk_create(
+            [
+                MouseInbreeding(mouse_id=pk, coefficient=coefficients.get(pk, 0))
+                for pk in mice
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mice_repository", "0004_mouseancestor"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MouseInbreeding",
+            fields=[
+                (
+                    "mouse",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="inbreeding",
+                        serialize=False,
+                        to="mice_repository.mouse",
+                    ),
+                ),
+                ("coefficient", models.FloatField(default=0)),
+            ],
+            options={
+                "db_table": "mouseinbreeding",
+                "managed": True,
+            },
+        ),
+        migrations.RunPython(compute_inbreeding, migrations.RunPython.noop),
+    ]
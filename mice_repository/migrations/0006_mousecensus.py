@@ -0,0 +1,99 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# Counts the alive mice in each (strain, project, sex, dob) group with one grouped query
+def count_mice(apps, schema_editor):
+    Mouse = apps.get_model("mice_repository", "Mouse")
+    MouseCensus = apps.get_model("mice_repository", "MouseCensus")
+    groups = (
+        Mouse.objects.filter(culled_date__isnull=True)
+        .order_by()
+        .values_list("strain", "project", "sex", "dob")
+        .annotate(alive=Count("pk"))
+    )
+    MouseCensus.objects.bulk_create(
+        [
+            MouseCensus(
+                strain_id=strain, project_id=project, sex=sex, dob=dob, alive=alive
+            )
+            for strain, project, sex, dob, alive in groups.iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mice_repository", "0005_mouseinbreeding"),
+        ("projects", "0002_initial"),
+        ("strain", "0002_tubecounter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MouseCensus",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "sex",
+                    models.CharField(
+                        choices=[("M", "Male"), ("F", "Female")], max_length=1
+                    ),
+                ),
+                ("dob", models.DateField()),
+                ("alive", models.IntegerField(default=0)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="census",
+                        to="projects.project",
+                    ),
+                ),
+                (
+                    "strain",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="census",
+                        to="strain.strain",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "mousecensus",
+                "managed": True,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="mousecensus",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("project__isnull", False)),
+                fields=("strain", "project", "sex", "dob"),
+                name="mousecensus_unique_project_key",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="mousecensus",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("project__isnull", True)),
+                fields=("strain", "sex", "dob"),
+                name="mousecensus_unique_key",
+            ),
+        ),
+        migrations.RunPython(count_mice, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mice_repository", "0006_mousecensus"),
+        ("strain", "0002_tubecounter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ColonySnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("male_lt_2_months", models.PositiveIntegerField(default=0)),
+                ("male_2_6_months", models.PositiveIntegerField(default=0)),
+                ("male_6_12_months", models.PositiveIntegerField(default=0)),
+                ("male_12_24_months", models.PositiveIntegerField(default=0)),
+                ("male_over_24_months", models.PositiveIntegerField(default=0)),
+                ("female_lt_2_months", models.PositiveIntegerField(default=0)),
+                ("female_2_6_months", models.PositiveIntegerField(default=0)),
+                ("female_6_12_months", models.PositiveIntegerField(default=0)),
+                ("female_12_24_months", models.PositiveIntegerField(default=0)),
+                ("female_over_24_months", models.PositiveIntegerField(default=0)),
+                ("projects", models.JSONField(default=dict)),
+                (
+                    "strain",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshots",
+                        to="strain.strain",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "colonysnapshot",
+                "managed": True,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="colonysnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("date", "strain"), name="colonysnapshot_unique_day"
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0001_initial"),
+        ("mice_repository", "0007_colonysnapshot"),
+        ("projects", "0002_initial"),
+        ("strain", "0002_tubecounter"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="mouse",
+            index=models.Index(
+                fields=["dob", "culled_date"], name="mice_dob_culled_idx"
+            ),
+        ),
+    ]
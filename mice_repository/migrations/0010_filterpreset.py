@@ -0,0 +1,61 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mice_repository", "0009_mouseselection"),
+        ("projects", "0002_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FilterPreset",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50)),
+                ("shared", models.BooleanField(default=False)),
+                ("params", models.CharField(blank=True, max_length=1000)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="filter_presets",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="projects.project",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "filterpreset",
+                "managed": True,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="filterpreset",
+            constraint=models.UniqueConstraint(
+                fields=("owner", "name"), name="filterpreset_unique_name"
+            ),
+        ),
+    ]
@@ -1,17 +1,139 @@
+import hashlib
+import time
+import uuid
 from datetime import date, timedelta
+from urllib.parse import quote
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.http import QueryDict
+from django.utils import timezone
+from django.utils.datastructures import MultiValueDict
 
 from main.constants import EARMARK_CHOICES_PAIRED
+from strain.models import TubeCounter
 
+MICE_VERSION_KEY = "mice_version"
+MICE_BULK_VERSION_KEY = "mice_bulk_version"
 
-class CustomManager(models.Manager):
 
-    def get_queryset(self):
-        return super().get_queryset()
+# Version stamps change on every write they cover, so results cached under them are never stale. A stamp lost
+# from the cache restarts from the clock, so it cannot repeat an earlier one
+def cache_version(key):
+    return cache.get_or_set(key, time.time_ns, None)
+
 
+def increment_cache_versions(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache_version(key)
+
+
+# Bumped again on commit, so results cached from the old rows by another request before the commit do not survive
+def bump_cache_versions(keys):
+    increment_cache_versions(keys)
+    transaction.on_commit(lambda: increment_cache_versions(keys))
+
+
+def mouse_version_key(mouse_pk):
+    return f"mouse_version:{quote(str(mouse_pk))}"
+
+
+# Changes on every write to any mouse
+def mice_version():
+    return cache_version(MICE_VERSION_KEY)
+
+
+# Changes when the mouse or its comment is saved or deleted, and for every mouse when mice are updated or
+# deleted in bulk, since those writes do not say which mice they changed
+def mouse_version(mouse_pk):
+    return f"{cache_version(MICE_BULK_VERSION_KEY)}.{cache_version(mouse_version_key(mouse_pk))}"
+
+
+def project_mice_version_key(project_pk):
+    return f"project_mice_version:{project_pk}"
+
+
+# Changes when a mouse joins, leaves or changes within the project, and for every project when mice are updated
+# or deleted in bulk. Without a project, the scope is every mouse
+def scope_version(project_pk=None):
+    if project_pk is None:
+        return mice_version()
+    return f"{cache_version(MICE_BULK_VERSION_KEY)}.{cache_version(project_mice_version_key(project_pk))}"
+
+
+# mouse_pks are the existing mice that changed and project_pks the projects they were or are in, or mouse_pks
+# is None when any mouse may have changed
+def bump_mice_version(mouse_pks=None, project_pks=()):
+    if mouse_pks is None:
+        keys = [MICE_BULK_VERSION_KEY]
+    else:
+        keys = [mouse_version_key(pk) for pk in mouse_pks]
+        keys += [project_mice_version_key(pk) for pk in project_pks if pk is not None]
+    bump_cache_versions([MICE_VERSION_KEY] + keys)
+
+
+class MouseQuerySet(models.QuerySet):
+
+    # Date set by as_of(). Age buckets and ages are relative to it instead of today
+    _as_of = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._as_of = self._as_of
+        return clone
+
+    def reference_date(self):
+        return self._as_of or date.today()
+
+    # The colony as it stood at the end of on_date: mice born by then and not culled until after it.
+    # Served by the (dob, culled_date) index
+    def as_of(self, on_date):
+        mice = self.filter(
+            models.Q(culled_date__isnull=True) | models.Q(culled_date__gt=on_date),
+            dob__lte=on_date,
+        )
+        mice._as_of = on_date
+        if "age_in_days" in mice.query.annotations:
+            mice = mice.annotate(**age_annotations(on_date))
+        return mice
+
+    # update() skips Mouse.save(), so changes to fields the census is keyed on move the updated mice's counts here
+    def update(self, **kwargs):
+        from mice_repository.census import get_census
+
+        changed = {
+            self.model._meta.get_field(name).attname: value
+            for name, value in kwargs.items()
+            if self.model._meta.get_field(name).attname in CENSUS_FIELDS
+        }
+        bump_mice_version()
+        if not changed:
+            return super().update(**kwargs)
+        with transaction.atomic():
+            census = get_census()
+            groups = census.groups(self)
+            updated = super().update(**kwargs)
+            # Another transaction changed some of the mice between the two queries, as when two projects claim
+            # the same unassigned mice, so the counted groups are not what was updated
+            if updated != sum(groups.values()):
+                census.reconcile()
+            else:
+                census.move(groups, changed)
+        return updated
+
+    def delete(self):
+        bump_mice_version()
+        return super().delete()
+
+    # Mice from as_of() are already those alive on its date
     def alive(self):
+        if self._as_of:
+            return self
         return self.filter(culled_date__isnull=True)
 
     def culled(self):
@@ -20,25 +142,158 @@ class CustomManager(models.Manager):
     # Can't pass an argument to these age range methods because they need to be used in strain_management templates.
     # More flexible implementation might be custom templatetags in common app
     def weaned_lt_2_months_old(self):
-        return self.alive().filter(dob__gt=date.today() - timedelta(days=59))
+        return self.in_age_bucket("0-2 months")
 
     def between_2_6_months_old(self):
-        min_date = date.today() - timedelta(days=179)
-        max_date = date.today() - timedelta(days=60)
-        return self.alive().filter(dob__range=(min_date, max_date))
+        return self.in_age_bucket("2-6 months")
 
     def between_6_12_months_old(self):
-        min_date = date.today() - timedelta(days=364)
-        max_date = date.today() - timedelta(days=180)
-        return self.alive().filter(dob__range=(min_date, max_date))
+        return self.in_age_bucket("6-12 months")
 
     def between_12_24_months_old(self):
-        min_date = date.today() - timedelta(days=729)
-        max_date = date.today() - timedelta(days=365)
-        return self.alive().filter(dob__range=(min_date, max_date))
+        return self.in_age_bucket("12-24 months")
 
     def over_24_months_old(self):
-        return self.alive().filter(dob__lt=date.today() - timedelta(days=730))
+        return self.in_age_bucket("24+ months")
+
+    # Filters on dob rather than computed age so the dob indexes can be used
+    def in_age_bucket(self, label, on_date=None):
+        mice = self.as_of(on_date) if on_date else self.alive()
+        on_date = mice.reference_date()
+        min_days, max_days = AGE_BUCKET_RANGES[label]
+        mice = mice.filter(dob__lte=on_date - timedelta(days=min_days))
+        if max_days is not None:
+            mice = mice.filter(dob__gt=on_date - timedelta(days=max_days))
+        return mice
+
+    # Age is computed in SQL from a fixed date, so mice can be sorted, grouped and paged by age in the database
+    def with_age(self, on_date=None):
+        if "age_in_days" in self.query.annotations:
+            return self
+        return self.annotate(**age_annotations(on_date or self.reference_date()))
+
+    def age_bucket_counts(self, on_date=None):
+        return (
+            self.with_age(on_date)
+            .order_by()
+            .values("age_bucket")
+            .annotate(count=models.Count("pk"))
+        )
+
+    # Listing querysets fetch exactly the columns each grid renders, joining related rows in the same query
+    # so that a page costs a fixed number of queries however many rows it shows
+    def repository_listing(self):
+        return self.select_related("strain", "mother", "father", "cage").only(
+            *REPOSITORY_LISTING_FIELDS
+        )
+
+    def project_listing(self):
+        return self.only(*PROJECT_LISTING_FIELDS)
+
+    def request_listing(self):
+        return self.only(*REQUEST_LISTING_FIELDS)
+
+
+# Columns rendered in mice_repository.html
+REPOSITORY_LISTING_FIELDS = [
+    "_global_id",
+    "tube",
+    "earmark",
+    "sex",
+    "dob",
+    "coat",
+    "result",
+    "fate",
+    "strain__strain_name",
+    "mother___global_id",
+    "father___global_id",
+    "cage__box_no",
+]
+
+# Columns rendered in show_project.html
+PROJECT_LISTING_FIELDS = ["_global_id", "sex", "dob", "earmark", "project"]
+
+# Columns rendered in show_requests.html
+REQUEST_LISTING_FIELDS = ["_global_id"]
+
+
+# Upper age limit in days of each bucket, youngest first. Each bucket starts where the previous one ends
+AGE_BUCKETS = [
+    ("0-2 months", 60),
+    ("2-6 months", 180),
+    ("6-12 months", 365),
+    ("12-24 months", 730),
+    ("24+ months", None),
+]
+
+AGE_BUCKET_RANGES = {
+    label: (AGE_BUCKETS[i - 1][1] if i else 0, max_days)
+    for i, (label, max_days) in enumerate(AGE_BUCKETS)
+}
+
+# Mouse fields that decide which MouseCensus row a mouse is counted in
+CENSUS_FIELDS = ["strain_id", "project_id", "sex", "dob", "culled_date"]
+
+
+# Whole days between a date column and on_date
+class AgeInDays(models.Func):
+    template = "(%(expressions)s)"
+    arg_joiner = " - "
+    output_field = models.IntegerField()
+
+    def __init__(self, expression, on_date, **extra):
+        super().__init__(
+            models.Value(on_date, output_field=models.DateField()), expression, **extra
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="CAST(julianday(%(expressions)s) AS INTEGER)",
+            arg_joiner=") - julianday(",
+            **extra_context,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="DATEDIFF(%(expressions)s)",
+            arg_joiner=", ",
+            **extra_context,
+        )
+
+
+# Label from AGE_BUCKETS for a date column as of on_date
+class AgeBucket(models.Case):
+    def __init__(self, expression, on_date):
+        whens = [
+            models.When(
+                **{f"{expression}__gt": on_date - timedelta(days=max_days)},
+                then=models.Value(label),
+            )
+            for label, max_days in AGE_BUCKETS
+            if max_days is not None
+        ]
+        super().__init__(
+            *whens,
+            default=models.Value(AGE_BUCKETS[-1][0]),
+            output_field=models.CharField(),
+        )
+
+
+def age_annotations(on_date):
+    return {
+        "age_in_days": AgeInDays("dob", on_date),
+        "age_bucket": AgeBucket("dob", on_date),
+    }
+
+
+class CustomManager(models.Manager.from_queryset(MouseQuerySet)):
+
+    def get_queryset(self):
+        return super().get_queryset()
 
 
 class Mouse(models.Model):
@@ -142,21 +397,114 @@ class Mouse(models.Model):
             self.culled_date = culled_date
             self.save()
 
-    # tube can be set manually or is set automatically using strain.mice.count(). tube value then used to set _global_id
+    # A manual tube sets _global_id here so it can be checked for uniqueness. Automatic tubes are only reserved
+    # in save(), so a form that fails validation does not use one up
     def clean(self):
         super().clean()
-        new_tube = self.strain.mice.count()
-        if self.tube is None:
-            self.tube = new_tube + 1
-        if not self._global_id:
+        if not self._global_id and self.tube is not None:
             self._global_id = f"{self.strain.strain_name}-{self.tube}"
+        if not self._state.adding and self.parents_changed():
+            self.validate_parents()
         try:
             self.validate_unique()
         except ValidationError as e:
             raise ValidationError(e)
 
+    # A mouse cannot be its own ancestor
+    def validate_parents(self):
+        parents = [pk for pk in self.get_parent_ids() if pk]
+        if self.pk in parents or self.descendants().filter(pk__in=parents).exists():
+            raise ValidationError("A mouse cannot be the parent of its own ancestor")
+
+    # Remembers the parents and census row loaded from the database so save() can tell when they change
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_parents = instance.get_parent_ids()
+        if set(CENSUS_FIELDS).issubset(instance.__dict__):
+            instance._loaded_census = instance.census_key()
+        if "project_id" in instance.__dict__:
+            instance._loaded_project = instance.project_id
+        return instance
+
+    # Deferred parents that were never loaded count as unchanged
+    def get_parent_ids(self):
+        return self.__dict__.get("mother_id"), self.__dict__.get("father_id")
+
+    def parents_changed(self):
+        return self._state.adding or self.get_parent_ids() != getattr(
+            self, "_loaded_parents", (None, None)
+        )
+
+    # Census row the mouse is counted in, or None once it has been culled
+    def census_key(self):
+        if self.culled_date is not None:
+            return None
+        return (self.strain_id, self.project_id, self.sex, self.dob)
+
+    # Mice loaded with census fields deferred look their row up again
+    def loaded_census_key(self):
+        if self._state.adding:
+            return None
+        if hasattr(self, "_loaded_census"):
+            return self._loaded_census
+        return Mouse.objects.get(pk=self.pk).census_key()
+
+    # tube can be set manually or is reserved from the strain's TubeCounter. tube value then used to set _global_id
+    def assign_tube(self):
+        if self.tube is None:
+            self.tube = TubeCounter.reserve(self.strain)[0]
+        else:
+            TubeCounter.observe(self.strain, self.tube)
+        if not self._global_id:
+            self._global_id = f"{self.strain.strain_name}-{self.tube}"
+
+    # Keeps the MouseAncestor closure table in step with mother and father, and the census with the mouse
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+        from mice_repository.census import get_census
+        from mice_repository.pedigree import update_ancestors
+
+        created, parents_changed = self._state.adding, self.parents_changed()
+        old_census, new_census = self.loaded_census_key(), self.census_key()
+        with transaction.atomic():
+            if created:
+                self.assign_tube()
+            super().save(*args, **kwargs)
+            if parents_changed:
+                update_ancestors(self, created)
+            if old_census != new_census:
+                get_census().apply({old_census: -1, new_census: 1})
+        # A mouse loaded with its project deferred may have left a project that is not known
+        if created or hasattr(self, "_loaded_project"):
+            old_project = getattr(self, "_loaded_project", None)
+            bump_mice_version([self.pk], [old_project, self.project_id])
+        else:
+            bump_mice_version()
+        self._loaded_parents = self.get_parent_ids()
+        self._loaded_census = new_census
+        self._loaded_project = self.project_id
+
+    def delete(self, *args, **kwargs):
+        from mice_repository.census import get_census
+        from mice_repository.pedigree import invalidate_family_trees
+
+        invalidate_family_trees([self.pk])
+        bump_mice_version([self.pk], [self.project_id])
+        with transaction.atomic():
+            get_census().apply({self.loaded_census_key(): -1})
+            return super().delete(*args, **kwargs)
+
+    def ancestors(self):
+        return Mouse.objects.filter(descendant_links__descendant=self).distinct()
+
+    def descendants(self):
+        return Mouse.objects.filter(ancestor_links__ancestor=self).distinct()
+
+    # Coefficient of kinship with another mouse, which is also the inbreeding coefficient of any pups they have
+    def kinship(self, other):
+        from mice_repository.kinship import get_inbreeding
+
+        return get_inbreeding().kinship(self.pk, other.pk)
 
     def is_genotyped(self):
         return self.earmark != ""
@@ -171,6 +519,194 @@ class Mouse(models.Model):
         managed = True
         base_manager_name = "objects"
         db_table = "mice"
+        # Shaped for CustomManager age ranges, MouseFilter and ShowProjectView. See benchmarkqueries command
+        indexes = [
+            models.Index(
+                fields=["strain", "dob"],
+                condition=models.Q(culled_date__isnull=True),
+                name="mice_alive_strain_dob_idx",
+            ),
+            models.Index(
+                fields=["dob"],
+                condition=models.Q(culled_date__isnull=True),
+                name="mice_alive_dob_idx",
+            ),
+            models.Index(
+                fields=["project", "_global_id"], name="mice_project_global_id_idx"
+            ),
+            models.Index(
+                fields=["strain", "sex", "dob"], name="mice_strain_sex_dob_idx"
+            ),
+            models.Index(fields=["earmark", "strain"], name="mice_earmark_strain_idx"),
+            models.Index(fields=["dob", "culled_date"], name="mice_dob_culled_idx"),
+        ]
+
+
+# Closure table of the pedigree, maintained by Mouse.save() and mice_repository.pedigree.
+# Holds every (ancestor, descendant) pair with the fewest generations between them along the descendant's
+# mother (M) or father (P). An inbred mouse can have the same ancestor on both lines
+class MouseAncestor(models.Model):
+
+    ancestor = models.ForeignKey(
+        Mouse, on_delete=models.CASCADE, related_name="descendant_links"
+    )
+    descendant = models.ForeignKey(
+        Mouse, on_delete=models.CASCADE, related_name="ancestor_links"
+    )
+    depth = models.PositiveSmallIntegerField()
+    line = models.CharField(
+        max_length=1, choices=[("M", "Maternal"), ("P", "Paternal")]
+    )
+
+    def __str__(self):
+        return f"{self.ancestor} -> {self.descendant} ({self.depth}{self.line})"
+
+    class Meta:
+        managed = True
+        db_table = "mouseancestor"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["descendant", "ancestor", "line"],
+                name="mouseancestor_unique_line",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["ancestor", "depth"], name="mouseancestor_ancestor_idx"
+            ),
+        ]
+
+
+# Inbreeding coefficient of each mouse, the probability that both copies of a gene descend from the same
+# ancestor. Maintained by Mouse.save() and mice_repository.kinship whenever a mouse's pedigree changes
+class MouseInbreeding(models.Model):
+
+    mouse = models.OneToOneField(
+        Mouse,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="inbreeding",
+    )
+    coefficient = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.mouse_id}: {self.coefficient:.4f}"
+
+    class Meta:
+        managed = True
+        db_table = "mouseinbreeding"
+
+
+# Alive mice counted per strain, project, sex and date of birth, so dashboards can total strains, projects and
+# age buckets from a few hundred rows instead of counting mice. Kept up to date in the same transaction by
+# Mouse.save(), Mouse.delete(), MouseQuerySet.update() and the importer, and repaired by reconcilecensus
+class MouseCensus(models.Model):
+
+    strain = models.ForeignKey(
+        "strain.Strain", on_delete=models.CASCADE, related_name="census"
+    )
+    project = models.ForeignKey(
+        "projects.Project",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="census",
+    )
+    sex = models.CharField(max_length=1, choices=[("M", "Male"), ("F", "Female")])
+    dob = models.DateField()
+    alive = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.strain_id} {self.project_id} {self.sex} {self.dob}: {self.alive}"
+
+    class Meta:
+        managed = True
+        db_table = "mousecensus"
+        # NULL projects are never equal in a unique constraint, so mice outside a project get their own
+        constraints = [
+            models.UniqueConstraint(
+                fields=["strain", "project", "sex", "dob"],
+                condition=models.Q(project__isnull=False),
+                name="mousecensus_unique_project_key",
+            ),
+            models.UniqueConstraint(
+                fields=["strain", "sex", "dob"],
+                condition=models.Q(project__isnull=True),
+                name="mousecensus_unique_key",
+            ),
+        ]
+
+
+# Column name suffix of each age bucket in ColonySnapshot
+SNAPSHOT_AGE_COLUMNS = {
+    "0-2 months": "lt_2_months",
+    "2-6 months": "2_6_months",
+    "6-12 months": "6_12_months",
+    "12-24 months": "12_24_months",
+    "24+ months": "over_24_months",
+}
+
+SNAPSHOT_COUNT_COLUMNS = [
+    f"{sex}_{suffix}"
+    for sex in ["male", "female"]
+    for suffix in SNAPSHOT_AGE_COLUMNS.values()
+]
+
+
+class ColonySnapshotQuerySet(models.QuerySet):
+
+    # Both range queries read one index range of (date, strain), so a year of history is a single query
+    def between(self, start, end):
+        return self.filter(date__range=(start, end)).order_by("date", "strain")
+
+    def daily_totals(self, start, end):
+        return (
+            self.filter(date__range=(start, end))
+            .values("date")
+            .annotate(
+                **{column: models.Sum(column) for column in SNAPSHOT_COUNT_COLUMNS}
+            )
+            .order_by("date")
+        )
+
+
+# Alive mice of a strain at the end of one day, one row per day per strain. Sex and age bucket counts are
+# columns and project counts a small JSON object of project name to count, so a year of a strain is 365 rows.
+# Written by the snapshotcolony command, which is meant to run daily
+class ColonySnapshot(models.Model):
+    objects = ColonySnapshotQuerySet.as_manager()
+
+    date = models.DateField()
+    strain = models.ForeignKey(
+        "strain.Strain", on_delete=models.CASCADE, related_name="snapshots"
+    )
+    male_lt_2_months = models.PositiveIntegerField(default=0)
+    male_2_6_months = models.PositiveIntegerField(default=0)
+    male_6_12_months = models.PositiveIntegerField(default=0)
+    male_12_24_months = models.PositiveIntegerField(default=0)
+    male_over_24_months = models.PositiveIntegerField(default=0)
+    female_lt_2_months = models.PositiveIntegerField(default=0)
+    female_2_6_months = models.PositiveIntegerField(default=0)
+    female_6_12_months = models.PositiveIntegerField(default=0)
+    female_12_24_months = models.PositiveIntegerField(default=0)
+    female_over_24_months = models.PositiveIntegerField(default=0)
+    projects = models.JSONField(default=dict)
+
+    @property
+    def total(self):
+        return sum(getattr(self, column) for column in SNAPSHOT_COUNT_COLUMNS)
+
+    def __str__(self):
+        return f"{self.strain_id} on {self.date}"
+
+    class Meta:
+        managed = True
+        db_table = "colonysnapshot"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "strain"], name="colonysnapshot_unique_day"
+            )
+        ]
 
 
 class MouseComment(models.Model):
@@ -192,6 +728,11 @@ class MouseComment(models.Model):
     def save(self, *args, **kwargs):
         self.clean()
         super().save(*args, **kwargs)
+        bump_cache_versions([mouse_version_key(self.comment_id_id)])
+
+    def delete(self, *args, **kwargs):
+        bump_cache_versions([mouse_version_key(self.comment_id_id)])
+        return super().delete(*args, **kwargs)
 
     def __str__(self):
         return f"{self.comment_id}"
@@ -199,3 +740,142 @@ class MouseComment(models.Model):
     class Meta:
         managed = True
         db_table = "comment"
+
+
+# Mice chosen on one page and acted on by a later one. Only the selection's id travels through the session and
+# forms. Listed mice are stored as their sorted primary keys, and "all matching" selections as the MouseFilter
+# query of a project, applied again when the mice are read. The id is random so a selection cannot be guessed
+# from another's
+class MouseSelection(models.Model):
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(
+        "system_users.CustomUser", on_delete=models.CASCADE, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    project = models.ForeignKey(
+        "projects.Project", on_delete=models.CASCADE, null=True, blank=True
+    )
+    mouse_ids = models.JSONField(default=list)
+    filter_params = models.JSONField(null=True, blank=True)
+
+    @classmethod
+    def from_mice(cls, mice_qs, **fields):
+        mouse_ids = list(mice_qs.order_by("pk").values_list("pk", flat=True))
+        return cls.objects.create(mouse_ids=mouse_ids, **fields)
+
+    @classmethod
+    def from_filter(cls, project, query_params, **fields):
+        return cls.objects.create(
+            project=project, filter_params=dict(query_params.lists()), **fields
+        )
+
+    # The filter only applies once searched, as on the project page. django-filter drops fields that fail
+    # validation, which would widen the selection, so an invalid filter is never applied
+    @staticmethod
+    def project_filter(project, params):
+        # main.filters imports this module
+        from main.filters import MouseFilter
+
+        if "search" not in params:
+            return None
+        return MouseFilter(
+            params, queryset=Mouse.objects.filter(project=project), project=project
+        )
+
+    @classmethod
+    def filter_is_valid(cls, project, params):
+        mouse_filter = cls.project_filter(project, params)
+        return mouse_filter is None or mouse_filter.is_valid()
+
+    def mice(self):
+        if self.filter_params is not None:
+            mouse_filter = self.project_filter(
+                self.project, MultiValueDict(self.filter_params)
+            )
+            if mouse_filter is None:
+                return Mouse.objects.filter(project=self.project)
+            return mouse_filter.qs if mouse_filter.is_valid() else Mouse.objects.none()
+
+        return Mouse.objects.filter(pk__in=self.mouse_ids)
+
+    # Selections are only needed until the page that uses them is submitted, so expired ones are deleted as new
+    # ones are made
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            MouseSelection.objects.filter(
+                created_at__lt=timezone.now()
+                - timedelta(seconds=settings.MOUSE_SELECTION_MAX_AGE)
+            ).delete()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.id}"
+
+    class Meta:
+        managed = True
+        db_table = "mouseselection"
+
+
+class FilterPresetQuerySet(models.QuerySet):
+
+    def visible_to(self, user):
+        return self.filter(models.Q(owner=user) | models.Q(shared=True))
+
+
+# A named MouseFilter search, kept per user and optionally shared. params is the search's query string and
+# project, when set, limits it to that project's mice. The matching pks are cached under the version of that
+# scope and the day, as ages are relative to today, so reopening a preset reads a list instead of scanning
+class FilterPreset(models.Model):
+    objects = FilterPresetQuerySet.as_manager()
+
+    name = models.CharField(max_length=50)
+    owner = models.ForeignKey(
+        "system_users.CustomUser",
+        on_delete=models.CASCADE,
+        related_name="filter_presets",
+    )
+    shared = models.BooleanField(default=False)
+    project = models.ForeignKey(
+        "projects.Project", on_delete=models.CASCADE, null=True, blank=True
+    )
+    params = models.CharField(max_length=1000, blank=True)
+
+    def scope_mice(self):
+        if self.project_id is None:
+            return Mouse.objects.all()
+        return Mouse.objects.filter(project=self.project_id)
+
+    def cache_key(self):
+        params = hashlib.md5(self.params.encode()).hexdigest()
+        return (
+            f"filter_preset:{self.pk}:{params}:{date.today()}"
+            f":{scope_version(self.project_id)}"
+        )
+
+    # Matching pks in the order the search returns them
+    def mice_pks(self):
+        from main.filters import MouseFilter
+
+        def search():
+            mice = MouseFilter(
+                QueryDict(self.params),
+                queryset=self.scope_mice().order_by("_global_id"),
+            ).qs
+            return list(mice.values_list("pk", flat=True))
+
+        return cache.get_or_set(
+            self.cache_key(), search, settings.FILTER_PRESET_CACHE_TIMEOUT
+        )
+
+    def __str__(self):
+        return f"{self.name}"
+
+    class Meta:
+        managed = True
+        db_table = "filterpreset"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "name"], name="filterpreset_unique_name"
+            )
+        ]
@@ -0,0 +1,157 @@
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from mice_repository.models import Mouse, MouseAncestor
+
+# Keeps each IN (...) list well under SQLite's bound parameter limit
+CHUNK_SIZE = 500
+
+
+class PedigreeCycleError(ValidationError):
+    pass
+
+
+# Maintains the MouseAncestor closure table, which holds one row per (ancestor, descendant, line) at the
+# shortest depth the ancestor is found at. depth 1 is a parent, depth 2 a grandparent and so on. line is M or P
+# for whether the path starts at the descendant's mother or father. Rows for a set of mice are rebuilt one
+# generation at a time with INSERT ... SELECT, copying each parent's rows one level deeper, so the work stays
+# in the database. Any set of mice can be rebuilt as long as it includes all of their descendants
+class PedigreeClosure:
+
+    def __init__(self, mouse_model, ancestor_model):
+        self.mouse_model = mouse_model
+        self.ancestor_model = ancestor_model
+
+    def rebuild(self, mouse_pks=None):
+        if mouse_pks is None:
+            mice = self.mouse_model.objects.values_list("pk", "mother", "father")
+            self.ancestor_model.objects.all().delete()
+        else:
+            mice = self.mouse_model.objects.filter(pk__in=mouse_pks).values_list(
+                "pk", "mother", "father"
+            )
+        parents = {pk: (mother, father) for pk, mother, father in mice.iterator()}
+        generations, cyclic = self.generations(parents)
+
+        if mouse_pks is not None:
+            for chunk in self.chunks(list(parents)):
+                self.ancestor_model.objects.filter(descendant__in=chunk).delete()
+        for generation in generations:
+            for chunk in self.chunks(generation):
+                self.insert_rows(chunk)
+        return cyclic
+
+    # Orders mice so every mouse comes after its parents. Parents outside the set already have their rows.
+    # Mice left over once no more can be placed are part of, or descend from, a cycle
+    @staticmethod
+    def generations(parents):
+        remaining = {
+            pk: {parent for parent in mouse_parents if parent in parents}
+            for pk, mouse_parents in parents.items()
+        }
+        children = {}
+        for pk, mouse_parents in remaining.items():
+            for parent in mouse_parents:
+                children.setdefault(parent, []).append(pk)
+
+        generations = []
+        generation = [
+            pk for pk, mouse_parents in remaining.items() if not mouse_parents
+        ]
+        while generation:
+            generations.append(generation)
+            next_generation = []
+            for pk in generation:
+                for child in children.get(pk, []):
+                    remaining[child].discard(pk)
+                    if not remaining[child]:
+                        next_generation.append(child)
+            for pk in generation:
+                del remaining[pk]
+            generation = next_generation
+        return generations, sorted(remaining)
+
+    @staticmethod
+    def chunks(pks):
+        for i in range(0, len(pks), CHUNK_SIZE):
+            yield pks[i : i + CHUNK_SIZE]
+
+    def insert_rows(self, mouse_pks):
+        quote_name = connection.ops.quote_name
+        mouse_meta, ancestor_meta = self.mouse_model._meta, self.ancestor_model._meta
+        mice = quote_name(mouse_meta.db_table)
+        closure = quote_name(ancestor_meta.db_table)
+        pk = quote_name(mouse_meta.pk.column)
+        ancestor = quote_name(ancestor_meta.get_field("ancestor").column)
+        descendant = quote_name(ancestor_meta.get_field("descendant").column)
+        depth = quote_name(ancestor_meta.get_field("depth").column)
+        line = quote_name(ancestor_meta.get_field("line").column)
+        placeholders = ", ".join(["%s"] * len(mouse_pks))
+
+        selects, params = [], []
+        for parent_field, parent_line in [("mother", "M"), ("father", "P")]:
+            parent = f"m.{quote_name(mouse_meta.get_field(parent_field).column)}"
+            selects.append(
+                f"SELECT {parent} AS {ancestor}, m.{pk} AS {descendant}, 1 AS {depth}, "
+                f"%s AS {line} FROM {mice} m "
+                f"WHERE {parent} IS NOT NULL AND m.{pk} IN ({placeholders})"
+            )
+            selects.append(
+                f"SELECT a.{ancestor}, m.{pk}, a.{depth} + 1, %s FROM {mice} m "
+                f"JOIN {closure} a ON a.{descendant} = {parent} "
+                f"WHERE m.{pk} IN ({placeholders})"
+            )
+            params += [parent_line, *mouse_pks, parent_line, *mouse_pks]
+
+        # An ancestor reached along several paths on the same line keeps only its shortest one
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {closure} ({ancestor}, {descendant}, {depth}, {line}) "
+                f"SELECT {ancestor}, {descendant}, MIN({depth}), {line} FROM ("
+                + " UNION ALL ".join(selects)
+                + f") paths GROUP BY {ancestor}, {descendant}, {line}",
+                params,
+            )
+
+
+def get_closure():
+    return PedigreeClosure(Mouse, MouseAncestor)
+
+
+def family_tree_cache_key(mouse_pk):
+    return f"family_tree:{settings.FAMILY_TREE_MAX_DEPTH}:{quote(mouse_pk)}"
+
+
+# A mouse's family tree changes when its own or any ancestor's parents change, which is the mouse and all its
+# descendants. Keys are deleted again on commit so a tree cached from the old parentage by another request
+# before the commit does not survive
+def invalidate_family_trees(mouse_pks):
+    keys = [family_tree_cache_key(pk) for pk in mouse_pks]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+# Called after a mouse is created or given a different mother or father. The mouse's descendants inherit
+# its new ancestors, so their rows and inbreeding coefficients are rebuilt too
+def update_ancestors(mouse, created=False):
+    from mice_repository.kinship import get_inbreeding
+
+    subtree = [mouse.pk]
+    if not created:
+        subtree += (
+            MouseAncestor.objects.filter(ancestor=mouse)
+            .values_list("descendant", flat=True)
+            .distinct()
+        )
+    for parent in [mouse.mother_id, mouse.father_id]:
+        if parent in subtree:
+            raise PedigreeCycleError(
+                f"{parent} cannot be a parent of {mouse.pk} because it is {mouse.pk} or its descendant"
+            )
+    get_closure().rebuild(subtree)
+    get_inbreeding().update(Mouse.objects.filter(pk__in=subtree))
+    invalidate_family_trees(subtree)
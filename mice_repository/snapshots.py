@@ -0,0 +1,44 @@
+from datetime import date
+
+from django.db.models import Sum
+
+from mice_repository.models import (
+    SNAPSHOT_AGE_COLUMNS,
+    SNAPSHOT_COUNT_COLUMNS,
+    AgeBucket,
+    ColonySnapshot,
+    MouseCensus,
+)
+from strain.models import Strain
+
+SEX_COLUMNS = {"M": "male", "F": "female"}
+
+
+# Builds today's snapshot of every strain from the MouseCensus in one grouped query, bucketing the census
+# dates of birth by age in the database, and writes it with a single upsert so the job can be rerun
+def take_snapshot():
+    today = date.today()
+    snapshots = {
+        strain: ColonySnapshot(date=today, strain_id=strain, projects={})
+        for strain in Strain.objects.values_list("pk", flat=True)
+    }
+    counts = (
+        MouseCensus.objects.filter(alive__gt=0)
+        .annotate(age_bucket=AgeBucket("dob", today))
+        .values_list("strain", "project__project_name", "sex", "age_bucket")
+        .annotate(alive=Sum("alive"))
+        .order_by()
+    )
+    for strain, project, sex, age_bucket, alive in counts:
+        snapshot = snapshots[strain]
+        column = f"{SEX_COLUMNS[sex]}_{SNAPSHOT_AGE_COLUMNS[age_bucket]}"
+        setattr(snapshot, column, getattr(snapshot, column) + alive)
+        if project:
+            snapshot.projects[project] = snapshot.projects.get(project, 0) + alive
+
+    return ColonySnapshot.objects.bulk_create(
+        snapshots.values(),
+        update_conflicts=True,
+        unique_fields=["date", "strain"],
+        update_fields=[*SNAPSHOT_COUNT_COLUMNS, "projects"],
+    )
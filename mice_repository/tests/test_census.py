@@ -0,0 +1,98 @@
+import io
+from datetime import date
+
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase
+
+from main.model_factories import MouseFactory, ProjectFactory
+from mice_repository.census import get_census
+from mice_repository.importer import MouseImporter
+from mice_repository.models import Mouse, MouseCensus
+from strain.models import Strain
+
+
+def census_rows():
+    return {
+        (row.strain_id, row.project_id, row.sex, row.dob): row.alive
+        for row in MouseCensus.objects.exclude(alive=0)
+    }
+
+
+# Census rows recounted from scratch, which the maintained rows must always match
+def expected_rows():
+    get_census().reconcile()
+    return census_rows()
+
+
+class MouseCensusTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.strain = Strain.objects.create(strain_name="census")
+        cls.project = ProjectFactory()
+        cls.dob = date(2024, 1, 1)
+        cls.mouse = MouseFactory(strain=cls.strain, sex="F", dob=cls.dob)
+
+    def key(self, project=None, sex="F"):
+        return (self.strain.pk, project and project.pk, sex, self.dob)
+
+    def assert_matches_recount(self):
+        rows = census_rows()
+        self.assertEqual(rows, expected_rows())
+
+    def test_created_mouse_counted(self):
+        self.assertEqual(census_rows(), {self.key(): 1})
+
+    def test_culled_mouse_removed(self):
+        self.mouse.cull(date.today())
+        self.assertEqual(census_rows(), {})
+        self.assert_matches_recount()
+
+    def test_project_reassignment_moves_mouse(self):
+        self.mouse.project = self.project
+        self.mouse.save()
+        self.assertEqual(census_rows(), {self.key(self.project): 1})
+        self.assert_matches_recount()
+
+    def test_related_manager_add_moves_mice(self):
+        other = MouseFactory(strain=self.strain, sex="M", dob=self.dob)
+        self.project.mice.add(self.mouse, other)
+        self.assertEqual(
+            census_rows(),
+            {self.key(self.project): 1, self.key(self.project, "M"): 1},
+        )
+        self.assert_matches_recount()
+
+    def test_bulk_cull(self):
+        MouseFactory(strain=self.strain, sex="F", dob=self.dob)
+        Mouse.objects.filter(strain=self.strain).update(culled_date=date.today())
+        self.assertEqual(census_rows(), {})
+
+    def test_expression_update_rebuilds_census(self):
+        Mouse.objects.filter(pk=self.mouse.pk).update(sex=F("sex"), project=None)
+        self.assert_matches_recount()
+
+    def test_delete(self):
+        self.mouse.delete()
+        self.assertEqual(census_rows(), {})
+
+    def test_deferred_mouse(self):
+        mouse = Mouse.objects.only("pk", "tube").get(pk=self.mouse.pk)
+        mouse.project = self.project
+        mouse.save()
+        self.assertEqual(census_rows(), {self.key(self.project): 1})
+
+    def test_import(self):
+        MouseImporter().run(
+            [{"strain": self.strain.pk, "sex": "F", "dob": "2024-01-01"}] * 3
+        )
+        self.assertEqual(census_rows(), {self.key(): 4})
+
+    def test_reconcile_repairs_drift(self):
+        MouseCensus.objects.update(alive=7)
+        MouseCensus.objects.create(strain=self.strain, sex="M", dob=self.dob, alive=2)
+        out = io.StringIO()
+        call_command("reconcilecensus", stdout=out)
+        self.assertIn("Repaired 2 census rows", out.getvalue())
+        self.assertEqual(MouseCensus.objects.get().alive, 1)
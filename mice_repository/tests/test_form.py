@@ -66,6 +66,14 @@ class RepositoryMiceFormTest(TestCase):
         self.form.save()
         self.assertEqual(self.strain.mice.count(), 1)
 
+    def test_invalid_submissions_do_not_use_up_tubes(self):
+        for _ in range(3):
+            self.assertFalse(
+                RepositoryMiceFormFactory.build(strain=self.strain, dob=None).is_valid()
+            )
+        self.mouse = RepositoryMiceFormFactory.build(strain=self.strain).save()
+        self.assertEqual(self.mouse.pk, f"{self.strain.strain_name}-1")
+
     # Mother choices are female
 
     # Father choices are male
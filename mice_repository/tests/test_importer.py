@@ -0,0 +1,201 @@
+import io
+import os
+import tempfile
+import zipfile
+from datetime import date
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from main.model_factories import (
+    MouseFactory,
+    ProjectFactory,
+    StockCageFactory,
+    StrainFactory,
+)
+from mice_repository.importer import (
+    ImportReadError,
+    MouseImporter,
+    read_csv_rows,
+    read_rows,
+)
+from mice_repository.models import Mouse
+
+
+def csv_file(*lines):
+    return io.BytesIO("\n".join(lines).encode())
+
+
+class ReadRowsTest(TestCase):
+
+    def test_csv_rows_keyed_by_header(self):
+        rows = list(read_csv_rows(csv_file("strain,sex,dob", "s1,M,2020-01-01")))
+        self.assertEqual(rows, [{"strain": "s1", "sex": "M", "dob": "2020-01-01"}])
+
+    def test_csv_byte_order_mark_stripped(self):
+        rows = list(read_csv_rows(io.BytesIO("﻿strain\ns1".encode())))
+        self.assertEqual(rows, [{"strain": "s1"}])
+
+    def test_xlsx_rows_keyed_by_header(self):
+        import openpyxl
+
+        workbook = openpyxl.Workbook()
+        workbook.active.append(["strain", "sex", "dob"])
+        workbook.active.append(["s1", "F", date(2020, 1, 1)])
+        file = io.BytesIO()
+        workbook.save(file)
+        file.seek(0)
+        row = next(read_rows(file, "mice.xlsx"))
+        self.assertEqual(row["strain"], "s1")
+        self.assertEqual(row["sex"], "F")
+
+    def test_unsupported_extension(self):
+        with self.assertRaises(ValueError):
+            read_rows(csv_file(), "mice.txt")
+
+
+class MouseImporterTest(TestCase):
+
+    def setUp(self):
+        self.strain = StrainFactory()
+        self.mother = MouseFactory(strain=self.strain, sex="F")
+        self.father = MouseFactory(strain=self.strain, sex="M")
+        self.cage = StockCageFactory()
+        self.project = ProjectFactory()
+
+    def row(self, **values):
+        return {"strain": self.strain.strain_name, "sex": "M", "dob": "2020-01-01"} | {
+            key: str(value) for key, value in values.items()
+        }
+
+    def test_valid_rows_created(self):
+        result = MouseImporter().run(
+            [
+                self.row(
+                    mother=self.mother.pk,
+                    father=self.father.pk,
+                    cage=self.cage.box_no,
+                    project=self.project.project_name,
+                    earmark="TL",
+                ),
+                self.row(sex="F"),
+            ]
+        )
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.errors, [])
+        mouse = Mouse.objects.get(tube=3)
+        self.assertEqual(mouse.mother, self.mother)
+        self.assertEqual(mouse.father, self.father)
+        self.assertEqual(mouse.cage.box_no, self.cage.box_no)
+        self.assertEqual(mouse.project, self.project)
+        self.assertEqual(mouse.dob, date(2020, 1, 1))
+
+    def test_tubes_allocated_after_existing_mice(self):
+        MouseImporter(chunk_size=2).run([self.row() for _ in range(5)])
+        self.assertEqual(
+            sorted(self.strain.mice.values_list("tube", flat=True)),
+            [1, 2, 3, 4, 5, 6, 7],
+        )
+
+    def test_manual_tube_kept_and_skipped_by_later_allocations(self):
+        MouseImporter().run([self.row(tube=10), self.row()])
+        self.assertTrue(Mouse.objects.filter(pk=f"{self.strain.strain_name}-10"))
+        self.assertTrue(Mouse.objects.filter(pk=f"{self.strain.strain_name}-11"))
+
+    def test_invalid_rows_reported_without_aborting(self):
+        result = MouseImporter().run(
+            [
+                self.row(strain="missing"),
+                self.row(sex="X"),
+                self.row(dob="not a date"),
+                self.row(mother=self.father.pk),
+                self.row(father="missing-1"),
+                self.row(cage="missing"),
+                self.row(project="missing"),
+                self.row(earmark="XX"),
+                self.row(tube=self.mother.tube),
+                self.row(),
+            ]
+        )
+        self.assertEqual(result.created, 1)
+        self.assertEqual(
+            [error.row_number for error in result.errors], list(range(2, 11))
+        )
+
+    def test_overflowing_tube_reported(self):
+        result = MouseImporter().run([self.row(tube="1e400"), self.row()])
+        self.assertEqual(result.created, 1)
+        self.assertEqual(str(result.errors[0]), "Row 2: Tube '1e400' is not a number")
+
+    def test_undecodable_csv_raises_after_earlier_chunks(self):
+        valid = f"{self.strain.strain_name},M,2020-01-01\n".encode()
+        file = io.BytesIO(b"strain,sex,dob\n" + valid * 2 + b"\xff\xfe,M,2020-01-01\n")
+        with self.assertRaises(ImportReadError) as context:
+            MouseImporter(chunk_size=2).run(read_rows(file, "mice.csv"))
+        self.assertIn("2 mice were imported before the error", str(context.exception))
+
+    def test_corrupt_workbook_raises(self):
+        for content in [b"not a zip file", self.zip_without_workbook()]:
+            with self.assertRaises(ImportReadError):
+                MouseImporter().run(read_rows(io.BytesIO(content), "mice.xlsx"))
+
+    @staticmethod
+    def zip_without_workbook():
+        file = io.BytesIO()
+        with zipfile.ZipFile(file, "w") as archive:
+            archive.writestr("mice.txt", "strain")
+        return file.getvalue()
+
+    def test_duplicate_tubes_in_file_rejected(self):
+        result = MouseImporter().run([self.row(tube=20), self.row(tube=20)])
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.errors[0].row_number, 3)
+
+    def test_parent_imported_earlier_in_file(self):
+        result = MouseImporter(chunk_size=1).run(
+            [
+                self.row(tube=30, sex="F"),
+                self.row(mother=f"{self.strain.strain_name}-30"),
+            ]
+        )
+        self.assertEqual(result.errors, [])
+        self.assertEqual(
+            Mouse.objects.get(tube=31).mother_id, f"{self.strain.strain_name}-30"
+        )
+
+    def count_queries(self, n_rows):
+        rows = [self.row(mother=self.mother.pk, cage=self.cage.box_no)] * n_rows
+        with CaptureQueriesContext(connection) as queries:
+            MouseImporter().run(rows)
+        return len(queries)
+
+    # The first import also creates the rows' census row, so both measured imports run after it
+    def test_query_count_independent_of_row_count(self):
+        self.count_queries(1)
+        self.assertEqual(self.count_queries(2), self.count_queries(40))
+
+
+class ImportMiceCommandTest(TestCase):
+
+    def test_imports_file(self):
+        strain = StrainFactory()
+        path = self.tmp_csv(f"strain,sex,dob\n{strain.strain_name},M,2020-01-01\n")
+        out = io.StringIO()
+        call_command("importmice", path, stdout=out, stderr=io.StringIO())
+        self.assertIn("Imported 1 mice, 0 rows skipped", out.getvalue())
+        self.assertEqual(strain.mice.count(), 1)
+
+    def test_corrupt_workbook_is_command_error(self):
+        path = self.tmp_csv("not a zip file", suffix=".xlsx")
+        with self.assertRaises(CommandError):
+            call_command("importmice", path, stdout=io.StringIO())
+
+    def tmp_csv(self, content, suffix=".csv"):
+        file = tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False)
+        file.write(content)
+        file.close()
+        self.addCleanup(os.remove, file.name)
+        return file.name
@@ -0,0 +1,183 @@
+import io
+import random
+from importlib import import_module
+
+from django.apps import apps
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from main.model_factories import MouseFactory, StrainFactory
+from mice_repository.importer import MouseImporter
+from mice_repository.kinship import Kinship, get_inbreeding
+from mice_repository.models import Mouse, MouseInbreeding
+
+
+def coefficient(mouse):
+    return MouseInbreeding.objects.get(mouse=mouse).coefficient
+
+
+# Recursive definition of kinship, used to check Kinship on a random pedigree.
+# Mice are numbered so that parents always have a lower number than their pups
+def naive_kinship(parents, a, b):
+    if a is None or b is None:
+        return 0
+    if a == b:
+        return (1 + naive_kinship(parents, *parents[a])) / 2
+    if a < b:
+        a, b = b, a
+    mother, father = parents[a]
+    return (naive_kinship(parents, mother, b) + naive_kinship(parents, father, b)) / 2
+
+
+class KinshipTest(SimpleTestCase):
+
+    def test_founder_self_kinship(self):
+        self.assertEqual(Kinship({"a": (None, None)}).kinship("a", "a"), 0.5)
+
+    def test_unknown_mice(self):
+        kinship = Kinship({"a": (None, None)})
+        self.assertEqual(kinship.kinship("a", "missing"), 0)
+        self.assertEqual(kinship.kinship(None, None), 0)
+
+    def test_full_siblings(self):
+        kinship = Kinship(
+            {
+                "dam": (None, None),
+                "sire": (None, None),
+                "sister": ("dam", "sire"),
+                "brother": ("dam", "sire"),
+            }
+        )
+        self.assertEqual(kinship.kinship("sister", "brother"), 0.25)
+        self.assertEqual(kinship.kinship("dam", "sister"), 0.25)
+        self.assertEqual(kinship.kinship("dam", "sire"), 0)
+
+    def random_parents(self):
+        rng = random.Random(0)
+        parents = {}
+        for pk in range(60):
+            earlier = list(range(pk))
+            mother = rng.choice(earlier + [None]) if earlier else None
+            father = rng.choice(earlier + [None]) if earlier else None
+            parents[pk] = (mother, father)
+        return rng, parents
+
+    def test_matches_recursive_definition(self):
+        rng, parents = self.random_parents()
+        kinship = Kinship(parents)
+        for a, b in [(rng.randrange(60), rng.randrange(60)) for _ in range(200)]:
+            self.assertAlmostEqual(
+                kinship.kinship(a, b), naive_kinship(parents, a, b), places=12
+            )
+
+    def test_inbreeding_is_kinship_of_parents(self):
+        _, parents = self.random_parents()
+        kinship = Kinship(parents)
+        for pk in reversed(range(60)):
+            self.assertAlmostEqual(
+                kinship.inbreeding(pk), naive_kinship(parents, *parents[pk]), places=12
+            )
+
+    def test_stored_inbreeding_reused(self):
+        parents = {"dam": (None, None), "sire": (None, None), "pup": ("dam", "sire")}
+        kinship = Kinship(parents, {"pup": 0.5})
+        self.assertEqual(kinship.inbreeding("pup"), 0.5)
+        self.assertEqual(kinship.inbreeding("dam"), 0)
+
+
+class InbreedingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.strain = StrainFactory()
+        cls.dam = MouseFactory(strain=cls.strain, sex="F")
+        cls.sire = MouseFactory(strain=cls.strain, sex="M")
+        cls.sister = MouseFactory(
+            strain=cls.strain, sex="F", mother=cls.dam, father=cls.sire
+        )
+        cls.brother = MouseFactory(
+            strain=cls.strain, sex="M", mother=cls.dam, father=cls.sire
+        )
+
+    def test_founders_not_inbred(self):
+        self.assertEqual(coefficient(self.dam), 0)
+
+    def test_new_litter_of_siblings(self):
+        pup = MouseFactory(
+            strain=self.strain, sex="F", mother=self.sister, father=self.brother
+        )
+        self.assertEqual(coefficient(pup), 0.25)
+
+    def test_kinship_of_pair(self):
+        self.assertEqual(self.sister.kinship(self.brother), 0.25)
+        self.assertEqual(self.dam.kinship(self.sire), 0)
+
+    def test_reparenting_updates_descendants(self):
+        pup = MouseFactory(strain=self.strain, mother=self.sister, father=self.sire)
+        self.assertEqual(coefficient(pup), 0.25)
+        self.sister.father = None
+        self.sister.save()
+        self.assertEqual(coefficient(self.sister), 0)
+        self.assertEqual(coefficient(pup), 0)
+
+    def test_import_stores_coefficients(self):
+        MouseImporter().run(
+            [
+                {
+                    "strain": self.strain.pk,
+                    "sex": "M",
+                    "dob": "2020-01-01",
+                    "mother": self.sister.pk,
+                    "father": self.brother.pk,
+                }
+            ]
+        )
+        pup = Mouse.objects.get(mother=self.sister)
+        self.assertEqual(coefficient(pup), 0.25)
+
+    def test_update_queries_independent_of_strain_size(self):
+        with self.assertNumQueries(2):
+            get_inbreeding().update(Mouse.objects.filter(strain=self.strain))
+
+    def test_update_reads_ancestors_outside_the_set(self):
+        pup = MouseFactory(
+            strain=self.strain, sex="F", mother=self.sister, father=self.brother
+        )
+        MouseInbreeding.objects.filter(mouse=pup).delete()
+        with self.assertNumQueries(3):
+            get_inbreeding().update(Mouse.objects.filter(pk=pup.pk))
+        self.assertEqual(coefficient(pup), 0.25)
+
+    def test_migration_backfill_matches_update(self):
+        migration = import_module("mice_repository.migrations.0005_mouseinbreeding")
+        MouseFactory(strain=self.strain, mother=self.sister, father=self.brother)
+        coefficients = dict(MouseInbreeding.objects.values_list("mouse", "coefficient"))
+        MouseInbreeding.objects.all().delete()
+        migration.compute_inbreeding(apps, None)
+        self.assertEqual(
+            dict(MouseInbreeding.objects.values_list("mouse", "coefficient")),
+            coefficients,
+        )
+
+    def test_command(self):
+        MouseInbreeding.objects.all().delete()
+        out = io.StringIO()
+        call_command("updateinbreeding", strain=self.strain.pk, stdout=out)
+        self.assertIn("Updated inbreeding of 4 mice", out.getvalue())
+        self.assertEqual(MouseInbreeding.objects.count(), 4)
+
+    def test_command_covers_every_strain(self):
+        MouseFactory(strain=StrainFactory())
+        MouseInbreeding.objects.all().delete()
+        out = io.StringIO()
+        call_command("updateinbreeding", stdout=out)
+        self.assertIn("Updated inbreeding of 5 mice", out.getvalue())
+        self.assertEqual(MouseInbreeding.objects.count(), 5)
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command(
+            "benchmarkinbreeding", mice=40, generations=4, repeat=1, stdout=out
+        )
+        self.assertIn("Generated 40 mice over 4 generations", out.getvalue())
+        self.assertFalse(Mouse.objects.filter(strain="bench").exists())
@@ -23,11 +23,19 @@ class MouseModelUnitTest(TestCase):
     def test_correct_strain(self):
         self.assertEqual(self.mouse.strain.strain_name, "teststrain")
 
-    def test_clean_correct_pk(self):
+    def test_save_correct_pk(self):
         self.assertEqual(self.mouse.pk, "")
         self.mouse.clean()
+        self.mouse.save()
         self.assertEqual(self.mouse.pk, "teststrain-1")
 
+    def test_clean_does_not_reserve_tube(self):
+        self.mouse.clean()
+        self.mouse.clean()
+        self.assertIsNone(self.mouse.tube)
+        self.mouse.save()
+        self.assertEqual(self.mouse.tube, 1)
+
     def test_manual_tube_correct_value(self):
         self.manual_tube_mouse = MouseFactory(strain=self.strain, tube=123)
         self.assertEqual(self.manual_tube_mouse.tube, 123)
@@ -121,6 +129,146 @@ class MouseModelManagerAgeRangeTest(TestCase):
         self.assertEqual(Mouse.objects.over_24_months_old().count(), 1)
 
 
+class MouseModelManagerAgeBucketBoundaryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for days in [59, 60, 179, 180, 729, 730]:
+            MouseFactory(dob=date.today() - timedelta(days=days))
+
+    def test_every_age_in_one_bucket(self):
+        self.assertEqual(Mouse.objects.weaned_lt_2_months_old().count(), 1)
+        self.assertEqual(Mouse.objects.between_2_6_months_old().count(), 2)
+        self.assertEqual(Mouse.objects.between_6_12_months_old().count(), 1)
+        self.assertEqual(Mouse.objects.between_12_24_months_old().count(), 1)
+        self.assertEqual(Mouse.objects.over_24_months_old().count(), 1)
+
+
+class MouseModelAgeAnnotationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mice = [
+            MouseFactory(dob=date.today() - timedelta(days=days))
+            for days in [400, 10, 800, 59, 60]
+        ]
+
+    def test_age_in_days_matches_property(self):
+        for mouse in Mouse.objects.with_age():
+            self.assertEqual(mouse.age_in_days, mouse.age_days)
+
+    def test_age_bucket_labels(self):
+        buckets = dict(Mouse.objects.with_age().values_list("pk", "age_bucket"))
+        self.assertEqual(
+            [buckets[mouse.pk] for mouse in self.mice],
+            ["12-24 months", "0-2 months", "24+ months", "0-2 months", "2-6 months"],
+        )
+
+    def test_age_bucket_matches_queryset_methods(self):
+        for mouse in Mouse.objects.with_age():
+            self.assertTrue(
+                Mouse.objects.in_age_bucket(mouse.age_bucket).filter(pk=mouse.pk)
+            )
+
+    def test_order_by_age(self):
+        ages = list(
+            Mouse.objects.with_age()
+            .order_by("age_in_days")
+            .values_list("age_in_days", flat=True)
+        )
+        self.assertEqual(ages, [10, 59, 60, 400, 800])
+
+    def test_age_bucket_counts_single_query(self):
+        with self.assertNumQueries(1):
+            counts = {
+                row["age_bucket"]: row["count"]
+                for row in Mouse.objects.age_bucket_counts()
+            }
+        self.assertEqual(
+            counts,
+            {"0-2 months": 2, "2-6 months": 1, "12-24 months": 1, "24+ months": 1},
+        )
+
+    def test_on_date(self):
+        mouse = Mouse.objects.with_age(date.today() + timedelta(days=5)).get(
+            pk=self.mice[1].pk
+        )
+        self.assertEqual(mouse.age_in_days, 15)
+
+    def test_with_age_twice(self):
+        self.assertEqual(Mouse.objects.with_age().with_age().count(), 5)
+
+
+class MouseModelAsOfTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.day = date(2023, 6, 1)
+        cls.alive = MouseFactory(dob=date(2023, 1, 1))
+        cls.culled_later = MouseFactory(
+            dob=date(2023, 5, 1), culled_date=date(2023, 9, 1)
+        )
+        cls.culled_before = MouseFactory(
+            dob=date(2022, 1, 1), culled_date=date(2023, 2, 1)
+        )
+        cls.culled_that_day = MouseFactory(dob=date(2022, 1, 1), culled_date=cls.day)
+        cls.born_later = MouseFactory(dob=date(2023, 7, 1))
+
+    def test_alive_on_date(self):
+        self.assertQuerysetEqual(
+            Mouse.objects.as_of(self.day),
+            [self.alive, self.culled_later],
+            ordered=False,
+        )
+
+    def test_alive_keeps_mice_culled_later(self):
+        self.assertIn(self.culled_later, Mouse.objects.as_of(self.day).alive())
+
+    def test_age_buckets_relative_to_date(self):
+        mice = Mouse.objects.as_of(self.day)
+        self.assertEqual(list(mice.weaned_lt_2_months_old()), [self.culled_later])
+        self.assertEqual(list(mice.between_2_6_months_old()), [self.alive])
+
+    def test_in_age_bucket_on_date(self):
+        self.assertEqual(
+            list(Mouse.objects.in_age_bucket("0-2 months", self.day)),
+            [self.culled_later],
+        )
+
+    def test_with_age_relative_to_date(self):
+        mouse = Mouse.objects.as_of(self.day).with_age().get(pk=self.alive.pk)
+        self.assertEqual(mouse.age_in_days, 151)
+        self.assertEqual(mouse.age_bucket, "2-6 months")
+
+    def test_as_of_recomputes_existing_age(self):
+        mouse = Mouse.objects.with_age().as_of(self.day).get(pk=self.alive.pk)
+        self.assertEqual(mouse.age_in_days, 151)
+
+    def test_age_bucket_counts_on_date(self):
+        counts = {
+            row["age_bucket"]: row["count"]
+            for row in Mouse.objects.as_of(self.day).age_bucket_counts()
+        }
+        self.assertEqual(counts, {"0-2 months": 1, "2-6 months": 1})
+
+
+class MouseModelManagerListingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother, cls.father = MouseFactory(sex="F"), MouseFactory(sex="M")
+        MouseFactory(mother=cls.mother, father=cls.father)
+
+    def test_repository_listing_fetches_parents_in_one_query(self):
+        with self.assertNumQueries(1):
+            rows = list(Mouse.objects.repository_listing())
+            [(str(m.strain), str(m.mother), str(m.father), m.cage) for m in rows]
+
+    def test_project_listing_fetches_only_project_columns(self):
+        mouse = Mouse.objects.project_listing().first()
+        self.assertIn("coat", mouse.get_deferred_fields())
+        self.assertNotIn("dob", mouse.get_deferred_fields())
+
+    def test_listing_is_chainable_with_manager_methods(self):
+        self.assertEqual(Mouse.objects.repository_listing().alive().count(), 3)
+
+
 # Mice should stop ageing when they are culled. Currently DOB will keep incrementing each day.
 
 
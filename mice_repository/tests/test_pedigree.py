@@ -0,0 +1,171 @@
+import io
+from importlib import import_module
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from main.model_factories import MouseFactory, StrainFactory
+from mice_repository.importer import MouseImporter
+from mice_repository.models import Mouse, MouseAncestor
+from mice_repository.pedigree import PedigreeCycleError, get_closure
+
+
+def closure_rows():
+    return set(
+        MouseAncestor.objects.values_list("ancestor", "descendant", "depth", "line")
+    )
+
+
+class PedigreeTestCase(TestCase):
+    def setUp(self):
+        self.strain = StrainFactory()
+        self.grandmother = self.mouse("F")
+        self.grandfather = self.mouse("M")
+        self.mother = self.mouse("F", self.grandmother, self.grandfather)
+        self.father = self.mouse("M")
+        self.pup = self.mouse("M", self.mother, self.father)
+
+    def mouse(self, sex, mother=None, father=None):
+        return MouseFactory(strain=self.strain, sex=sex, mother=mother, father=father)
+
+
+class MouseAncestorMaintenanceTest(PedigreeTestCase):
+    def test_rows_created_with_mouse(self):
+        self.assertEqual(
+            set(self.pup.ancestor_links.values_list("ancestor", "depth", "line")),
+            {
+                (self.mother.pk, 1, "M"),
+                (self.father.pk, 1, "P"),
+                (self.grandmother.pk, 2, "M"),
+                (self.grandfather.pk, 2, "M"),
+            },
+        )
+
+    def test_ancestors_and_descendants(self):
+        self.assertQuerysetEqual(
+            self.pup.ancestors(),
+            [self.mother, self.father, self.grandmother, self.grandfather],
+            ordered=False,
+        )
+        self.assertQuerysetEqual(
+            self.grandmother.descendants(), [self.mother, self.pup], ordered=False
+        )
+
+    def test_inbred_ancestor_at_several_depths(self):
+        daughter = self.mouse("F", self.mother, self.father)
+        inbred = self.mouse("M", daughter, self.father)
+        self.assertEqual(
+            set(
+                inbred.ancestor_links.filter(ancestor=self.father).values_list(
+                    "depth", "line"
+                )
+            ),
+            {(1, "P"), (2, "M")},
+        )
+
+    def test_shortest_depth_kept_on_each_line(self):
+        daughter = self.mouse("F", self.mother, self.father)
+        inbred_mother = self.mouse("F", daughter, self.father)
+        pup = self.mouse("M", inbred_mother, self.mouse("M"))
+        self.assertEqual(
+            list(
+                pup.ancestor_links.filter(ancestor=self.father).values_list(
+                    "depth", "line"
+                )
+            ),
+            [(2, "M")],
+        )
+
+    def test_reparenting_updates_descendants(self):
+        new_grandmother = self.mouse("F")
+        self.mother.mother = new_grandmother
+        self.mother.save()
+        self.assertIn(new_grandmother, self.pup.ancestors())
+        self.assertNotIn(self.grandmother, self.pup.ancestors())
+        self.assertIn(self.grandfather, self.pup.ancestors())
+
+    def test_removing_parent(self):
+        self.mother.mother = None
+        self.mother.save()
+        self.assertNotIn(self.grandmother, self.pup.ancestors())
+
+    def test_saving_unchanged_parents_skips_closure(self):
+        mouse = Mouse.objects.get(pk=self.pup.pk)
+        mouse.coat = "Black"
+        with self.assertNumQueries(3):
+            mouse.save()
+
+    def test_saving_deferred_parents_skips_closure(self):
+        mouse = Mouse.objects.only("_global_id", "coat").get(pk=self.pup.pk)
+        mouse.coat = "Black"
+        mouse.save()
+        self.assertEqual(self.pup.ancestors().count(), 4)
+
+    def test_cycle_rejected_on_save(self):
+        self.grandmother.mother = self.pup
+        with self.assertRaises(PedigreeCycleError):
+            self.grandmother.save()
+        self.assertIsNone(Mouse.objects.get(pk=self.grandmother.pk).mother)
+
+    def test_cycle_rejected_by_clean(self):
+        self.grandfather.father = self.pup
+        with self.assertRaises(ValidationError):
+            self.grandfather.clean()
+
+    def test_own_parent_rejected(self):
+        self.father.father = self.father
+        with self.assertRaises(ValidationError):
+            self.father.clean()
+
+    def test_cascade_on_delete(self):
+        self.pup.delete()
+        self.assertFalse(MouseAncestor.objects.filter(descendant=self.pup.pk))
+
+
+class PedigreeRebuildTest(PedigreeTestCase):
+    def test_full_rebuild_matches_incremental(self):
+        rows = closure_rows()
+        MouseAncestor.objects.all().delete()
+        self.assertEqual(get_closure().rebuild(), [])
+        self.assertEqual(closure_rows(), rows)
+
+    def test_cyclic_mice_reported(self):
+        Mouse.objects.filter(pk=self.grandmother.pk).update(mother=self.mother)
+        cyclic = get_closure().rebuild()
+        self.assertEqual(
+            cyclic, sorted([self.grandmother.pk, self.mother.pk, self.pup.pk])
+        )
+        self.assertEqual(self.father.ancestor_links.count(), 0)
+
+    def test_migration_backfill_matches_incremental(self):
+        migration = import_module("mice_repository.migrations.0004_mouseancestor")
+        rows = closure_rows()
+        MouseAncestor.objects.all().delete()
+        migration.build_closure(apps, SimpleNamespace(connection=connection))
+        self.assertEqual(closure_rows(), rows)
+
+    def test_command(self):
+        MouseAncestor.objects.all().delete()
+        out = io.StringIO()
+        call_command("rebuildpedigree", stdout=out)
+        self.assertIn("Rebuilt pedigree with 6 ancestor rows", out.getvalue())
+
+    def test_import_builds_closure(self):
+        row = {"strain": self.strain.pk, "dob": "2020-01-01"}
+        MouseImporter(chunk_size=10).run(
+            [
+                row | {"tube": 50, "sex": "F", "mother": self.mother.pk},
+                row
+                | {
+                    "sex": "M",
+                    "mother": f"{self.strain.pk}-50",
+                    "father": self.father.pk,
+                },
+            ]
+        )
+        pup = Mouse.objects.get(mother=f"{self.strain.pk}-50")
+        self.assertEqual(pup.ancestors().count(), 5)
@@ -0,0 +1,163 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from main.model_factories import (
+    MouseFactory,
+    ProjectFactory,
+    StrainFactory,
+    UserFactory,
+)
+from mice_repository.models import FilterPreset
+
+
+def setUpModule():
+    global test_user, test_client
+    test_user = UserFactory(username="testuser")
+    test_client = Client()
+    test_client.force_login(test_user)
+
+
+def tearDownModule():
+    global test_user
+    test_user.delete()
+
+
+class FilterPresetModelTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project, cls.other_project = ProjectFactory(), ProjectFactory()
+        cls.strain = StrainFactory()
+        cls.females = MouseFactory.create_batch(
+            3, strain=cls.strain, sex="F", project=cls.project
+        )
+        cls.male = MouseFactory(strain=cls.strain, sex="M", project=cls.project)
+        cls.other_female = MouseFactory(sex="F", project=cls.other_project)
+        cls.preset = FilterPreset.objects.create(
+            name="females", owner=test_user, project=cls.project, params="search=&sex=F"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_matching_pks(self):
+        self.assertEqual(
+            self.preset.mice_pks(), sorted(mouse.pk for mouse in self.females)
+        )
+
+    def test_reopening_is_cached(self):
+        self.preset.mice_pks()
+        with self.assertNumQueries(0):
+            self.preset.mice_pks()
+
+    def test_change_in_scope_invalidates(self):
+        self.preset.mice_pks()
+        self.male.sex = "F"
+        self.male.save()
+        self.assertIn(self.male.pk, self.preset.mice_pks())
+
+    def test_mouse_leaving_scope_invalidates(self):
+        self.preset.mice_pks()
+        self.females[0].project = self.other_project
+        self.females[0].save()
+        self.assertNotIn(self.females[0].pk, self.preset.mice_pks())
+
+    def test_mouse_joining_scope_invalidates(self):
+        self.preset.mice_pks()
+        self.other_female.project = self.project
+        self.other_female.save()
+        self.assertIn(self.other_female.pk, self.preset.mice_pks())
+
+    def test_change_outside_scope_keeps_cache(self):
+        self.preset.mice_pks()
+        self.other_female.save()
+        with self.assertNumQueries(0):
+            self.preset.mice_pks()
+
+    def test_repository_preset_sees_every_mouse(self):
+        preset = FilterPreset.objects.create(
+            name="all females", owner=test_user, params="search=&sex=F"
+        )
+        self.assertEqual(len(preset.mice_pks()), 4)
+        MouseFactory(sex="F")
+        self.assertEqual(len(preset.mice_pks()), 5)
+
+    def test_visible_to(self):
+        other_user = UserFactory()
+        shared = FilterPreset.objects.create(
+            name="shared", owner=other_user, shared=True
+        )
+        FilterPreset.objects.create(name="private", owner=other_user)
+        self.assertQuerysetEqual(
+            FilterPreset.objects.visible_to(test_user),
+            [self.preset, shared],
+            ordered=False,
+        )
+
+
+class FilterPresetViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = ProjectFactory()
+        cls.females = MouseFactory.create_batch(3, sex="F", project=cls.project)
+        MouseFactory(sex="M", project=cls.project)
+
+    def setUp(self):
+        cache.clear()
+
+    def save_preset(self, **data):
+        return test_client.post(
+            reverse("mice_repository:save_filter_preset"),
+            {
+                "name": "females",
+                "params": "csrfmiddlewaretoken=abc&search=&sex=F",
+                "project": self.project.pk,
+                **data,
+            },
+        )
+
+    def test_save_preset(self):
+        response = self.save_preset()
+        preset = FilterPreset.objects.get()
+        self.assertRedirects(
+            response, reverse("mice_repository:show_filter_preset", args=[preset.pk])
+        )
+        self.assertEqual(preset.owner, test_user)
+        self.assertEqual(preset.params, "search=&sex=F")
+
+    def test_saving_same_name_replaces_preset(self):
+        self.save_preset()
+        self.save_preset(params="search=&sex=M")
+        self.assertEqual(FilterPreset.objects.get().params, "search=&sex=M")
+
+    def test_show_preset(self):
+        self.save_preset()
+        preset = FilterPreset.objects.get()
+        response = test_client.get(
+            reverse("mice_repository:show_filter_preset", args=[preset.pk])
+        )
+        self.assertEqual(response.context["preset_mice"].paginator.count, 3)
+        for mouse in self.females:
+            self.assertContains(response, mouse.pk)
+
+    def test_other_users_private_preset_not_found(self):
+        preset = FilterPreset.objects.create(name="private", owner=UserFactory())
+        response = test_client.get(
+            reverse("mice_repository:show_filter_preset", args=[preset.pk])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_only_owner_deletes(self):
+        preset = FilterPreset.objects.create(
+            name="shared", owner=UserFactory(), shared=True
+        )
+        response = test_client.post(
+            reverse("mice_repository:delete_filter_preset", args=[preset.pk])
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(FilterPreset.objects.filter(pk=preset.pk).exists())
+
+    def test_list_presets(self):
+        self.save_preset()
+        response = test_client.get(reverse("mice_repository:filter_presets"))
+        self.assertContains(response, "females")
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.http import QueryDict
+from django.test import TestCase
+from django.utils import timezone
+
+from main.model_factories import MouseFactory, ProjectFactory, StrainFactory
+from mice_repository.models import Mouse, MouseSelection
+
+
+class MouseSelectionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = ProjectFactory()
+        cls.strain = StrainFactory()
+        cls.mice = [
+            MouseFactory(strain=cls.strain, tube=tube, sex="M", project=cls.project)
+            for tube in range(1, 31)
+        ]
+        cls.female = MouseFactory(strain=cls.strain, sex="F", project=cls.project)
+        cls.other_mouse = MouseFactory()
+
+    def test_listed_mice_stored_as_sorted_ids(self):
+        selected = [self.other_mouse.pk, self.mice[2].pk, self.mice[0].pk]
+        selection = MouseSelection.from_mice(Mouse.objects.filter(pk__in=selected))
+        self.assertEqual(selection.mouse_ids, sorted(selected))
+        self.assertQuerysetEqual(
+            selection.mice(), Mouse.objects.filter(pk__in=selected), ordered=False
+        )
+
+    # A mouse's tube can be edited without changing its ID, so two mice can share a tube number
+    def test_mice_sharing_a_tube(self):
+        Mouse.objects.filter(pk=self.mice[4].pk).update(tube=self.mice[5].tube)
+        selection = MouseSelection.from_mice(Mouse.objects.filter(pk=self.mice[5].pk))
+        self.assertQuerysetEqual(selection.mice(), [self.mice[5]])
+
+    def test_mouse_without_tube(self):
+        Mouse.objects.filter(pk=self.mice[0].pk).update(tube=None)
+        selection = MouseSelection.from_mice(Mouse.objects.filter(pk=self.mice[0].pk))
+        self.assertQuerysetEqual(selection.mice(), [self.mice[0]])
+
+    def test_empty_selection(self):
+        selection = MouseSelection.from_mice(Mouse.objects.none())
+        self.assertFalse(selection.mice().exists())
+
+    def test_all_matching_filter(self):
+        selection = MouseSelection.from_filter(self.project, QueryDict("search=&sex=M"))
+        self.assertQuerysetEqual(selection.mice(), self.mice, ordered=False)
+        self.assertEqual(selection.mouse_ids, [])
+
+    def test_all_matching_without_search(self):
+        selection = MouseSelection.from_filter(self.project, QueryDict("sex=M"))
+        self.assertEqual(selection.mice().count(), 31)
+
+    def test_filter_applied_when_used(self):
+        selection = MouseSelection.from_filter(self.project, QueryDict("search=&sex=F"))
+        new_female = MouseFactory(strain=self.strain, sex="F", project=self.project)
+        self.assertQuerysetEqual(
+            selection.mice(), [self.female, new_female], ordered=False
+        )
+
+    def test_invalid_filter_selects_nothing(self):
+        selection = MouseSelection.from_filter(self.project, QueryDict("search=&sex=X"))
+        self.assertFalse(selection.mice().exists())
+
+    def test_filter_is_valid(self):
+        self.assertTrue(
+            MouseSelection.filter_is_valid(self.project, QueryDict("sex=X"))
+        )
+        self.assertFalse(
+            MouseSelection.filter_is_valid(self.project, QueryDict("search=&sex=X"))
+        )
+
+    def test_expired_selections_deleted(self):
+        old = MouseSelection.from_mice(Mouse.objects.none())
+        MouseSelection.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+        recent = MouseSelection.from_mice(Mouse.objects.none())
+        self.assertQuerysetEqual(MouseSelection.objects.all(), [recent])
@@ -0,0 +1,130 @@
+import io
+from datetime import date, timedelta
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from main.model_factories import MouseFactory, ProjectFactory, UserFactory
+from mice_repository.models import ColonySnapshot
+from mice_repository.snapshots import take_snapshot
+from strain.models import Strain
+
+
+class ColonySnapshotTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.strain = Strain.objects.create(strain_name="snapshot")
+        cls.empty_strain = Strain.objects.create(strain_name="empty")
+        cls.project = ProjectFactory()
+        today = date.today()
+        MouseFactory(strain=cls.strain, sex="M", dob=today - timedelta(days=10))
+        MouseFactory(
+            strain=cls.strain,
+            sex="F",
+            dob=today - timedelta(days=100),
+            project=cls.project,
+        )
+        MouseFactory(
+            strain=cls.strain,
+            sex="F",
+            dob=today - timedelta(days=1000),
+            project=cls.project,
+        )
+        MouseFactory(
+            strain=cls.strain,
+            sex="F",
+            dob=today - timedelta(days=10),
+            culled_date=today,
+        )
+
+    def snapshot(self, strain):
+        return ColonySnapshot.objects.get(date=date.today(), strain=strain)
+
+    def test_counts_by_sex_and_age_bucket(self):
+        take_snapshot()
+        snapshot = self.snapshot(self.strain)
+        self.assertEqual(snapshot.male_lt_2_months, 1)
+        self.assertEqual(snapshot.female_lt_2_months, 0)
+        self.assertEqual(snapshot.female_2_6_months, 1)
+        self.assertEqual(snapshot.female_over_24_months, 1)
+        self.assertEqual(snapshot.total, 3)
+
+    def test_project_counts(self):
+        take_snapshot()
+        self.assertEqual(
+            self.snapshot(self.strain).projects, {self.project.project_name: 2}
+        )
+
+    def test_strain_without_mice(self):
+        take_snapshot()
+        self.assertEqual(self.snapshot(self.empty_strain).total, 0)
+
+    def test_rerun_replaces_day(self):
+        take_snapshot()
+        MouseFactory(strain=self.strain, sex="M", dob=date.today())
+        take_snapshot()
+        self.assertEqual(self.snapshot(self.strain).male_lt_2_months, 2)
+        self.assertEqual(ColonySnapshot.objects.count(), 2)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("snapshotcolony", stdout=out)
+        self.assertIn("Recorded snapshots of 2 strains", out.getvalue())
+
+
+class ColonyHistoryTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.strains = [
+            Strain.objects.create(strain_name=name) for name in ["first", "second"]
+        ]
+        cls.start = date(2024, 1, 1)
+        ColonySnapshot.objects.bulk_create(
+            ColonySnapshot(
+                date=cls.start + timedelta(days=day),
+                strain=strain,
+                male_2_6_months=day,
+                female_6_12_months=1,
+            )
+            for day in range(366)
+            for strain in cls.strains
+        )
+        cls.user = UserFactory()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_year_of_history_in_one_query(self):
+        end = self.start + timedelta(days=365)
+        with self.assertNumQueries(1):
+            snapshots = list(ColonySnapshot.objects.between(self.start, end))
+        self.assertEqual(len(snapshots), 732)
+        self.assertEqual(snapshots[0].date, self.start)
+
+    def test_daily_totals(self):
+        totals = list(
+            ColonySnapshot.objects.daily_totals(
+                self.start, self.start + timedelta(days=9)
+            )
+        )
+        self.assertEqual(len(totals), 10)
+        self.assertEqual(totals[3]["male_2_6_months"], 6)
+        self.assertEqual(totals[3]["female_6_12_months"], 2)
+
+    def test_view_for_strain(self):
+        response = self.client.get(
+            reverse("mice_repository:colony_history"),
+            {"strain": "first", "start": "2024-01-01", "end": "2024-01-31"},
+        )
+        snapshots = response.json()["snapshots"]
+        self.assertEqual(len(snapshots), 31)
+        self.assertEqual(snapshots[1]["male_2_6_months"], 1)
+
+    def test_view_rejects_bad_dates(self):
+        response = self.client.get(
+            reverse("mice_repository:colony_history"), {"start": "last year"}
+        )
+        self.assertEqual(response.status_code, 400)
@@ -1,10 +1,20 @@
-from datetime import date
+from datetime import date, timedelta
+from unittest.mock import patch
 
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from main.form_factories import RepositoryMiceFormFactory
-from main.model_factories import MouseCommentFactory, MouseFactory, UserFactory
+from main.model_factories import (
+    MouseCommentFactory,
+    MouseFactory,
+    StockCageFactory,
+    StrainFactory,
+    UserFactory,
+)
 from mice_repository.forms import MouseCommentForm, RepositoryMiceForm
 from mice_repository.models import Mouse
 
@@ -42,6 +52,75 @@ class MiceRepositoryViewGetTest(TestCase):
     def test_context_contains_mouse(self):
         self.assertIn(self.mouse, self.response.context["repository_mice_qs"])
 
+    def test_context_contains_query_params(self):
+        self.assertIn("query_params", self.response.context)
+
+
+class MiceRepositoryViewPaginationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.mice = MouseFactory.create_batch(3)
+
+    def setUp(self):
+        self.url = reverse("mice_repository:mice_repository")
+
+    def test_page_size(self):
+        with patch("mice_repository.views.REPOSITORY_PAGE_SIZE", 2):
+            response = test_client.get(self.url)
+        self.assertEqual(len(response.context["repository_mice_qs"]), 2)
+        self.assertTrue(response.context["repository_mice_qs"].has_next())
+
+    def test_next_page(self):
+        with patch("mice_repository.views.REPOSITORY_PAGE_SIZE", 2):
+            first = test_client.get(self.url).context["repository_mice_qs"]
+            response = test_client.get(self.url, {"after": first.next_cursor})
+        self.assertEqual(
+            list(response.context["repository_mice_qs"]),
+            list(Mouse.objects.order_by("_global_id")[2:]),
+        )
+
+
+class MiceRepositoryViewAgeOrderingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.mice = [
+            MouseFactory(dob=date.today() - timedelta(days=days))
+            for days in [30, 10, 20]
+        ]
+
+    def test_pages_sorted_by_age(self):
+        url = reverse("mice_repository:mice_repository")
+        params = {"search": "", "ordering": "-age"}
+        with patch("mice_repository.views.REPOSITORY_PAGE_SIZE", 2):
+            first = test_client.get(url, params).context["repository_mice_qs"]
+            second = test_client.get(
+                url, params | {"after": first.next_cursor}
+            ).context["repository_mice_qs"]
+        self.assertEqual(
+            list(first) + list(second), [self.mice[0], self.mice[2], self.mice[1]]
+        )
+
+
+class MiceRepositoryViewQueryCountTest(TestCase):
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            test_client.get(reverse("mice_repository:mice_repository"))
+        return len(queries)
+
+    def create_family(self):
+        mother, father = MouseFactory(sex="F"), MouseFactory(sex="M")
+        MouseFactory(mother=mother, father=father, cage=StockCageFactory())
+
+    def test_query_count_independent_of_row_count(self):
+        self.create_family()
+        small_page_queries = self.count_queries()
+        for _ in range(5):
+            self.create_family()
+        self.assertEqual(self.count_queries(), small_page_queries)
+
 
 class AddMouseToRepositoryViewGetTest(TestCase):
 
@@ -184,3 +263,86 @@ class MouseCommentPostTest(TestCase):
 
     def test_correct_text(self):
         self.assertEqual(self.comment.comment_text, "New test comment")
+
+
+class ImportMiceViewTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.strain = StrainFactory()
+        file = SimpleUploadedFile(
+            "mice.csv",
+            f"strain,sex,dob\n{cls.strain.strain_name},F,2020-01-01\nmissing,F,2020-01-01\n".encode(),
+        )
+        cls.response = test_client.post(
+            reverse("mice_repository:import_mice"), {"file": file}
+        )
+
+    def test_code_200(self):
+        self.assertEqual(self.response.status_code, 200)
+
+    def test_template_used(self):
+        self.assertTemplateUsed(self.response, "import_mice.html")
+
+    def test_valid_row_imported(self):
+        self.assertEqual(self.strain.mice.count(), 1)
+
+    def test_invalid_row_reported(self):
+        errors = self.response.context["result"].errors
+        self.assertEqual([error.row_number for error in errors], [3])
+
+    def test_wrong_extension_rejected(self):
+        response = test_client.post(
+            reverse("mice_repository:import_mice"),
+            {"file": SimpleUploadedFile("mice.txt", b"strain")},
+        )
+        self.assertFalse(response.context["form"].is_valid())
+
+    def test_unreadable_files_reported(self):
+        for name, content in [
+            ("mice.csv", b"strain,sex,dob\n\xff\xfe,M,2020-01-01\n"),
+            ("mice.xlsx", b"not a zip file"),
+        ]:
+            response = test_client.post(
+                reverse("mice_repository:import_mice"),
+                {"file": SimpleUploadedFile(name, content)},
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(
+                "Could not read the file", response.context["form"].errors["file"][0]
+            )
+
+
+class ExportMiceViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.female = MouseFactory(sex="F")
+        cls.male = MouseFactory(sex="M")
+
+    def get(self, params):
+        response = test_client.get(reverse("mice_repository:export_mice"), params)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_exports_all_mice(self):
+        response, content = self.get({"format": "csv"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.female.pk, content)
+        self.assertIn(self.male.pk, content)
+
+    def test_uses_filter_parameters(self):
+        _, content = self.get({"search": "", "sex": "F", "format": "json"})
+        self.assertIn(self.female.pk, content)
+        self.assertNotIn(self.male.pk, content)
+
+
+class ExportPedigreeViewTest(TestCase):
+
+    def test_exports_graphml(self):
+        mouse = MouseFactory(mother=MouseFactory(sex="F"))
+        response = test_client.get(reverse("mice_repository:export_pedigree"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/graphml+xml")
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn(f'target="{mouse.pk}"', content)
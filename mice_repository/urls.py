@@ -14,6 +14,22 @@ urlpatterns = [
         views.add_mouse_to_repository,
         name="add_mouse_to_repository",
     ),
+    path("import_mice", views.import_mice, name="import_mice"),
+    path("export_mice", views.export_mice, name="export_mice"),
+    path("export_pedigree", views.export_pedigree, name="export_pedigree"),
+    path("colony_history", views.colony_history, name="colony_history"),
+    path("filter_presets", views.filter_presets, name="filter_presets"),
+    path("save_filter_preset", views.save_filter_preset, name="save_filter_preset"),
+    path(
+        "show_filter_preset/<int:preset_id>",
+        views.show_filter_preset,
+        name="show_filter_preset",
+    ),
+    path(
+        "delete_filter_preset/<int:preset_id>",
+        views.delete_filter_preset,
+        name="delete_filter_preset",
+    ),
     path(
         "edit_mouse_in_repository/<str:pk>",
         views.edit_mouse_in_repository,
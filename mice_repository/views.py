@@ -1,28 +1,87 @@
+from datetime import date, timedelta
+
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
-from django.shortcuts import redirect, render
+from django.core.paginator import Paginator
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
 from django.template import loader
 from django.template.response import TemplateResponse
+from django.views.decorators.http import require_POST
 
+from main.exports import export_response, pedigree_response
 from main.filters import MouseFilter
-from mice_repository.forms import MouseCommentForm, RepositoryMiceForm
-from mice_repository.models import Mouse, MouseComment
+from main.view_utils import get_query_params, keyset_paginate_queryset
+from mice_repository.forms import (
+    FilterPresetForm,
+    MouseCommentForm,
+    MouseImportForm,
+    RepositoryMiceForm,
+)
+from mice_repository.importer import (
+    IMPORT_COLUMNS,
+    ImportReadError,
+    MouseImporter,
+    read_rows,
+)
+from mice_repository.models import ColonySnapshot, FilterPreset, Mouse, MouseComment
+
+REPOSITORY_PAGE_SIZE = 100
 
 
 @login_required
 def mice_repository(request):
     template = loader.get_template("mice_repository.html")
-    repository_mice_qs = MouseFilter.get_filtered_mice(
-        Mouse.objects.all().order_by("_global_id"),
-        request,
-    )
+    mice_qs = Mouse.objects.repository_listing().order_by("_global_id")
+    repository_mice_qs = MouseFilter.get_filtered_mice(mice_qs, request)
     context = {
-        "repository_mice_qs": repository_mice_qs,
-        "filter_form": MouseFilter.get_filter_form(repository_mice_qs, request),
+        "repository_mice_qs": keyset_paginate_queryset(
+            repository_mice_qs, request, REPOSITORY_PAGE_SIZE
+        ),
+        "filter_form": MouseFilter.get_filter_form(mice_qs, request, facets=True),
+        "query_params": get_query_params(request),
+        "preset_form": FilterPresetForm(
+            initial={"params": get_query_params(request).urlencode()}
+        ),
     }
     return HttpResponse(template.render(context, request))
 
 
+@login_required
+def export_mice(request):
+    mice_qs = MouseFilter.get_filtered_mice(
+        Mouse.objects.order_by("_global_id"), request
+    )
+    return export_response(mice_qs, request.GET.get("format"), "mice")
+
+
+@login_required
+def export_pedigree(request):
+    return pedigree_response(
+        Mouse.objects.order_by("_global_id"), request.GET.get("format"), "pedigree"
+    )
+
+
+# Daily snapshots between start and end, a year back by default. Without a strain the days are totalled
+# across strains
+@login_required
+def colony_history(request):
+    try:
+        end = date.fromisoformat(request.GET.get("end") or date.today().isoformat())
+        start = date.fromisoformat(
+            request.GET.get("start") or (end - timedelta(days=365)).isoformat()
+        )
+    except ValueError:
+        return HttpResponseBadRequest("start and end must be dates as YYYY-MM-DD")
+
+    if strain := request.GET.get("strain"):
+        snapshots = (
+            ColonySnapshot.objects.filter(strain=strain).between(start, end).values()
+        )
+    else:
+        snapshots = ColonySnapshot.objects.daily_totals(start, end)
+    return JsonResponse({"snapshots": list(snapshots)})
+
+
 @login_required
 def add_mouse_to_repository(request):
     if request.method == "POST":
@@ -35,6 +94,23 @@ def add_mouse_to_repository(request):
     return render(request, "add_mouse_to_repository.html", {"form": form})
 
 
+@login_required
+def import_mice(request):
+    result = None
+    if request.method == "POST":
+        form = MouseImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            file = form.cleaned_data["file"]
+            try:
+                result = MouseImporter().run(read_rows(file, file.name))
+            except ImportReadError as e:
+                form.add_error("file", str(e))
+    else:
+        form = MouseImportForm()
+    context = {"form": form, "result": result, "columns": IMPORT_COLUMNS}
+    return render(request, "import_mice.html", context)
+
+
 @login_required
 def edit_mouse_in_repository(request, pk):
     mouse = Mouse.objects.get(pk=pk)
@@ -63,3 +139,57 @@ def show_mouse_comment(request, pk):
         else:
             form = MouseCommentForm(instance=comment.first())
     return render(request, "show_mouse_comment.html", {"form": form})
+
+
+@login_required
+def filter_presets(request, form=None):
+    presets = (
+        FilterPreset.objects.visible_to(request.user)
+        .select_related("owner", "project")
+        .order_by("name")
+    )
+    return render(
+        request, "filter_presets.html", {"presets": presets, "preset_form": form}
+    )
+
+
+@login_required
+@require_POST
+def save_filter_preset(request):
+    form = FilterPresetForm(request.POST)
+    if not form.is_valid():
+        return filter_presets(request, form)
+    preset, _ = FilterPreset.objects.update_or_create(
+        owner=request.user,
+        name=form.cleaned_data["name"],
+        defaults={
+            field: form.cleaned_data[field] for field in ["shared", "params", "project"]
+        },
+    )
+    return redirect("mice_repository:show_filter_preset", preset_id=preset.pk)
+
+
+# Pages through the preset's cached pks, so a page only loads the rows it shows
+@login_required
+def show_filter_preset(request, preset_id):
+    preset = get_object_or_404(
+        FilterPreset.objects.visible_to(request.user), pk=preset_id
+    )
+    page = Paginator(preset.mice_pks(), REPOSITORY_PAGE_SIZE).get_page(
+        request.GET.get("page")
+    )
+    mice = Mouse.objects.repository_listing().in_bulk(page.object_list)
+    page.object_list = [mice[pk] for pk in page.object_list if pk in mice]
+    context = {
+        "preset": preset,
+        "preset_mice": page,
+        "page_range": page.paginator.get_elided_page_range(page.number),
+    }
+    return render(request, "filter_preset.html", context)
+
+
+@login_required
+@require_POST
+def delete_filter_preset(request, preset_id):
+    get_object_or_404(FilterPreset, pk=preset_id, owner=request.user).delete()
+    return redirect("mice_repository:filter_presets")
@@ -3,7 +3,7 @@ from django.utils.encoding import force_str
 from django.utils.safestring import mark_safe
 
 from main.constants import EARMARK_CHOICES_PAIRED
-from mice_repository.models import Mouse
+from mice_repository.models import Mouse, MouseSelection
 from mice_requests.models import Request
 
 
@@ -42,6 +42,14 @@ class RequestForm(forms.ModelForm):
     mice = forms.ModelMultipleChoiceField(
         queryset=Mouse.objects.all(),
         widget=ReadOnlyMiceField,
+        required=False,
+    )
+
+    # Large selections are passed by reference instead of one hidden input per mouse
+    selection = forms.ModelChoiceField(
+        queryset=MouseSelection.objects.all(),
+        widget=forms.HiddenInput,
+        required=False,
     )
 
     # Should be able to initialise a form when no mice are selected from MouseSelectionForm
@@ -49,27 +57,15 @@ class RequestForm(forms.ModelForm):
     def clean(self):
         cleaned_data = super().clean()
         task_type = cleaned_data.get("task_type")
+        if cleaned_data.get("selection"):
+            cleaned_data["mice"] = cleaned_data["selection"].mice()
         mice = cleaned_data.get("mice")
 
         errors = {}
-        if not mice or len(mice) == 0:
+        if mice is None or not mice.exists():
             raise forms.ValidationError("You must select at least one mouse.")
-        else:
-            mice_errors = []
-            if task_type == "Cull":
-                for mouse in mice:
-                    if mouse.is_culled():
-                        mice_errors.append(f"Mouse {mouse} has already been culled.")
-                    elif Request.objects.filter(task_type="Cull", mice=mouse).exists():
-                        mice_errors.append(f"Mouse {mouse} already has a cull request.")
-
-            elif task_type == "Clip":
-                for mouse in mice:
-                    if mouse.is_genotyped():
-                        mice_errors.append(f"Mouse {mouse} has already been clipped.")
-                    elif Request.objects.filter(task_type="Clip", mice=mouse).exists():
-                        mice_errors.append(f"Mouse {mouse} already has a clip request.")
-
+        elif task_type in ["Cull", "Clip"]:
+            mice_errors = self.task_errors(mice, task_type)
             if mice_errors:
                 errors["mice"] = mice_errors
 
@@ -78,6 +74,28 @@ class RequestForm(forms.ModelForm):
 
         return cleaned_data
 
+    # Mice that already had the task done, or already have a request for it, found with two queries
+    # however many mice there are
+    @staticmethod
+    def task_errors(mice, task_type):
+        if task_type == "Cull":
+            done = mice.culled()
+            done_message, requested_message = "been culled", "a cull request"
+        else:
+            done = mice.exclude(earmark="")
+            done_message, requested_message = "been clipped", "a clip request"
+        done_pks = set(done.values_list("pk", flat=True))
+        requested_pks = set(
+            mice.filter(request__task_type=task_type).values_list("pk", flat=True)
+        )
+        errors = []
+        for pk in sorted(done_pks | requested_pks):
+            if pk in done_pks:
+                errors.append(f"Mouse {pk} has already {done_message}.")
+            else:
+                errors.append(f"Mouse {pk} already has {requested_message}.")
+        return errors
+
     class Meta:
         model = Request
         fields = ["mice", "task_type"]
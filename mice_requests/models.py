@@ -1,7 +1,8 @@
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 
 from main.constants import EARMARK_CHOICES
+from mice_repository.models import Mouse
 from system_users.models import CustomUser
 
 
@@ -25,43 +26,50 @@ class Request(models.Model):
 
     # Need confirmed_by attribute. Could replace confirmed attribute with is_confirmed method
 
-    # Break this ValidationErrors into validate_clip() and validate_cull() methods
+    # Validates and applies the task to every mouse in one transaction. The request and its mice are locked
+    # first, so a concurrent confirmation waits and then finds the request already confirmed. The mice are
+    # checked with one query and changed with one UPDATE, whatever the size of the request
     def confirm(self, earmark=None, date=None):
-        if self.confirmed:
-            raise ValidationError("Request is already confirmed")
-        # This clip logic can be moved to a mouse method. Or a request method?
-        if self.task_type == "Clip":
-            if earmark is None:
-                raise ValidationError("Earmark is required to confirm request")
-            elif earmark not in [choice for choice in EARMARK_CHOICES]:
-                raise ValidationError("Earmark is not valid")
-            elif any([mouse.is_genotyped() for mouse in self.mice.all()]):
-                raise ValidationError(
-                    "A mouse in this clip request has already been clipped"
-                )
-            else:
-                for mouse in self.mice.all():
-                    # Add clipped_date
-                    # Add genotyper
-                    mouse.earmark = earmark
-                    mouse.save()
+        with transaction.atomic():
+            if Request.objects.select_for_update().get(pk=self.pk).confirmed:
+                raise ValidationError("Request is already confirmed")
+            mice = Mouse.objects.filter(request=self)
+            if self.task_type == "Clip":
+                if earmark is None:
+                    raise ValidationError("Earmark is required to confirm request")
+                elif earmark not in [choice for choice in EARMARK_CHOICES]:
+                    raise ValidationError("Earmark is not valid")
+                elif self.lock_mice(mice, "earmark", lambda value: value != ""):
+                    raise ValidationError(
+                        "A mouse in this clip request has already been clipped"
+                    )
+                # Add clipped_date
+                # Add genotyper
+                mice.update(earmark=earmark)
+
+            elif self.task_type == "Cull":
+                if date is None:
+                    raise ValidationError("Date is required to confirm request")
+                elif self.lock_mice(
+                    mice, "culled_date", lambda value: value is not None
+                ):
+                    raise ValidationError(
+                        "A mouse in this cull request has already been culled"
+                    )
+                mice.update(culled_date=date)
 
-        elif self.task_type == "Cull":
-            if date is None:
-                raise ValidationError("Date is required to confirm request")
-            elif any([mouse.is_culled() for mouse in self.mice.all()]):
-                raise ValidationError(
-                    "A mouse in this cull request has already been culled"
-                )
             else:
-                for mouse in self.mice.all():
-                    mouse.cull(date)
+                raise ValidationError("Request type is not valid")
 
-        else:
-            raise ValidationError("Request type is not valid")
+            self.confirmed = True
+            self.save(update_fields=["confirmed"])
 
-        self.confirmed = True
-        self.save()
+    # Locks the mice and reads the one field the task changes in a single query. Returns whether the task
+    # was already done to any of them
+    @staticmethod
+    def lock_mice(mice, field, is_done):
+        values = mice.select_for_update(of=("self",)).values_list(field, flat=True)
+        return any(is_done(value) for value in values)
 
     def __str__(self):
         return f"{self.request_id}"
@@ -4,7 +4,13 @@ from django.core.exceptions import ValidationError
 from django.db.utils import IntegrityError
 from django.test import TestCase
 
-from main.model_factories import MiceRequestFactory, MouseFactory, UserFactory
+from main.model_factories import (
+    MiceRequestFactory,
+    MouseFactory,
+    StrainFactory,
+    UserFactory,
+)
+from mice_repository.models import MouseCensus
 from mice_requests.models import Request
 from system_users.models import CustomUser
 
@@ -93,7 +99,13 @@ class RequestModelConfirmClipTest(TestCase):
             self.request.confirm(earmark="TL")
         self.assertFalse(self.request.confirmed)
 
-    # test no mice were recorded as clipped in an unsuccessful confirm
+    def test_no_mice_clipped_in_unsuccessful_confirm(self):
+        self.mice[0].earmark = "TL"
+        self.mice[0].save()
+        with self.assertRaises(ValidationError):
+            self.request.confirm(earmark="TR")
+        self.mice[1].refresh_from_db()
+        self.assertFalse(self.mice[1].is_genotyped())
 
 
 class RequestModelConfirmCullTest(TestCase):
@@ -119,8 +131,18 @@ class RequestModelConfirmCullTest(TestCase):
         with self.assertRaises(ValidationError):
             self.request.confirm(date=date.today())
         self.assertFalse(self.request.confirmed)
+        self.assertFalse(Request.objects.get(pk=self.request.pk).confirmed)
+
+    def test_no_mice_culled_in_unsuccessful_confirm(self):
+        self.mice[0].cull(date.today())
+        with self.assertRaises(ValidationError):
+            self.request.confirm(date=date.today())
+        self.mice[1].refresh_from_db()
+        self.assertFalse(self.mice[1].is_culled())
 
-    # test no mice were recorded as culled in an unsuccessful confirm
+    def test_census_updated_on_confirm(self):
+        self.request.confirm(date=date.today())
+        self.assertFalse(MouseCensus.objects.filter(alive__gt=0).exists())
 
     def test_date_required_to_confirm(self):
         with self.assertRaises(ValidationError):
@@ -128,3 +150,45 @@ class RequestModelConfirmCullTest(TestCase):
 
 
 # Request is only confirmed if all mice are successfully clipped, culled, etc.
+
+
+class RequestModelConfirmBatchTest(TestCase):
+
+    def batch(self, task_type, size):
+        strain = StrainFactory()
+        return MiceRequestFactory(
+            mice=[
+                MouseFactory(
+                    strain=strain, sex="F", dob=date(2024, 1, 1), culled_date=None
+                )
+                for _ in range(size)
+            ],
+            task_type=task_type,
+            requested_by=test_user,
+        )
+
+    def test_clip_queries_independent_of_request_size(self):
+        for size in [2, 20]:
+            request = self.batch("Clip", size)
+            with self.assertNumQueries(6):
+                request.confirm(earmark="TL")
+
+    # The census row of the culled mice is moved with one more UPDATE
+    def test_cull_queries_independent_of_request_size(self):
+        for size in [2, 20]:
+            request = self.batch("Cull", size)
+            with self.assertNumQueries(10):
+                request.confirm(date=date.today())
+
+    # Another confirmation committed after this instance was loaded is seen once the request row is locked
+    def test_stale_request_cannot_confirm_again(self):
+        request = MiceRequestFactory(
+            mice=[MouseFactory(culled_date=None)],
+            task_type="Cull",
+            requested_by=test_user,
+        )
+        stale = Request.objects.get(pk=request.pk)
+        request.confirm(date=date(2024, 1, 1))
+        with self.assertRaises(ValidationError):
+            stale.confirm(date=date(2024, 2, 1))
+        self.assertEqual(request.mice.get().culled_date, date(2024, 1, 1))
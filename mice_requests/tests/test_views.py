@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from main.form_factories import MiceRequestFormFactory
@@ -8,6 +10,7 @@ from main.model_factories import (
     ProjectFactory,
     UserFactory,
 )
+from mice_repository.models import Mouse, MouseSelection
 from mice_requests.forms import RequestForm
 from mice_requests.models import Request
 
@@ -43,6 +46,21 @@ class ShowRequestsViewTest(TestCase):
         )
 
 
+class ShowRequestsViewQueryCountTest(TestCase):
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            test_client.get(reverse("mice_requests:show_requests"))
+        return len(queries)
+
+    def test_query_count_independent_of_row_count(self):
+        MiceRequestFactory(mice=MouseFactory.create_batch(2))
+        small_page_queries = self.count_queries()
+        for _ in range(5):
+            MiceRequestFactory(mice=MouseFactory.create_batch(3))
+        self.assertEqual(self.count_queries(), small_page_queries)
+
+
 class AddRequestViewGetTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -101,6 +119,56 @@ class AddRequestViewPostTest(TestCase):
         )
 
 
+class AddRequestFromSelectionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = ProjectFactory()
+        cls.mice = MouseFactory.create_batch(3, project=cls.project)
+        cls.url = reverse("mice_requests:add_request", args=[cls.project.project_name])
+
+    def setUp(self):
+        self.selection = MouseSelection.from_mice(
+            Mouse.objects.all(), created_by=test_user
+        )
+        session = test_client.session
+        session["mouse_selection"] = str(self.selection.pk)
+        session.save()
+
+    def test_selection_passed_by_reference(self):
+        response = test_client.get(self.url)
+        self.assertContains(response, f'value="{self.selection.pk}"')
+        self.assertEqual(response.context["selected_count"], 3)
+        self.assertNotContains(response, 'name="mice"')
+
+    def test_request_created_from_selection(self):
+        test_client.post(
+            self.url, {"task_type": "Clip", "selection": str(self.selection.pk)}
+        )
+        self.assertQuerysetEqual(
+            Request.objects.get().mice.all(), self.mice, ordered=False
+        )
+
+    def test_validation_query_count_independent_of_selection_size(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                form = RequestForm(
+                    {"task_type": "Cull", "selection": str(self.selection.pk)}
+                )
+                form.is_valid()
+            return len(queries)
+
+        few_queries = count_queries()
+        MouseFactory.create_batch(10)
+        self.selection = MouseSelection.from_mice(Mouse.objects.all())
+        self.assertEqual(count_queries(), few_queries)
+
+    def test_other_users_selection_not_used(self):
+        self.selection.created_by = UserFactory()
+        self.selection.save()
+        response = test_client.get(self.url)
+        self.assertNotIn("selected_count", response.context)
+
+
 class EditRequestViewGetTest(TestCase):
     @classmethod
     def setUpClass(cls):
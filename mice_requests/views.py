@@ -1,36 +1,51 @@
 from django.contrib.auth.decorators import login_required
+from django.db.models import Prefetch
 from django.shortcuts import redirect, render
 from django.utils.decorators import method_decorator
 from django.views import View
 
-from mice_repository.models import Mouse
+from mice_repository.models import Mouse, MouseSelection
 from mice_requests.forms import ClipForm, CullForm, RequestForm
 from mice_requests.models import Request
 
+# Number of selected mice listed on the add request page. The rest are only counted
+SELECTION_PREVIEW_SIZE = 50
+
 
 @login_required
 def show_requests(http_request):
-    requests = Request.objects.all()
+    requests = Request.objects.select_related("requested_by").prefetch_related(
+        Prefetch("mice", queryset=Mouse.objects.request_listing())
+    )
     return render(http_request, "show_requests.html", {"requests": requests})
 
 
 @login_required
 def add_request(http_request, project_name):
+    selection = None
     if http_request.method == "POST":
         form = RequestForm(http_request.POST)
         if form.is_valid():
             request = form.save(commit=False)
             request.requested_by = http_request.user
             request.save()
-            request.mice.set(form.cleaned_data["mice"])
+            request.mice.set(form.cleaned_data["mice"].values_list("pk", flat=True))
             return redirect("projects:show_project", project_name=project_name)
+        selection = form.cleaned_data.get("selection")
     else:
-        selected_mice_pks = http_request.session.get("selected_mice", [])
-        selected_mice = Mouse.objects.filter(pk__in=selected_mice_pks)
-        form = RequestForm(initial={"mice": selected_mice})
-    return render(
-        http_request, "add_request.html", {"form": form, "project_name": project_name}
-    )
+        selection = MouseSelection.objects.filter(
+            pk=http_request.session.get("mouse_selection"),
+            created_by=http_request.user,
+        ).first()
+        form = RequestForm(initial={"selection": selection})
+    context = {"form": form, "project_name": project_name}
+    if selection:
+        selected_mice = selection.mice().order_by("_global_id")
+        context["selected_count"] = selected_mice.count()
+        context["selected_preview"] = selected_mice.values_list("pk", flat=True)[
+            :SELECTION_PREVIEW_SIZE
+        ]
+    return render(http_request, "add_request.html", context)
 
 
 @login_required
@@ -1,3 +1,5 @@
+import re
+
 from django import forms
 
 from mice_repository.models import Mouse
@@ -34,6 +36,23 @@ class ProjectForm(forms.ModelForm):
         fields = "__all__"
 
 
+# Mouse IDs typed or pasted into one box, separated by commas, spaces or new lines. Unlike a select, it does not
+# list every available mouse, so the form stays small however many mice there are
+class MouseIdsInput(forms.Textarea):
+
+    def value_from_datadict(self, data, files, name):
+        values = data.getlist(name) if hasattr(data, "getlist") else data.get(name)
+        if isinstance(values, str):
+            values = [values]
+        return [pk for value in values or [] for pk in re.split(r"[\s,]+", value) if pk]
+
+    def format_value(self, value):
+        if isinstance(value, (list, tuple)):
+            return "\n".join(str(pk) for pk in value)
+        return super().format_value(value)
+
+
+# Mice are either listed by ID or are all available mice matching the MouseFilter fields posted with the form
 class AddMouseToProjectForm(forms.Form):
 
     def __init__(self, *args, **kwargs):
@@ -48,6 +67,25 @@ class AddMouseToProjectForm(forms.Form):
 
     mice = forms.ModelMultipleChoiceField(
         queryset=None,
-        widget=forms.SelectMultiple(attrs={"class": "form-select", "size": "8"}),
-        required=True,
+        widget=MouseIdsInput(
+            attrs={"class": "form-control", "rows": "4", "placeholder": "Mouse IDs"}
+        ),
+        required=False,
     )
+    assign_matching = forms.BooleanField(
+        label="Add all available mice matching the filter",
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+        required=False,
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if (
+            not cleaned_data.get("assign_matching")
+            and not cleaned_data.get("mice")
+            and "mice" not in self.errors
+        ):
+            raise forms.ValidationError(
+                "Enter mouse IDs or add all mice matching the filter"
+            )
+        return cleaned_data
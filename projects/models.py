@@ -1,10 +1,21 @@
 from django.core.validators import MinLengthValidator
 from django.db import models
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
 
 from system_users.models import CustomUser
 
 
+class ProjectQuerySet(models.QuerySet):
+
+    # Alive mice are totalled from the precomputed MouseCensus rows rather than counted per project
+    def with_alive_mice(self):
+        return self.annotate(alive_mice=Coalesce(Sum("census__alive"), 0))
+
+
 class Project(models.Model):
+    objects = ProjectQuerySet.as_manager()
+
     project_id = models.AutoField(primary_key=True)
     project_name = models.CharField(
         db_column="Name",
@@ -21,6 +32,11 @@ class Project(models.Model):
     strains = models.ManyToManyField("strain.Strain", db_column="Strain")
     researchers = models.ManyToManyField(CustomUser)
 
+    # Assigns the given mice that are not yet in a project with one UPDATE. Mice claimed by another project in
+    # the meantime are left alone, so the number returned is how many were actually added
+    def claim_mice(self, mice_qs):
+        return mice_qs.filter(project__isnull=True).update(project=self)
+
     def __str__(self):
         return f"{self.project_name}"
 
@@ -57,3 +57,26 @@ class AddMouseToProjectFormTest(TestCase):
         self.mouse1.project = ProjectFactory()
         self.mouse1.save()
         self.assertEqual(self.form.fields["mice"].queryset.count(), 2)
+
+    def test_pasted_mouse_ids(self):
+        self.form = AddMouseToProjectForm(
+            strains=self.strains,
+            data={"mice": f"{self.mouse1.pk}, {self.mouse2.pk}\n{self.mouse3.pk}"},
+        )
+        self.assertTrue(self.form.is_valid())
+        self.assertEqual(self.form.cleaned_data["mice"].count(), 3)
+
+    def test_assign_matching_without_mice(self):
+        self.form = AddMouseToProjectForm(
+            strains=self.strains, data={"assign_matching": "on"}
+        )
+        self.assertTrue(self.form.is_valid())
+
+    def test_neither_mice_nor_assign_matching(self):
+        self.form = AddMouseToProjectForm(strains=self.strains, data={})
+        self.assertFalse(self.form.is_valid())
+
+    def test_available_mice_not_rendered(self):
+        self.assertNotIn(
+            self.mouse1.pk, str(AddMouseToProjectForm(strains=self.strains))
+        )
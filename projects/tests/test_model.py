@@ -10,6 +10,7 @@ from main.model_factories import (
     StrainFactory,
     UserFactory,
 )
+from mice_repository.models import Mouse
 from projects.models import Project
 
 
@@ -73,3 +74,26 @@ class ProjectModelMiceRelatedNameTest(TestCase):
 
     def test_project_live_and_culled_mice_count(self):
         self.assertEqual(self.project.mice.count(), 3)
+
+
+class ProjectClaimMiceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project, cls.other_project = ProjectFactory(), ProjectFactory()
+        cls.free = MouseFactory.create_batch(3)
+        cls.taken = MouseFactory(project=cls.other_project)
+
+    def test_claims_unassigned_mice(self):
+        self.assertEqual(self.project.claim_mice(Mouse.objects.all()), 3)
+        self.assertEqual(self.project.mice.count(), 3)
+
+    def test_leaves_mice_in_other_projects(self):
+        self.project.claim_mice(Mouse.objects.all())
+        self.taken.refresh_from_db()
+        self.assertEqual(self.taken.project, self.other_project)
+
+    def test_census_follows_claimed_mice(self):
+        self.project.claim_mice(Mouse.objects.all())
+        alive = dict(Project.objects.with_alive_mice().values_list("pk", "alive_mice"))
+        self.assertEqual(alive[self.project.pk], 3)
+        self.assertEqual(alive[self.other_project.pk], 1)
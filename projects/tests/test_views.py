@@ -1,16 +1,21 @@
+from django.core.cache import cache
+from django.db import connection
 from django.http import Http404
 from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from common.forms import MouseSelectionForm
 from main.filters import MouseFilter
 from main.form_factories import MouseSelectionFormFactory, ProjectFormFactory
 from main.model_factories import (
+    MouseCommentFactory,
     MouseFactory,
     ProjectFactory,
     StrainFactory,
     UserFactory,
 )
+from mice_repository.models import Mouse, MouseSelection
 from projects.forms import AddMouseToProjectForm, ProjectForm
 from projects.models import Project
 from projects.views import ShowProjectView, add_project
@@ -48,6 +53,27 @@ class ListProjectsViewGetTest(TestCase):
     def test_project_mice_count(self):
         self.assertEqual(self.response.context["myprojects"][0].mice.count(), 1)
 
+    def test_alive_mice_from_census(self):
+        self.assertEqual(self.response.context["myprojects"][0].alive_mice, 1)
+
+
+class ListProjectsViewQueryCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        strains = StrainFactory.create_batch(3)
+        researchers = UserFactory.create_batch(2)
+        for project in ProjectFactory.create_batch(200):
+            project.strains.add(*strains)
+            project.researchers.add(*researchers)
+        MouseFactory(strain=strains[0], project=project)
+
+    def test_constant_query_count(self):
+        # Session, user, projects with alive mice, strains and researchers
+        with self.assertNumQueries(5):
+            response = test_client.get(reverse("projects:list_projects"))
+        self.assertEqual(len(response.context["myprojects"]), 200)
+        self.assertContains(response, "<td>1</td>")
+
 
 class AddNewProjectViewGetTest(TestCase):
     @classmethod
@@ -158,12 +184,72 @@ class ShowProjectViewGetTest(TestCase):
     def test_query_params_in_context(self):
         self.assertIn("query_params", self.response.context)
 
+    def test_mice_annotated_with_age(self):
+        project = ProjectFactory()
+        MouseFactory(project=project)
+        response = test_client.get(
+            reverse("projects:show_project", args=[project.project_name])
+        )
+        self.assertEqual(response.context["project_mice"][0].age_in_days, 0)
+
     def test_get_non_existent_project(self):
         view = ShowProjectView()
         with self.assertRaises(Http404):
             view.get_project("nonexistent")
 
 
+class ShowProjectViewQueryCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = ProjectFactory()
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            test_client.get(
+                reverse("projects:show_project", args=[self.project.project_name])
+            )
+        return len(queries)
+
+    def test_query_count_independent_of_row_count(self):
+        MouseFactory.create_batch(2, project=self.project)
+        small_page_queries = self.count_queries()
+        MouseFactory.create_batch(10, project=self.project)
+        self.assertEqual(self.count_queries(), small_page_queries)
+
+    # The paginator count
+    def test_count_cached_until_mice_change(self):
+        cache.clear()
+        MouseFactory.create_batch(2, project=self.project)
+        first_queries = self.count_queries()
+        self.assertEqual(self.count_queries(), first_queries - 1)
+        MouseFactory(project=self.project)
+        self.assertEqual(self.count_queries(), first_queries)
+
+    def test_facet_counts_only_when_asked(self):
+        MouseFactory.create_batch(2, project=self.project, sex="M")
+        url = reverse("projects:show_project", args=[self.project.project_name])
+        self.assertNotContains(test_client.get(url + "?search="), "Male (2)")
+        self.assertContains(test_client.get(url + "?search=&facets=on"), "Male (2)")
+
+    def test_count_kept_when_other_project_changes(self):
+        MouseFactory.create_batch(2, project=self.project)
+        self.count_queries()
+        MouseFactory(project=ProjectFactory())
+        with CaptureQueriesContext(connection) as queries:
+            test_client.get(
+                reverse("projects:show_project", args=[self.project.project_name])
+            )
+        self.assertFalse([query for query in queries if "COUNT(*)" in query["sql"]])
+
+    def test_next_link_carries_cursor(self):
+        MouseFactory.create_batch(16, project=self.project)
+        response = test_client.get(
+            reverse("projects:show_project", args=[self.project.project_name])
+        )
+        page = response.context["project_mice"]
+        self.assertContains(response, f"&page=2&after={page.next_cursor}")
+
+
 class ShowProjectViewPostTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -184,13 +270,65 @@ class ShowProjectViewPostTest(TestCase):
             reverse("mice_requests:add_request", args=[self.project.project_name]),
         )
 
-    def test_selected_mice_in_session(self):
-        self.assertEqual(
-            self.session["selected_mice"],
-            [mouse.pk for mouse in self.project.mice.all()],
+    def test_selection_in_session(self):
+        selection = MouseSelection.objects.get(pk=self.session["mouse_selection"])
+        self.assertQuerysetEqual(
+            selection.mice(), self.project.mice.all(), ordered=False
         )
 
 
+class ShowProjectViewSelectAllMatchingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = ProjectFactory()
+        cls.males = MouseFactory.create_batch(3, sex="M", project=cls.project)
+        MouseFactory(sex="F", project=cls.project)
+
+    def setUp(self):
+        self.response = test_client.post(
+            reverse("projects:show_project", args=[self.project.project_name])
+            + "?search=&sex=M",
+            {"select_all_matching": ""},
+        )
+        self.selection = MouseSelection.objects.get(
+            pk=test_client.session["mouse_selection"]
+        )
+
+    def test_redirects_to_add_request(self):
+        self.assertRedirects(
+            self.response,
+            reverse("mice_requests:add_request", args=[self.project.project_name]),
+        )
+
+    def test_selection_stores_filter_not_mice(self):
+        self.assertEqual(self.selection.mouse_ids, [])
+        self.assertEqual(self.selection.filter_params["sex"], ["M"])
+
+    def test_selection_matches_filter(self):
+        self.assertQuerysetEqual(self.selection.mice(), self.males, ordered=False)
+
+
+class ShowProjectViewSelectAllInvalidFilterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = ProjectFactory()
+        MouseFactory.create_batch(3, project=cls.project)
+
+    def setUp(self):
+        self.response = test_client.post(
+            reverse("projects:show_project", args=[self.project.project_name])
+            + "?search=&sex=X",
+            {"select_all_matching": ""},
+        )
+
+    def test_nothing_selected(self):
+        self.assertEqual(self.response.status_code, 200)
+        self.assertFalse(MouseSelection.objects.exists())
+
+    def test_filter_errors_shown(self):
+        self.assertContains(self.response, "Sex: Select a valid choice.")
+
+
 class ShowProjectViewInvalidPostTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -244,6 +382,58 @@ class InfoPanelViewGetTest(TestCase):
         self.assertIn("mouse", self.response.context)
 
 
+class InfoPanelCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mouse = MouseFactory()
+        cls.other_mouse = MouseFactory()
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("projects:info_panel", args=[self.mouse.pk])
+
+    def test_repeat_click_served_from_cache(self):
+        first = test_client.get(self.url)
+        # Session and user lookups only
+        with self.assertNumQueries(2):
+            second = test_client.get(self.url)
+        self.assertEqual(second.content, first.content)
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = test_client.get(self.url)["ETag"]
+        response = test_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_saving_mouse_invalidates_panel(self):
+        etag = test_client.get(self.url)["ETag"]
+        self.mouse.save()
+        response = test_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_saving_other_mouse_keeps_panel(self):
+        etag = test_client.get(self.url)["ETag"]
+        self.other_mouse.save()
+        self.assertEqual(test_client.get(self.url)["ETag"], etag)
+
+    def test_comment_change_shown(self):
+        test_client.get(self.url)
+        comment = MouseCommentFactory(comment_id=self.mouse, comment_text="Limping")
+        self.assertContains(test_client.get(self.url), "Limping")
+        comment.comment_text = "Recovered"
+        comment.save()
+        self.assertContains(test_client.get(self.url), "Recovered")
+
+    def test_bulk_update_invalidates_panel(self):
+        etag = test_client.get(self.url)["ETag"]
+        Mouse.objects.filter(pk=self.other_mouse.pk).update(coat="Black")
+        self.assertNotEqual(test_client.get(self.url)["ETag"], etag)
+
+    def test_missing_mouse(self):
+        response = test_client.get(reverse("projects:info_panel", args=["missing"]))
+        self.assertEqual(response.status_code, 404)
+
+
 class AddMouseToProjectViewGetTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -294,3 +484,96 @@ class AddMouseToProjectViewPostTest(TestCase):
 
     def test_mice_added_to_project(self):
         self.assertEqual(self.project.mice.count(), 2)
+
+    def test_census_moved_to_project(self):
+        self.assertEqual(Project.objects.with_alive_mice().get().alive_mice, 2)
+
+
+class AddMatchingMiceToProjectViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = ProjectFactory()
+        cls.strain = StrainFactory()
+        cls.project.strains.add(cls.strain)
+        cls.males = MouseFactory.create_batch(3, strain=cls.strain, sex="M")
+        cls.female = MouseFactory(strain=cls.strain, sex="F")
+        cls.other_strain_male = MouseFactory(sex="M")
+
+    def post(self, data):
+        return test_client.post(
+            reverse("projects:add_mouse_to_project", args=[self.project.project_name]),
+            data,
+            follow=True,
+        )
+
+    def test_adds_mice_matching_filter(self):
+        self.post({"assign_matching": "on", "sex": "M"})
+        self.assertCountEqual(self.project.mice.all(), self.males)
+
+    def test_reports_number_claimed(self):
+        response = self.post({"assign_matching": "on", "sex": "M"})
+        self.assertContains(response, f"3 mice added to {self.project.project_name}")
+
+    def test_invalid_filter_claims_nothing(self):
+        response = self.post({"assign_matching": "on", "sex": "X"})
+        self.assertEqual(self.project.mice.count(), 0)
+        self.assertTrue(response.context["filter_form"].errors["sex"])
+        self.assertNotContains(response, "mice added")
+
+    def test_mice_already_in_project_not_claimed(self):
+        other_project = ProjectFactory()
+        self.males[0].project = other_project
+        self.males[0].save()
+        response = self.post({"mice": [male.pk for male in self.males[1:]]})
+        self.assertContains(response, "2 mice added")
+        self.males[0].refresh_from_db()
+        self.assertEqual(self.males[0].project, other_project)
+
+    def test_query_count_independent_of_mice_claimed(self):
+        def count_queries():
+            Mouse.objects.update(project=None)
+            with CaptureQueriesContext(connection) as queries:
+                self.post({"assign_matching": "on"})
+            return len(queries)
+
+        # The first claim creates the project's census rows, later ones update them
+        count_queries()
+        few_queries = count_queries()
+        MouseFactory.create_batch(10, strain=self.strain)
+        self.assertEqual(count_queries(), few_queries)
+        self.assertEqual(self.project.mice.count(), 14)
+
+
+class ExportProjectMiceViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = ProjectFactory()
+        cls.female = MouseFactory(sex="F", project=cls.project)
+        cls.male = MouseFactory(sex="M", project=cls.project)
+        cls.other = MouseFactory(sex="F")
+
+    def get(self, params):
+        response = test_client.get(
+            reverse("projects:export_project_mice", args=[self.project.project_name]),
+            params,
+        )
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_exports_only_project_mice(self):
+        response, content = self.get({"format": "csv"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.female.pk, content)
+        self.assertIn(self.male.pk, content)
+        self.assertNotIn(self.other.pk, content)
+
+    def test_uses_filter_parameters(self):
+        _, content = self.get({"search": "", "sex": "M", "format": "csv"})
+        self.assertIn(self.male.pk, content)
+        self.assertNotIn(self.female.pk, content)
+
+    def test_non_existent_project(self):
+        response = test_client.get(
+            reverse("projects:export_project_mice", args=["nonexistent"])
+        )
+        self.assertEqual(response.status_code, 404)
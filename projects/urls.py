@@ -13,6 +13,11 @@ urlpatterns = [
         ShowProjectView.as_view(),
         name="show_project",
     ),
+    path(
+        "export_project_mice/<str:project_name>/",
+        views.export_project_mice,
+        name="export_project_mice",
+    ),
     path("info_panel/<str:mouse_id>/", views.info_panel, name="info_panel"),
     path(
         "add_mouse_to_project/<str:project_name>",
@@ -1,22 +1,40 @@
+import hashlib
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.response import TemplateResponse
+from django.utils.cache import patch_cache_control
 from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
 from django.views import View
+from django.views.decorators.http import condition
 
 from common.forms import MouseSelectionForm
+from main.exports import export_response
 from main.filters import MouseFilter
-from main.view_utils import get_query_params, paginate_queryset
-from mice_repository.models import Mouse
+from main.view_utils import get_query_params, windowed_paginate_queryset
+from mice_repository.forms import FilterPresetForm
+from mice_repository.models import (
+    Mouse,
+    MouseSelection,
+    mouse_version,
+    scope_version,
+)
 from projects.forms import AddMouseToProjectForm, ProjectForm
 from projects.models import Project
 
 
 @login_required
 def list_projects(request):
-    return TemplateResponse(
-        request, "list_projects.html", {"myprojects": Project.objects.all()}
+    projects = Project.objects.with_alive_mice().prefetch_related(
+        "strains", "researchers"
     )
+    return TemplateResponse(request, "list_projects.html", {"myprojects": projects})
 
 
 @login_required
@@ -46,17 +64,29 @@ def edit_project(request, project_name):
 
 @login_required
 def add_mouse_to_project(request, project_name):
-    project = Project.objects.get(project_name=project_name)
+    project = get_object_or_404(Project, project_name=project_name)
     strain_pks = list(project.strains.values_list("pk", flat=True))
+    filter_form = MouseFilter(project=project)
     if request.method == "POST":
         form = AddMouseToProjectForm(request.POST, strains=strain_pks)
         if form.is_valid():
             mice = form.cleaned_data["mice"]
-            project.mice.add(*mice)
-            project.save()
-            return redirect("projects:list_projects")
+            # django-filter drops fields that fail validation, which would widen the claim, so an invalid
+            # filter claims nothing and is shown again with its errors
+            if form.cleaned_data["assign_matching"]:
+                filter_form = MouseFilter(
+                    request.POST, queryset=form.fields["mice"].queryset, project=project
+                )
+                mice = filter_form.qs if filter_form.is_valid() else None
+            if mice is not None:
+                claimed = project.claim_mice(mice)
+                messages.success(request, f"{claimed} mice added to {project_name}")
+                return redirect("projects:list_projects")
+    else:
+        form = AddMouseToProjectForm(strains=strain_pks)
     context = {
-        "form": AddMouseToProjectForm(strains=strain_pks),
+        "form": form,
+        "filter_form": filter_form,
         "project_name": project_name,
     }
     return render(request, "add_mouse_to_project.html", context)
@@ -73,33 +103,64 @@ class ShowProjectView(View):
 
     def get_context(self, http_request, project_name, form_data=None):
         project = self.get_project(project_name)
-        mice_qs = MouseFilter.get_filtered_mice(
-            Mouse.objects.filter(project=project.pk).order_by("_global_id"),
+        project_qs = (
+            Mouse.objects.project_listing()
+            .with_age()
+            .filter(project=project.pk)
+            .order_by("_global_id")
+        )
+        mice_qs = MouseFilter.get_filtered_mice(project_qs, http_request)
+        project_mice = windowed_paginate_queryset(
+            mice_qs,
             http_request,
+            self.paginate_by,
+            cache_version=scope_version(project.pk),
         )
-        project_mice = paginate_queryset(mice_qs, http_request, self.paginate_by)
 
         return {
             "project": project,
             "project_mice": project_mice,
             "select_form": self.select_class(project=project),
-            "filter_form": MouseFilter.get_filter_form(mice_qs, http_request, project),
+            "filter_form": MouseFilter.get_filter_form(
+                project_qs, http_request, project, facets=True
+            ),
             "query_params": get_query_params(http_request),
+            "preset_form": FilterPresetForm(
+                initial={
+                    "params": get_query_params(http_request).urlencode(),
+                    "project": project,
+                }
+            ),
         }
 
+    def redirect_to_request(self, http_request, project_name, selection):
+        http_request.session["mouse_selection"] = str(selection.pk)
+        return redirect("mice_requests:add_request", project_name=project_name)
+
     def get(self, http_request, project_name):
         context = self.get_context(http_request, project_name)
         return render(http_request, self.template_name, context)
 
+    # The selection is stored server side and only its id is kept in the session. "Select all matching" stores
+    # the filter rather than the mice, so no mouse ids pass through the browser. An invalid filter selects
+    # nothing and the page is shown again with its errors
     def post(self, http_request, project_name):
         project = self.get_project(project_name)
+        if "select_all_matching" in http_request.POST:
+            query_params = get_query_params(http_request)
+            if MouseSelection.filter_is_valid(project, query_params):
+                selection = MouseSelection.from_filter(
+                    project, query_params, created_by=http_request.user
+                )
+                return self.redirect_to_request(http_request, project_name, selection)
+            context = self.get_context(http_request, project_name)
+            return render(http_request, self.template_name, context)
         select_form = self.select_class(http_request.POST, project=project)
         if select_form.is_valid():
-            selected_mice = select_form.cleaned_data["mice"]
-            http_request.session["selected_mice"] = [
-                mouse.pk for mouse in selected_mice
-            ]
-            return redirect("mice_requests:add_request", project_name=project_name)
+            selection = MouseSelection.from_mice(
+                select_form.cleaned_data["mice"], created_by=http_request.user
+            )
+            return self.redirect_to_request(http_request, project_name, selection)
         context = self.get_context(
             http_request, project_name, form_data=http_request.POST
         )
@@ -107,6 +168,46 @@ class ShowProjectView(View):
 
 
 @login_required
+def export_project_mice(request, project_name):
+    project = get_object_or_404(Project, project_name=project_name)
+    mice_qs = MouseFilter.get_filtered_mice(
+        Mouse.objects.filter(project=project.pk).order_by("_global_id"), request
+    )
+    return export_response(mice_qs, request.GET.get("format"), project_name)
+
+
+def info_panel_cache_key(mouse_id):
+    return f"info_panel:{quote(mouse_id)}:{mouse_version(mouse_id)}"
+
+
+# The panel is fetched on every click in the project table, so the rendered fragment is cached under the mouse's
+# version stamp, which changes when the mouse or its comment does
+def get_info_panel_key(request, mouse_id):
+    if not hasattr(request, "info_panel_key"):
+        request.info_panel_key = info_panel_cache_key(mouse_id)
+    return request.info_panel_key
+
+
+# Derived from the version stamp rather than the content, so a repeat click gets a 304 without the fragment
+# having to be in the cache
+def info_panel_etag(request, mouse_id):
+    return hashlib.md5(get_info_panel_key(request, mouse_id).encode()).hexdigest()
+
+
+@login_required
+@condition(etag_func=info_panel_etag)
 def info_panel(request, mouse_id):
-    mouse = Mouse.objects.get(pk=mouse_id)
-    return render(request, "info_panel.html", {"mouse": mouse})
+    cache_key = get_info_panel_key(request, mouse_id)
+    content = cache.get(cache_key)
+    if content is None:
+        mouse = get_object_or_404(
+            Mouse.objects.select_related("mousecomment"), pk=mouse_id
+        )
+        response = render(request, "info_panel.html", {"mouse": mouse})
+        cache.set(cache_key, response.content, settings.INFO_PANEL_CACHE_TIMEOUT)
+    else:
+        response = HttpResponse(content)
+    response["ETag"] = quote_etag(info_panel_etag(request, mouse_id))
+    # Browsers must revalidate, so an edited mouse is shown straight away
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("strain", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TubeCounter",
+            fields=[
+                (
+                    "strain",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="tube_counter",
+                        serialize=False,
+                        to="strain.strain",
+                    ),
+                ),
+                ("last_tube", models.IntegerField(db_column="Last Tube", default=0)),
+            ],
+            options={
+                "db_table": "tubecounter",
+                "managed": True,
+            },
+        ),
+    ]
@@ -1,12 +1,119 @@
-from django.db import models
+from datetime import date, timedelta
+
+from django.db import connection, models
+from django.db.models import Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+# Census annotation for each mouse age bucket, named after the matching MouseQuerySet methods
+CENSUS_AGE_BUCKETS = {
+    "0-2 months": "weaned_lt_2_months_old",
+    "2-6 months": "between_2_6_months_old",
+    "6-12 months": "between_6_12_months_old",
+    "12-24 months": "between_12_24_months_old",
+    "24+ months": "over_24_months_old",
+}
+
+
+class StrainQuerySet(models.QuerySet):
+
+    # Annotates every strain with its alive mice per age bucket and its unweaned pups in one grouped query.
+    # Bucket counts are conditional sums of the precomputed MouseCensus rows over the same dob ranges as
+    # MouseQuerySet.in_age_bucket, and pups are summed from breeding cages not yet transferred to stock
+    # in a correlated subquery
+    def with_census(self, on_date=None):
+        from breeding_cage.models import BreedingCage
+        from mice_repository.models import AGE_BUCKET_RANGES
+
+        on_date = on_date or date.today()
+        counts = {}
+        for label, name in CENSUS_AGE_BUCKETS.items():
+            min_days, max_days = AGE_BUCKET_RANGES[label]
+            in_bucket = Q(census__dob__lte=on_date - timedelta(days=min_days))
+            if max_days is not None:
+                in_bucket &= Q(census__dob__gt=on_date - timedelta(days=max_days))
+            counts[name] = Coalesce(Sum("census__alive", filter=in_bucket), 0)
+
+        pups = (
+            BreedingCage.objects.filter(
+                strain=OuterRef("pk"), transferred_to_stock=False
+            )
+            .order_by()
+            .values("strain")
+            .annotate(total=Sum(Coalesce("male_pups", 0) + Coalesce("female_pups", 0)))
+            .values("total")
+        )
+        return self.annotate(**counts, pups=Coalesce(Subquery(pups), 0))
 
 
 class Strain(models.Model):
     strain_name = models.CharField(db_column="Strain", primary_key=True, max_length=20)
 
+    objects = StrainQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.strain_name}"
 
     class Meta:
         managed = True
         db_table = "strain"
+
+
+# Hands out tube numbers for a strain without counting its mice.
+# Each reservation is a single UPDATE ... RETURNING, which locks the strain's row until the transaction ends,
+# so concurrent inserts can never be given the same tube
+class TubeCounter(models.Model):
+    strain = models.OneToOneField(
+        Strain, on_delete=models.CASCADE, primary_key=True, related_name="tube_counter"
+    )
+    last_tube = models.IntegerField(db_column="Last Tube", default=0)
+
+    # Returns a range of count consecutive tube numbers reserved for the strain
+    @classmethod
+    def reserve(cls, strain, count=1):
+        last_tube = cls.increment(strain, count)
+        if last_tube is None:
+            cls.seed(strain)
+            last_tube = cls.increment(strain, count)
+        return range(last_tube - count + 1, last_tube + 1)
+
+    # Creates the strain's counter on first use, starting after tubes already in use
+    @classmethod
+    def seed(cls, strain, minimum=0):
+        existing = strain.mice.aggregate(Max("tube"))["tube__max"] or 0
+        cls.objects.bulk_create(
+            [cls(strain=strain, last_tube=max(existing, minimum))],
+            ignore_conflicts=True,
+        )
+
+    @classmethod
+    def increment(cls, strain, count):
+        quote_name = connection.ops.quote_name
+        table = quote_name(cls._meta.db_table)
+        last_tube = quote_name(cls._meta.get_field("last_tube").column)
+        strain_column = quote_name(cls._meta.get_field("strain").column)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET {last_tube} = {last_tube} + %s "
+                f"WHERE {strain_column} = %s RETURNING {last_tube}",
+                [count, strain.pk],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    # Moves the counter past a manually chosen tube so it is never handed out again
+    @classmethod
+    def observe(cls, strain, tube):
+        counters = cls.objects.filter(strain=strain)
+        if (
+            not counters.filter(last_tube__lt=tube).update(last_tube=tube)
+            and not counters.exists()
+        ):
+            cls.seed(strain, tube)
+            counters.filter(last_tube__lt=tube).update(last_tube=tube)
+
+    def __str__(self):
+        return f"{self.strain}: {self.last_tube}"
+
+    class Meta:
+        managed = True
+        db_table = "tubecounter"
@@ -1,12 +1,18 @@
 from datetime import date, timedelta
 
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from main.model_factories import MouseFactory, StrainFactory, UserFactory
+from main.model_factories import (
+    BreedingCageFactory,
+    MouseFactory,
+    StrainFactory,
+    UserFactory,
+)
 from strain.forms import StrainForm
-from strain.models import Strain
+from strain.models import Strain, TubeCounter
 
 
 def setUpModule():
@@ -82,6 +88,50 @@ class StrainModelRelatedNameTest(TestCase):
     # Also want to identify pups currently in breeding cages of each strain
 
 
+class TubeCounterTest(TestCase):
+    def setUp(self):
+        self.strain = StrainFactory(strain_name="teststrain")
+
+    def test_first_reservation_starts_at_one(self):
+        self.assertEqual(TubeCounter.reserve(self.strain), range(1, 2))
+
+    def test_reserve_block(self):
+        TubeCounter.reserve(self.strain)
+        self.assertEqual(TubeCounter.reserve(self.strain, 5), range(2, 7))
+
+    def test_seeded_from_existing_tubes(self):
+        MouseFactory(strain=self.strain, tube=41)
+        TubeCounter.objects.all().delete()
+        self.assertEqual(TubeCounter.reserve(self.strain)[0], 42)
+
+    def test_counters_are_per_strain(self):
+        TubeCounter.reserve(self.strain, 3)
+        self.assertEqual(TubeCounter.reserve(StrainFactory())[0], 1)
+
+    def test_observe_moves_counter_past_manual_tube(self):
+        TubeCounter.reserve(self.strain)
+        TubeCounter.observe(self.strain, 10)
+        self.assertEqual(TubeCounter.reserve(self.strain)[0], 11)
+
+    def test_observe_never_moves_counter_back(self):
+        TubeCounter.reserve(self.strain, 10)
+        TubeCounter.observe(self.strain, 3)
+        self.assertEqual(TubeCounter.reserve(self.strain)[0], 11)
+
+    def test_observe_before_first_reservation(self):
+        TubeCounter.observe(self.strain, 7)
+        self.assertEqual(TubeCounter.reserve(self.strain)[0], 8)
+
+    def test_reservation_is_one_query_regardless_of_strain_size(self):
+        MouseFactory.create_batch(10, strain=self.strain)
+        with self.assertNumQueries(1):
+            TubeCounter.reserve(self.strain, 100)
+
+    def test_mouse_after_manual_tube_gets_next_tube(self):
+        MouseFactory(strain=self.strain, tube=5)
+        self.assertEqual(MouseFactory(strain=self.strain).tube, 6)
+
+
 class StrainFormTest(TestCase):
     def setUp(self):
         self.strain = StrainFactory()
@@ -95,6 +145,56 @@ class StrainFormTest(TestCase):
         self.assertFalse(form.is_valid())
 
 
+class StrainCensusTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.strain = StrainFactory(strain_name="CensusStrain")
+        cls.empty_strain = StrainFactory(strain_name="EmptyStrain")
+        for days, count in [(40, 1), (80, 2), (220, 3), (400, 4), (800, 1)]:
+            for _ in range(count):
+                MouseFactory(strain=cls.strain, dob=date.today() - timedelta(days=days))
+        MouseFactory(
+            strain=cls.strain,
+            dob=date.today() - timedelta(days=40),
+            culled_date=date.today(),
+        )
+        BreedingCageFactory(strain=cls.strain, male_pups=3, female_pups=2)
+        BreedingCageFactory(strain=cls.strain, male_pups=1, female_pups=None)
+        BreedingCageFactory(
+            strain=cls.strain, male_pups=4, female_pups=4, transferred_to_stock=True
+        )
+
+    def census(self, strain):
+        return Strain.objects.with_census().get(pk=strain.pk)
+
+    def test_age_bucket_counts(self):
+        strain = self.census(self.strain)
+        self.assertEqual(strain.weaned_lt_2_months_old, 1)
+        self.assertEqual(strain.between_2_6_months_old, 2)
+        self.assertEqual(strain.between_6_12_months_old, 3)
+        self.assertEqual(strain.between_12_24_months_old, 4)
+        self.assertEqual(strain.over_24_months_old, 1)
+
+    def test_matches_mouse_queryset_buckets(self):
+        strain = self.census(self.strain)
+        self.assertEqual(
+            strain.between_6_12_months_old,
+            self.strain.mice.between_6_12_months_old().count(),
+        )
+
+    def test_pups_from_unweaned_cages(self):
+        self.assertEqual(self.census(self.strain).pups, 6)
+
+    def test_strain_without_mice_or_cages(self):
+        strain = self.census(self.empty_strain)
+        self.assertEqual(strain.pups, 0)
+        self.assertEqual(strain.weaned_lt_2_months_old, 0)
+
+    def test_one_query_for_all_strains(self):
+        with self.assertNumQueries(1):
+            list(Strain.objects.with_census())
+
+
 class StrainManagementViewGetTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -111,6 +211,21 @@ class StrainManagementViewGetTest(TestCase):
         self.assertIsNotNone(self.response.context["strains"])
 
 
+class StrainManagementViewQueryCountTest(TestCase):
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            test_client.get(reverse("strain:strain_management"))
+        return len(queries)
+
+    def test_query_count_independent_of_strain_count(self):
+        MouseFactory()
+        few_strains_queries = self.count_queries()
+        for _ in range(5):
+            BreedingCageFactory(strain=MouseFactory().strain)
+        self.assertEqual(self.count_queries(), few_strains_queries)
+
+
 class AddStrainViewGetTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -6,7 +6,9 @@ from strain.forms import StrainForm
 
 @login_required
 def strain_management(request):
-    context = {"strains": StrainForm.Meta.model.objects.all()}
+    context = {
+        "strains": StrainForm.Meta.model.objects.with_census().order_by("strain_name")
+    }
     return render(request, "strain_management.html", context)
 
 
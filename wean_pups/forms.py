@@ -1,6 +1,7 @@
 from django import forms
 from django.core.exceptions import ValidationError
 
+from common.widgets import AutocompleteInput
 from mice_repository.models import Mouse
 from stock_cage.models import StockCage
 from strain.models import Strain
@@ -77,7 +78,12 @@ class PupsToStockCageForm(forms.ModelForm):
     cage = forms.ModelChoiceField(
         required=True,
         queryset=StockCage.objects.all(),
-        widget=forms.Select(attrs={"class": "form-select"}),
+        to_field_name="box_no",
+        widget=AutocompleteInput(
+            "common:autocomplete_cages",
+            params={"stock_only": "1"},
+            attrs={"class": "form-control"},
+        ),
         error_messages={"required": "Stock cage is required"},
     )
 